@@ -0,0 +1,38 @@
+"""Add the extracted text cache of documents
+
+Revision ID: 04cac5b69dfc
+Revises: 0c748d82ee86
+Create Date: 2026-10-17 09:02:41.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '04cac5b69dfc'
+down_revision = '0c748d82ee86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables are created only if missing, since databases built by db.create_all
+    # after this change already have them
+    op.create_table('document_text',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('fingerprint', sa.String(length=128), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.Column('text_size', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_accessed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('document_id'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('document_text')
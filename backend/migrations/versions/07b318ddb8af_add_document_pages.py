@@ -0,0 +1,42 @@
+"""Add per-page document text and the page count of documents
+
+Revision ID: 07b318ddb8af
+Revises: 04cac5b69dfc
+Create Date: 2026-10-17 09:03:12.540917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '07b318ddb8af'
+down_revision = '04cac5b69dfc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Columns and tables are only added if missing, since databases built by
+    # db.create_all after this change already have them
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('document')}
+    if 'page_count' not in columns:
+        op.add_column('document', sa.Column('page_count', sa.Integer(), nullable=True))
+
+    op.create_table('document_page',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('page_number', sa.Integer(), nullable=False),
+    sa.Column('fingerprint', sa.String(length=128), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('document_id', 'page_number'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('document_page')
+    with op.batch_alter_table('document') as batch_op:
+        batch_op.drop_column('page_count')
@@ -0,0 +1,68 @@
+"""Add the SQLite full-text index of page text
+
+Revision ID: 0c462ed56b51
+Revises: 3c3a6f64796e
+Create Date: 2026-10-17 14:02:18.553190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c462ed56b51'
+down_revision = '3c3a6f64796e'
+branch_labels = None
+depends_on = None
+
+# document_page_fts holds only the tokens and reads the text from
+# document_page; the triggers keep it in step with the page store
+TRIGGERS = {
+    'document_page_fts_insert': (
+        "AFTER INSERT ON document_page BEGIN "
+        "INSERT INTO document_page_fts (rowid, text) VALUES (new.id, new.text); "
+        "END"
+    ),
+    'document_page_fts_delete': (
+        "AFTER DELETE ON document_page BEGIN "
+        "INSERT INTO document_page_fts (document_page_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+        "END"
+    ),
+    'document_page_fts_update': (
+        "AFTER UPDATE ON document_page BEGIN "
+        "INSERT INTO document_page_fts (document_page_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+        "INSERT INTO document_page_fts (rowid, text) VALUES (new.id, new.text); "
+        "END"
+    ),
+}
+
+
+def upgrade():
+    # PostgreSQL searches the page store through its GIN index instead
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    # Databases that searched before this migration may have the index
+    # already, possibly in the older layout that kept a copy of the text
+    definition = op.get_bind().execute(sa.text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'document_page_fts'"
+    )).scalar()
+    if definition is None or 'content=' not in definition:
+        op.execute("DROP TABLE IF EXISTS document_page_fts")
+        op.execute(
+            "CREATE VIRTUAL TABLE document_page_fts USING fts5("
+            "text, content='document_page', content_rowid='id', tokenize='unicode61')"
+        )
+        op.execute("INSERT INTO document_page_fts (document_page_fts) VALUES ('rebuild')")
+
+    for name, definition in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {definition}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS document_page_fts")
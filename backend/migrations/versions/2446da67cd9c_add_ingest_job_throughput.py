@@ -0,0 +1,29 @@
+"""Add the extraction throughput of ingest jobs
+
+Revision ID: 2446da67cd9c
+Revises: 499c52fd2150
+Create Date: 2026-10-17 09:04:31.027659
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2446da67cd9c'
+down_revision = '499c52fd2150'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only added if missing, since databases built by db.create_all after
+    # this change already have the column
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('ingest_job')}
+    if 'pages_per_second' not in columns:
+        op.add_column('ingest_job', sa.Column('pages_per_second', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ingest_job') as batch_op:
+        batch_op.drop_column('pages_per_second')
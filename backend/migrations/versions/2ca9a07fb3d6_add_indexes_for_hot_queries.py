@@ -0,0 +1,59 @@
+"""Add indexes for list, filter and lookup queries
+
+Revision ID: 2ca9a07fb3d6
+Revises: f4d83ac52ab8
+Create Date: 2026-10-17 02:16:28.625077
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2ca9a07fb3d6'
+down_revision = 'f4d83ac52ab8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Replaced by the (created_at, id) indexes; only present in databases
+    # created with db.create_all shortly before migrations were added
+    op.drop_index('ix_project_created_at', table_name='project', if_exists=True)
+    op.drop_index('ix_document_created_at', table_name='document', if_exists=True)
+
+    op.create_index('ix_project_created_at_id', 'project', ['created_at', 'id'], unique=False)
+    op.create_index('ix_project_bid_due_date', 'project', ['bid_due_date'], unique=False)
+    op.create_index('ix_project_sender_email', 'project', ['sender_email'], unique=False)
+    op.create_index('ix_project_email_subject', 'project', ['email_subject'], unique=False)
+
+    op.create_index('ix_document_created_at_id', 'document', ['created_at', 'id'], unique=False)
+    op.create_index('ix_document_project_id_created_at', 'document', ['project_id', 'created_at'], unique=False)
+    op.create_index('ix_document_document_type_created_at', 'document', ['document_type', 'created_at'], unique=False)
+    op.create_index('ix_document_content_hash', 'document', ['content_hash'], unique=False)
+
+    op.create_index('ix_document_section_document_id', 'document_section', ['document_id'], unique=False)
+    op.create_index('ix_ingest_job_document_id', 'ingest_job', ['document_id'], unique=False)
+    op.create_index('ix_ingest_job_status', 'ingest_job', ['status'], unique=False)
+    op.create_index('ix_estimate_project_id', 'estimate', ['project_id'], unique=False)
+    op.create_index('ix_estimate_item_estimate_id', 'estimate_item', ['estimate_id'], unique=False)
+    op.create_index('ix_proposal_project_id', 'proposal', ['project_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_proposal_project_id', table_name='proposal')
+    op.drop_index('ix_estimate_item_estimate_id', table_name='estimate_item')
+    op.drop_index('ix_estimate_project_id', table_name='estimate')
+    op.drop_index('ix_ingest_job_status', table_name='ingest_job')
+    op.drop_index('ix_ingest_job_document_id', table_name='ingest_job')
+    op.drop_index('ix_document_section_document_id', table_name='document_section')
+
+    op.drop_index('ix_document_content_hash', table_name='document')
+    op.drop_index('ix_document_document_type_created_at', table_name='document')
+    op.drop_index('ix_document_project_id_created_at', table_name='document')
+    op.drop_index('ix_document_created_at_id', table_name='document')
+
+    op.drop_index('ix_project_email_subject', table_name='project')
+    op.drop_index('ix_project_sender_email', table_name='project')
+    op.drop_index('ix_project_bid_due_date', table_name='project')
+    op.drop_index('ix_project_created_at_id', table_name='project')
@@ -0,0 +1,45 @@
+"""Let upload sessions follow the deletion of their project or document
+
+Revision ID: 3c3a6f64796e
+Revises: 9bc2a2f501a6
+Create Date: 2026-10-17 13:20:41.184602
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c3a6f64796e'
+down_revision = '9bc2a2f501a6'
+branch_labels = None
+depends_on = None
+
+# Names the unnamed foreign keys of SQLite, so batch mode can drop them
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+FOREIGN_KEYS = [
+    ('project_id', 'project', 'CASCADE'),
+    ('document_id', 'document', 'SET NULL'),
+]
+
+
+def _replace_foreign_keys(with_ondelete):
+    existing = {
+        foreign_key['constrained_columns'][0]: foreign_key['name']
+        for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys('upload_session')
+    }
+    with op.batch_alter_table('upload_session', naming_convention=NAMING_CONVENTION) as batch_op:
+        for column, referred_table, ondelete in FOREIGN_KEYS:
+            name = f'fk_upload_session_{column}_{referred_table}'
+            batch_op.drop_constraint(existing.get(column) or name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referred_table, [column], ['id'],
+                                        ondelete=ondelete if with_ondelete else None)
+
+
+def upgrade():
+    _replace_foreign_keys(with_ondelete=True)
+
+
+def downgrade():
+    _replace_foreign_keys(with_ondelete=False)
@@ -0,0 +1,39 @@
+"""Add background ingest jobs
+
+Revision ID: 499c52fd2150
+Revises: 7ea00926fb14
+Create Date: 2026-10-17 09:04:05.883420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '499c52fd2150'
+down_revision = '7ea00926fb14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Created only if missing, since databases built by db.create_all after
+    # this change already have the table
+    op.create_table('ingest_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('page_count', sa.Integer(), nullable=True),
+    sa.Column('section_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('ingest_job')
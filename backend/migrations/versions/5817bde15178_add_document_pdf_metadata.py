@@ -0,0 +1,39 @@
+"""Add the PDF metadata of documents
+
+Revision ID: 5817bde15178
+Revises: 2446da67cd9c
+Create Date: 2026-10-17 09:04:58.391204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5817bde15178'
+down_revision = '2446da67cd9c'
+branch_labels = None
+depends_on = None
+
+NEW_COLUMNS = [
+    sa.Column('pdf_title', sa.String(length=255), nullable=True),
+    sa.Column('pdf_producer', sa.String(length=255), nullable=True),
+    sa.Column('is_encrypted', sa.Boolean(), nullable=True),
+    sa.Column('page_width', sa.Float(), nullable=True),
+    sa.Column('page_height', sa.Float(), nullable=True),
+]
+
+
+def upgrade():
+    # Only added if missing, since databases built by db.create_all after
+    # this change already have the columns
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('document')}
+    for column in NEW_COLUMNS:
+        if column.name not in columns:
+            op.add_column('document', column.copy())
+
+
+def downgrade():
+    with op.batch_alter_table('document') as batch_op:
+        for column in reversed(NEW_COLUMNS):
+            batch_op.drop_column(column.name)
@@ -0,0 +1,29 @@
+"""Add the content hash of documents
+
+Revision ID: 6cf18529732e
+Revises: 5817bde15178
+Create Date: 2026-10-17 09:05:22.604817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6cf18529732e'
+down_revision = '5817bde15178'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only added if missing, since databases built by db.create_all after
+    # this change already have the column
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('document')}
+    if 'content_hash' not in columns:
+        op.add_column('document', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('document') as batch_op:
+        batch_op.drop_column('content_hash')
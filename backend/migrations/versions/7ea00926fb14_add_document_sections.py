@@ -0,0 +1,45 @@
+"""Add the specification section index of documents
+
+Revision ID: 7ea00926fb14
+Revises: 07b318ddb8af
+Create Date: 2026-10-17 09:03:40.276154
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7ea00926fb14'
+down_revision = '07b318ddb8af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Columns and tables are only added if missing, since databases built by
+    # db.create_all after this change already have them
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('document')}
+    if 'section_index_fingerprint' not in columns:
+        op.add_column('document', sa.Column('section_index_fingerprint', sa.String(length=128), nullable=True))
+
+    op.create_table('document_section',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('number', sa.String(length=50), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('heading', sa.String(length=512), nullable=True),
+    sa.Column('page_number', sa.Integer(), nullable=True),
+    sa.Column('start_offset', sa.Integer(), nullable=False),
+    sa.Column('end_offset', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['document_id'], ['document.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('document_section')
+    with op.batch_alter_table('document') as batch_op:
+        batch_op.drop_column('section_index_fingerprint')
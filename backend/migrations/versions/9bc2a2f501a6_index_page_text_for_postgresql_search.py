@@ -0,0 +1,33 @@
+"""Index the page text for full-text search on PostgreSQL
+
+Revision ID: 9bc2a2f501a6
+Revises: 9bf1c7cb0df0
+Create Date: 2026-10-17 11:05:32.517940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9bc2a2f501a6'
+down_revision = '9bf1c7cb0df0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite searches through its FTS5 index instead. The expression must
+    # stay identical to PAGE_TSVECTOR in search_service or the planner
+    # won't use the index.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.create_index('ix_document_page_text_tsvector', 'document_page',
+                    [sa.text("to_tsvector('english', COALESCE(text, ''))")],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_document_page_text_tsvector', table_name='document_page')
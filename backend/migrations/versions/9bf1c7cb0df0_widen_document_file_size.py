@@ -0,0 +1,26 @@
+"""Widen document.file_size to a 64-bit integer for multi-gigabyte uploads
+
+Revision ID: 9bf1c7cb0df0
+Revises: cbb617be7537
+Create Date: 2026-10-17 10:41:07.859213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9bf1c7cb0df0'
+down_revision = 'cbb617be7537'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('document') as batch_op:
+        batch_op.alter_column('file_size', existing_type=sa.Integer(), type_=sa.BigInteger(), existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('document') as batch_op:
+        batch_op.alter_column('file_size', existing_type=sa.BigInteger(), type_=sa.Integer(), existing_nullable=True)
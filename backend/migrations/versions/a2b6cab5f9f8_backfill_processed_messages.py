@@ -0,0 +1,54 @@
+"""Record Gmail messages processed before processed_message existed
+
+Revision ID: a2b6cab5f9f8
+Revises: 0c462ed56b51
+Create Date: 2026-10-17 14:31:56.208814
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2b6cab5f9f8'
+down_revision = '0c462ed56b51'
+branch_labels = None
+depends_on = None
+
+# Projects created from email before processed_message existed stored the
+# Gmail message ID in their email subject as "Gmail-<id>"
+PREFIX = 'Gmail-'
+
+project = sa.table(
+    'project',
+    sa.column('id', sa.Integer),
+    sa.column('email_subject', sa.String),
+    sa.column('created_at', sa.DateTime)
+)
+processed_message = sa.table(
+    'processed_message',
+    sa.column('message_id', sa.String),
+    sa.column('project_id', sa.Integer),
+    sa.column('processed_at', sa.DateTime)
+)
+
+
+def upgrade():
+    message_id = sa.func.substr(project.c.email_subject, len(PREFIX) + 1)
+    op.execute(processed_message.insert().from_select(
+        ['message_id', 'project_id', 'processed_at'],
+        sa.select(message_id, sa.func.min(project.c.id), sa.func.min(project.c.created_at))
+        .where(
+            # A range instead of LIKE 'Gmail-%' so the email_subject index is used
+            project.c.email_subject >= PREFIX,
+            project.c.email_subject < 'Gmail.',
+            message_id.notin_(sa.select(processed_message.c.message_id))
+        )
+        .group_by(message_id)
+    ))
+
+
+def downgrade():
+    # The backfilled rows can't be told apart from ones recorded by syncs,
+    # and keeping them is harmless
+    pass
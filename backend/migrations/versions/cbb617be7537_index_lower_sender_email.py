@@ -0,0 +1,28 @@
+"""Index the lower-cased sender email for the sender filter of the project list
+
+Revision ID: cbb617be7537
+Revises: 2ca9a07fb3d6
+Create Date: 2026-10-17 10:12:54.306118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cbb617be7537'
+down_revision = '2ca9a07fb3d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The filter compares lower(sender_email), which a plain column index can't answer
+    op.drop_index('ix_project_sender_email', table_name='project')
+    op.create_index('ix_project_sender_email_created_at', 'project',
+                    [sa.text('lower(sender_email)'), 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_project_sender_email_created_at', table_name='project')
+    op.create_index('ix_project_sender_email', 'project', ['sender_email'], unique=False)
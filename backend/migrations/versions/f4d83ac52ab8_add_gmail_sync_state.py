@@ -0,0 +1,46 @@
+"""Add the Gmail sync position of accounts and the processed messages
+
+Revision ID: f4d83ac52ab8
+Revises: facf59af8093
+Create Date: 2026-10-17 09:06:39.488016
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4d83ac52ab8'
+down_revision = 'facf59af8093'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Columns and tables are only added if missing, since databases built by
+    # db.create_all after this change already have them
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('email_credential')}
+    if 'history_id' not in columns:
+        op.add_column('email_credential', sa.Column('history_id', sa.String(length=32), nullable=True))
+    if 'last_synced_at' not in columns:
+        op.add_column('email_credential', sa.Column('last_synced_at', sa.DateTime(), nullable=True))
+
+    op.create_table('processed_message',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('message_id', sa.String(length=64), nullable=False),
+    sa.Column('credential_id', sa.Integer(), nullable=True),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['credential_id'], ['email_credential.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('message_id'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('processed_message')
+    with op.batch_alter_table('email_credential') as batch_op:
+        batch_op.drop_column('last_synced_at')
+        batch_op.drop_column('history_id')
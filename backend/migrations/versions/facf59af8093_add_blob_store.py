@@ -0,0 +1,34 @@
+"""Add the content-addressed blob store
+
+Revision ID: facf59af8093
+Revises: 291422ef68ea
+Create Date: 2026-10-17 09:06:13.172589
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'facf59af8093'
+down_revision = '291422ef68ea'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Created only if missing, since databases built by db.create_all after
+    # this change already have the table
+    op.create_table('blob',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('file_path', sa.String(length=512), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('content_hash'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('blob')
@@ -4,35 +4,190 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))  # Required for p
 
 from flask import Flask, jsonify, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
+from sqlalchemy import event
 import json
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Configure SQLite database
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database.db')
+# Configure the database: SQLite by default, or any SQLAlchemy URL such as postgresql://... in DATABASE_URL
+database_url = os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database.db'))
+if database_url.startswith('postgres://'):
+    # Hosting providers still hand out the scheme SQLAlchemy no longer accepts
+    database_url = 'postgresql://' + database_url[len('postgres://'):]
+app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Connection pool shared by web requests and the ingest, upload and email worker
+# threads. In-memory SQLite databases use a single connection and take no pool settings.
+if database_url not in ('sqlite://', 'sqlite:///:memory:'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 30 * 60)),
+        'pool_pre_ping': not database_url.startswith('sqlite')
+    }
+
+# SQLite settings applied to every connection. WAL lets dashboard reads run
+# while email and ingest workers write, and synchronous=NORMAL is durable in
+# WAL mode except for the last transactions before a power loss.
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 15000))  # Milliseconds to wait for a lock
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', 64 * 1024))  # Page cache in KiB
+
+# Where stored files live: "local" keeps them under STORAGE_ROOT, "s3" in an S3-compatible bucket
+app.config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND', 'local')
+app.config['STORAGE_ROOT'] = os.environ.get('STORAGE_ROOT', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'storage'))
+app.config['S3_BUCKET'] = os.environ.get('S3_BUCKET')
+app.config['S3_PREFIX'] = os.environ.get('S3_PREFIX', '')
+app.config['S3_REGION'] = os.environ.get('S3_REGION')
+# Set to a MinIO or moto server URL to use a local stand-in for S3
+app.config['S3_ENDPOINT_URL'] = os.environ.get('S3_ENDPOINT_URL')
+
+# Local copies of files held in S3 are cached on disk up to this total size (bytes)
+app.config['STORAGE_CACHE_MAX_BYTES'] = int(os.environ.get('STORAGE_CACHE_MAX_BYTES', 10 * 1024 * 1024 * 1024))
+
+# Optional limit on request body size (bytes); uploads are streamed to disk either way
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ['MAX_UPLOAD_BYTES']) if os.environ.get('MAX_UPLOAD_BYTES') else None
+
+# Default and maximum chunk size of resumable uploads (bytes)
+app.config['UPLOAD_CHUNK_SIZE'] = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+app.config['UPLOAD_MAX_CHUNK_SIZE'] = int(os.environ.get('UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 * 1024))
+# Resumable uploads without activity for this long are discarded with their chunks (seconds)
+app.config['UPLOAD_SESSION_TTL'] = int(os.environ.get('UPLOAD_SESSION_TTL', 24 * 60 * 60))
+
+# Maximum total size of cached extracted document text (bytes)
+app.config['TEXT_CACHE_MAX_BYTES'] = int(os.environ.get('TEXT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# Number of worker processes used to extract uploaded documents in the background
+app.config['INGEST_WORKERS'] = int(os.environ.get('INGEST_WORKERS', os.cpu_count() or 1))
+
+# Documents with at least this many pages are split across worker processes during extraction
+app.config['PARALLEL_EXTRACTION_MIN_PAGES'] = int(os.environ.get('PARALLEL_EXTRACTION_MIN_PAGES', 200))
+app.config['PARALLEL_EXTRACTION_WORKERS'] = int(os.environ.get('PARALLEL_EXTRACTION_WORKERS', app.config['INGEST_WORKERS']))
+
+# Rendered page tiles are cached on disk up to this total size (bytes)
+app.config['TILE_CACHE_MAX_BYTES'] = int(os.environ.get('TILE_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+app.config['TILE_SIZE'] = int(os.environ.get('TILE_SIZE', 256))
+
+# Gmail API root; point it at a fake Gmail server to test email ingestion locally
+app.config['GMAIL_API_ROOT'] = os.environ.get('GMAIL_API_ROOT', 'https://gmail.googleapis.com/')
+
+# Incremental Gmail syncs also match messages received this long before the last sync (seconds),
+# covering mail whose date is older than its arrival in the mailbox
+app.config['GMAIL_SYNC_LOOKBACK'] = int(os.environ.get('GMAIL_SYNC_LOOKBACK', 24 * 60 * 60))
+
+# Email attachments larger than this are not downloaded (bytes, 0 for no limit)
+app.config['GMAIL_ATTACHMENT_MAX_BYTES'] = int(os.environ.get('GMAIL_ATTACHMENT_MAX_BYTES', 50 * 1024 * 1024))
+
+# Messages fetched per Gmail batch request (Gmail allows up to 100) and parallel attachment downloads
+app.config['GMAIL_BATCH_SIZE'] = int(os.environ.get('GMAIL_BATCH_SIZE', 50))
+app.config['GMAIL_FETCH_WORKERS'] = int(os.environ.get('GMAIL_FETCH_WORKERS', 8))
+
+# Gmail search query selecting bid invitations
+app.config['EMAIL_QUERY'] = os.environ.get('EMAIL_QUERY', 'subject:(bid invitation) OR subject:(request for proposal) OR subject:(RFP)')
+
+# Background mailbox polling: seconds between syncs of an account (0 disables the poller),
+# scheduler tick, accounts synced in parallel and messages taken by an initial full sync
+app.config['EMAIL_POLL_INTERVAL'] = int(os.environ.get('EMAIL_POLL_INTERVAL', 60))
+app.config['EMAIL_POLL_TICK'] = int(os.environ.get('EMAIL_POLL_TICK', 5))
+app.config['EMAIL_POLL_WORKERS'] = int(os.environ.get('EMAIL_POLL_WORKERS', 4))
+app.config['EMAIL_POLL_MAX_RESULTS'] = int(os.environ.get('EMAIL_POLL_MAX_RESULTS', 100))
+
+# Exponential backoff after rate limiting or Gmail server errors (seconds)
+app.config['EMAIL_POLL_BACKOFF_BASE'] = int(os.environ.get('EMAIL_POLL_BACKOFF_BASE', 30))
+app.config['EMAIL_POLL_BACKOFF_MAX'] = int(os.environ.get('EMAIL_POLL_BACKOFF_MAX', 15 * 60))
+
+# Gmail quota units each mailbox may use per second (Gmail allows 250)
+app.config['GMAIL_QUOTA_UNITS_PER_SECOND'] = int(os.environ.get('GMAIL_QUOTA_UNITS_PER_SECOND', 200))
+
+# Number of projects or documents created from email per transaction
+app.config['GMAIL_WRITE_BATCH_SIZE'] = int(os.environ.get('GMAIL_WRITE_BATCH_SIZE', 50))
+
+# Add an X-Query-Count header with the number of SQL statements to every response
+app.config['QUERY_COUNT_HEADER'] = os.environ.get('QUERY_COUNT_HEADER') == '1'
+
 # Initialize database
 db = SQLAlchemy(app)
 
+# Schema changes are Alembic migrations in backend/migrations, applied with "flask db upgrade"
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations'), render_as_batch=True)
+
+with app.app_context():
+    engine = db.engine
+
+if engine.dialect.name == 'sqlite':
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {app.config['SQLITE_BUSY_TIMEOUT']}")
+        cursor.execute(f"PRAGMA journal_mode = {app.config['SQLITE_JOURNAL_MODE']}")
+        cursor.execute(f"PRAGMA synchronous = {app.config['SQLITE_SYNCHRONOUS']}")
+        cursor.execute(f"PRAGMA mmap_size = {app.config['SQLITE_MMAP_SIZE']}")
+        cursor.execute(f"PRAGMA cache_size = {-app.config['SQLITE_CACHE_SIZE']}")
+        cursor.close()
+
+    # pysqlite only starts a transaction at the first write, so a SAVEPOINT
+    # issued before that opens and commits a transaction of its own. Sessions
+    # that batch writes behind savepoints ask for an explicit BEGIN through
+    # the sqlite_begin execution option; everything else keeps the lazy
+    # default so plain reads never hold database locks.
+    @event.listens_for(engine, 'begin')
+    def _begin_sqlite_transaction(connection):
+        begin = connection.get_execution_options().get('sqlite_begin')
+        if begin:
+            connection.exec_driver_sql(begin)
+
 # Import routes after app initialization to avoid circular imports
-from src.routes import email_routes, project_routes, document_routes, proposal_routes
+from src.routes import email_routes, project_routes, document_routes, proposal_routes, search_routes
 
 # Register blueprints
 app.register_blueprint(email_routes.bp)
 app.register_blueprint(project_routes.bp)
 app.register_blueprint(document_routes.bp)
 app.register_blueprint(proposal_routes.bp)
+app.register_blueprint(search_routes.bp)
+
+if app.config['QUERY_COUNT_HEADER']:
+    from src.utils.db_utils import init_query_count_header
+    init_query_count_header(app)
 
 @app.route('/')
 def index():
     return jsonify({"status": "API is running", "version": "1.0.0"})
 
+@app.cli.command('check-indexes')
+def check_indexes():
+    """Check with EXPLAIN that the hot queries are answered from indexes"""
+    from src.services.query_plan_service import check_query_plans
+    results = check_query_plans()
+    for result in results:
+        status = {True: 'OK  ', False: 'SCAN', None: '    '}[result['uses_index']]
+        print(f"{status} {result['name']}: {' | '.join(result['plan'])}")
+    if any(result['uses_index'] is False for result in results):
+        sys.exit(1)
+
 if __name__ == '__main__':
-    # Create database tables if they don't exist
-    with app.app_context():
-        db.create_all()
+    # With the debug reloader the parent process only watches for code
+    # changes, so the migrations, interrupted jobs and poller are left to the
+    # child process that serves requests and don't run twice
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        with app.app_context():
+            # Create or migrate the database tables
+            from src.utils.db_utils import upgrade_database
+            upgrade_database()
+            
+            # Pick up background extraction jobs interrupted by the last shutdown
+            from src.services.ingest_service import resume_ingest_jobs
+            resume_ingest_jobs()
+        
+        # Poll mailboxes in the background
+        from src.services.poller_service import start_poller
+        start_poller()
     
     # Run the Flask app
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -1,14 +1,19 @@
+import json
 from datetime import datetime
 from src.main import db
 
 class Project(db.Model):
     """Model for construction bid projects"""
+    __table_args__ = (
+        db.Index('ix_project_created_at_id', 'created_at', 'id'),  # Sort key of the project list
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
-    bid_due_date = db.Column(db.DateTime)
+    bid_due_date = db.Column(db.DateTime, index=True)
     sender_name = db.Column(db.String(255))
     sender_email = db.Column(db.String(255))
-    email_subject = db.Column(db.String(255))
+    email_subject = db.Column(db.String(255), index=True)
     email_body = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -28,22 +33,42 @@ class Project(db.Model):
             'email_subject': self.email_subject,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'document_count': len(self.documents)
+            'document_count': self.document_count
         }
 
 
 class Document(db.Model):
     """Model for project documents (PDFs)"""
+    __table_args__ = (
+        db.Index('ix_document_created_at_id', 'created_at', 'id'),  # Sort key of the document list
+        db.Index('ix_document_project_id_created_at', 'project_id', 'created_at'),
+        db.Index('ix_document_document_type_created_at', 'document_type', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
     original_filename = db.Column(db.String(255))
-    file_path = db.Column(db.String(512), nullable=False)
-    file_size = db.Column(db.Integer)  # Size in bytes
+    file_path = db.Column(db.String(512), nullable=False)  # Storage key, or absolute path for older files
+    file_size = db.Column(db.BigInteger)  # Size in bytes
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the file content, identifies the Blob holding it
     mime_type = db.Column(db.String(100))
     document_type = db.Column(db.String(50))  # e.g., "plans", "specifications", "addendum"
+    page_count = db.Column(db.Integer)
+    pdf_title = db.Column(db.String(255))
+    pdf_producer = db.Column(db.String(255))
+    is_encrypted = db.Column(db.Boolean)
+    page_width = db.Column(db.Float)  # First page size in points
+    page_height = db.Column(db.Float)
+    section_index_fingerprint = db.Column(db.String(128))  # File version the section index was built from
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Relationships
+    text_cache = db.relationship('DocumentText', backref='document', uselist=False, cascade="all, delete-orphan")
+    pages = db.relationship('DocumentPage', backref='document', lazy=True, cascade="all, delete-orphan")
+    sections = db.relationship('DocumentSection', backref='document', lazy=True, cascade="all, delete-orphan")
+    ingest_jobs = db.relationship('IngestJob', backref='document', lazy=True, cascade="all, delete-orphan")
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -51,16 +76,143 @@ class Document(db.Model):
             'filename': self.filename,
             'original_filename': self.original_filename,
             'file_size': self.file_size,
+            'content_hash': self.content_hash,
             'mime_type': self.mime_type,
             'document_type': self.document_type,
+            'page_count': self.page_count,
+            'pdf_title': self.pdf_title,
+            'pdf_producer': self.pdf_producer,
+            'is_encrypted': self.is_encrypted,
+            'page_width': self.page_width,
+            'page_height': self.page_height,
             'created_at': self.created_at.isoformat()
         }
 
 
+class Blob(db.Model):
+    """Model for content-addressed stored files shared by documents with identical content"""
+    content_hash = db.Column(db.String(64), primary_key=True)  # SHA-256 of the file content
+    file_path = db.Column(db.String(512), nullable=False)  # Storage key of the file
+    size = db.Column(db.BigInteger)  # Size in bytes
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # Number of documents using this blob
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class DocumentText(db.Model):
+    """Model for cached extracted text of a document"""
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), unique=True, nullable=False)
+    fingerprint = db.Column(db.String(128), nullable=False)  # Identifies the file version the text came from
+    text = db.Column(db.Text)
+    text_size = db.Column(db.Integer)  # Size of the cached text in bytes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class DocumentPage(db.Model):
+    """Model for extracted text of a single document page"""
+    __table_args__ = (db.UniqueConstraint('document_id', 'page_number'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=False)
+    page_number = db.Column(db.Integer, nullable=False)  # 1-based
+    fingerprint = db.Column(db.String(128), nullable=False)  # Identifies the file version the text came from
+    text = db.Column(db.Text)
+    
+    def to_dict(self):
+        return {
+            'page_number': self.page_number,
+            'text': self.text or ''
+        }
+
+
+class DocumentSection(db.Model):
+    """Model for a DIVISION/SECTION heading found in a specification document"""
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # "division" or "section"
+    number = db.Column(db.String(50))  # e.g., "09" or "09 29 00"
+    title = db.Column(db.String(255))  # e.g., "GYPSUM BOARD"
+    heading = db.Column(db.String(512))  # Full heading line
+    page_number = db.Column(db.Integer)  # 1-based page the heading appears on
+    start_offset = db.Column(db.Integer, nullable=False)  # Character offsets into the document text
+    end_offset = db.Column(db.Integer, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'number': self.number,
+            'title': self.title,
+            'heading': self.heading,
+            'page_number': self.page_number,
+            'start_offset': self.start_offset,
+            'end_offset': self.end_offset
+        }
+
+
+class IngestJob(db.Model):
+    """Model for background extraction jobs of uploaded documents"""
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # "queued", "running", "completed", "failed"
+    error = db.Column(db.Text)
+    page_count = db.Column(db.Integer)
+    section_count = db.Column(db.Integer)
+    pages_per_second = db.Column(db.Float)  # Extraction throughput
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'document_id': self.document_id,
+            'status': self.status,
+            'error': self.error,
+            'page_count': self.page_count,
+            'section_count': self.section_count,
+            'pages_per_second': self.pages_per_second,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class UploadSession(db.Model):
+    """Model for resumable chunked document uploads"""
+    id = db.Column(db.String(32), primary_key=True)  # Random token identifying the upload
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    document_type = db.Column(db.String(50))
+    total_size = db.Column(db.BigInteger, nullable=False)  # Size of the complete file in bytes
+    chunk_size = db.Column(db.Integer, nullable=False)
+    total_chunks = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open')  # "open", "assembling", "completed"
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'filename': self.filename,
+            'document_type': self.document_type,
+            'total_size': self.total_size,
+            'chunk_size': self.chunk_size,
+            'total_chunks': self.total_chunks,
+            'status': self.status,
+            'document_id': self.document_id,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
 class Estimate(db.Model):
     """Model for cost estimates"""
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     total_cost = db.Column(db.Float)
@@ -79,14 +231,14 @@ class Estimate(db.Model):
             'total_cost': self.total_cost,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'item_count': len(self.items)
+            'item_count': self.item_count
         }
 
 
 class EstimateItem(db.Model):
     """Model for individual line items in an estimate"""
     id = db.Column(db.Integer, primary_key=True)
-    estimate_id = db.Column(db.Integer, db.ForeignKey('estimate.id'), nullable=False)
+    estimate_id = db.Column(db.Integer, db.ForeignKey('estimate.id'), nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
     quantity = db.Column(db.Float)
     unit = db.Column(db.String(50))
@@ -110,7 +262,7 @@ class EstimateItem(db.Model):
 class Proposal(db.Model):
     """Model for generated proposals"""
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
     estimate_id = db.Column(db.Integer, db.ForeignKey('estimate.id'), nullable=True)
     title = db.Column(db.String(255), nullable=False)
     scope_summary = db.Column(db.Text)
@@ -137,6 +289,8 @@ class EmailCredential(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False)
     token_info = db.Column(db.Text)  # JSON string of token data
+    history_id = db.Column(db.String(32))  # Gmail history position the mailbox was last synced to
+    last_synced_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -149,3 +303,32 @@ class EmailCredential(db.Model):
     def set_token(self, token_dict):
         """Store token dictionary as JSON string"""
         self.token_info = json.dumps(token_dict)
+
+
+class ProcessedMessage(db.Model):
+    """Model for Gmail messages that have already been turned into projects"""
+    id = db.Column(db.Integer, primary_key=True)
+    message_id = db.Column(db.String(64), unique=True, nullable=False)  # Unique constraint doubles as the lookup index
+    credential_id = db.Column(db.Integer, db.ForeignKey('email_credential.id', ondelete='SET NULL'))
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='SET NULL'))
+    processed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Child counts used by to_dict, loaded with the parent row by a correlated
+# subquery so listing many projects or estimates doesn't load every child
+Project.document_count = db.column_property(
+    db.select(db.func.count(Document.id))
+    .where(Document.project_id == Project.id)
+    .correlate_except(Document)
+    .scalar_subquery()
+)
+
+Estimate.item_count = db.column_property(
+    db.select(db.func.count(EstimateItem.id))
+    .where(EstimateItem.estimate_id == Estimate.id)
+    .correlate_except(EstimateItem)
+    .scalar_subquery()
+)
+
+# Answers the case-insensitive sender filter of the project list, already in list order
+db.Index('ix_project_sender_email_created_at', db.func.lower(Project.sender_email), Project.created_at, Project.id)
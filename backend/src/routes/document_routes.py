@@ -1,23 +1,57 @@
-from flask import Blueprint, request, jsonify, send_file
-from src.models.models import Document, Project
-from src.main import db
-from src.utils.file_utils import save_attachment, get_document_type
+from flask import Blueprint, request, jsonify, send_file, make_response
+from src.models.models import Document, Project, UploadSession
+from src.main import app, db
+from src.utils.file_utils import compute_file_hash
+from src.utils.http_utils import resolve_byte_ranges, send_file_ranges, MAX_BYTE_RANGES
+from src.utils.query_utils import paginate, parse_fields, parse_page_size
+from werkzeug.http import is_resource_modified
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from src.services.ingest_service import enqueue_document, get_latest_job
+from src.services.document_service import register_document, delete_document_file, filter_documents
+from src.services.blob_service import store_blob_from_stream
+from src.services.storage_service import file_exists, get_document_path
+from src.services.upload_service import create_upload_session, get_received_chunks, save_chunk, complete_upload, abort_upload
+from src.services.render_service import get_page_tile, purge_document_tiles, is_format_available, IMAGE_FORMATS, MAX_ZOOM
 import os
-import mimetypes
+import datetime
 
 bp = Blueprint('document', __name__, url_prefix='/api/documents')
 
+# Fields the document list can be narrowed to with the fields parameter
+DOCUMENT_FIELDS = ('id', 'project_id', 'filename', 'original_filename', 'file_size', 'content_hash',
+                   'mime_type', 'document_type', 'page_count', 'pdf_title', 'pdf_producer',
+                   'is_encrypted', 'page_width', 'page_height', 'created_at')
+
 @bp.route('/', methods=['GET'])
 def get_documents():
-    """Get all documents or filter by project"""
-    project_id = request.args.get('project_id', type=int)
+    """
+    Get a page of documents, newest first
+    
+    Query parameters:
+        cursor: Cursor from the X-Next-Cursor header of the previous page
+        limit: Number of documents per page
+        fields: Comma-separated fields to return instead of the full document
+        project_id: Only documents of this project
+        document_type: Only documents of this type, e.g. "plans"
+    """
+    query = filter_documents(Document.query, request.args)
     
-    if project_id:
-        documents = Document.query.filter_by(project_id=project_id).all()
-    else:
-        documents = Document.query.all()
+    try:
+        fields = parse_fields(request.args.get('fields'), DOCUMENT_FIELDS)
+        documents, next_cursor = paginate(
+            query,
+            Document,
+            cursor=request.args.get('cursor'),
+            limit=parse_page_size(request.args.get('limit', type=int)),
+            fields=fields
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify([document.to_dict() for document in documents])
+    response = jsonify(documents if fields else [document.to_dict() for document in documents])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @bp.route('/<int:document_id>', methods=['GET'])
 def get_document(document_id):
@@ -30,13 +64,118 @@ def download_document(document_id):
     """Download a document file"""
     document = Document.query.get_or_404(document_id)
     
-    if not os.path.exists(document.file_path):
+    file_path = get_document_path(document)
+    if file_path is None:
         return jsonify({'error': 'File not found'}), 404
     
-    return send_file(document.file_path, 
-                     mimetype=document.mime_type or 'application/octet-stream',
+    # Strong ETag derived from the stored content hash
+    if not document.content_hash:
+        document.content_hash = compute_file_hash(file_path)
+        db.session.commit()
+    
+    # Stored content never changes, so the record's creation time is stable
+    # across backends and local cache refills, unlike the file modification time
+    mimetype = document.mime_type or 'application/octet-stream'
+    last_modified = document.created_at.replace(tzinfo=datetime.timezone.utc)
+    
+    # Werkzeug handles conditional requests and single ranges but not
+    # multiple ranges, which are answered with multipart/byteranges here
+    byte_range = request.range
+    if byte_range and not is_resource_modified(request.environ, etag=document.content_hash, last_modified=last_modified):
+        # Werkzeug serves a range before looking at If-None-Match, so drop
+        # the range to let send_file answer with 304 Not Modified
+        request.environ.pop('HTTP_RANGE', None)
+    elif byte_range and len(byte_range.ranges) > 1:
+        if_range = request.if_range
+        if_range_matches = (not if_range.etag and not if_range.date) or if_range.etag == document.content_hash
+        complete_length = os.path.getsize(file_path)
+        ranges = resolve_byte_ranges(byte_range, complete_length)
+        
+        if if_range_matches and not ranges:
+            raise RequestedRangeNotSatisfiable(length=complete_length)
+        
+        if if_range_matches and 1 < len(ranges) <= MAX_BYTE_RANGES:
+            response = send_file_ranges(file_path, ranges, mimetype)
+            response.set_etag(document.content_hash)
+            response.last_modified = last_modified
+            return response
+        
+        if if_range_matches and len(ranges) == 1:
+            # Adjacent ranges merged into one, so send a regular 206
+            start, stop = ranges[0]
+            request.environ['HTTP_RANGE'] = f'bytes={start}-{stop - 1}'
+        else:
+            request.environ.pop('HTTP_RANGE', None)
+    
+    return send_file(file_path, 
+                     mimetype=mimetype,
                      as_attachment=True,
-                     download_name=document.original_filename or document.filename)
+                     download_name=document.original_filename or document.filename,
+                     conditional=True,
+                     etag=document.content_hash,
+                     last_modified=last_modified)
+
+@bp.route('/<int:document_id>/pages/<int:page_number>/tile', methods=['GET'])
+def get_document_page_tile(document_id, page_number):
+    """Get a rendered tile of a document page"""
+    document = Document.query.get_or_404(document_id)
+    
+    if not file_exists(document.file_path):
+        return jsonify({'error': 'File not found'}), 404
+    
+    zoom = request.args.get('z', 0, type=int)
+    x = request.args.get('x', 0, type=int)
+    y = request.args.get('y', 0, type=int)
+    image_format = request.args.get('format', 'png').lower()
+    
+    if zoom < 0 or zoom > MAX_ZOOM:
+        return jsonify({'error': f'Zoom level must be between 0 and {MAX_ZOOM}'}), 400
+    
+    if image_format not in IMAGE_FORMATS:
+        return jsonify({'error': f'Unsupported image format: {image_format}'}), 400
+    
+    if not is_format_available(image_format):
+        return jsonify({'error': f'{image_format} tiles require Pillow, which is not installed'}), 415
+    
+    try:
+        tile = get_page_tile(document, page_number, zoom, x, y, image_format)
+    except Exception as e:
+        print(f"Error rendering page {page_number} of document {document_id}: {e}")
+        return jsonify({'error': 'Error rendering page'}), 500
+    
+    if not tile:
+        return jsonify({'error': 'Tile not found'}), 404
+    
+    return _make_image_response(tile, image_format)
+
+@bp.route('/<int:document_id>/pages/<int:page_number>/thumbnail', methods=['GET'])
+def get_document_page_thumbnail(document_id, page_number):
+    """Get a thumbnail of a document page (the zoom level 0 tile)"""
+    document = Document.query.get_or_404(document_id)
+    
+    if not file_exists(document.file_path):
+        return jsonify({'error': 'File not found'}), 404
+    
+    try:
+        tile = get_page_tile(document, page_number)
+    except Exception as e:
+        print(f"Error rendering page {page_number} of document {document_id}: {e}")
+        return jsonify({'error': 'Error rendering page'}), 500
+    
+    if not tile:
+        return jsonify({'error': 'Page not found'}), 404
+    
+    return _make_image_response(tile, 'png')
+
+def _make_image_response(tile, image_format):
+    """Build a cacheable image response for a rendered tile"""
+    image, cache_key = tile
+    response = make_response(image)
+    response.mimetype = f'image/{image_format}'
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    response.set_etag(cache_key)
+    return response.make_conditional(request)
 
 @bp.route('/', methods=['POST'])
 def upload_document():
@@ -62,42 +201,134 @@ def upload_document():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
-    # Save file
-    original_filename = file.filename
-    file_data = file.read()
-    
-    # Create storage directory for this project
-    storage_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                              'storage', 'projects', str(project_id))
-    os.makedirs(storage_dir, exist_ok=True)
-    
-    # Save file
-    file_path = os.path.join(storage_dir, original_filename)
-    with open(file_path, 'wb') as f:
-        f.write(file_data)
-    
-    # Determine document type
-    document_type = request.form.get('document_type') or get_document_type(original_filename)
-    
-    # Determine mime type
-    mime_type = mimetypes.guess_type(original_filename)[0] or 'application/octet-stream'
-    
-    # Create document record
-    document = Document(
-        project_id=project_id,
-        filename=os.path.basename(file_path),
-        original_filename=original_filename,
-        file_path=file_path,
-        file_size=len(file_data),
-        mime_type=mime_type,
-        document_type=document_type
-    )
+    # Stream the upload into the content-addressed store; duplicates reuse the existing file
+    blob = store_blob_from_stream(file.stream)
     
-    db.session.add(document)
-    db.session.commit()
+    document = register_document(
+        project_id,
+        file.filename,
+        blob,
+        document_type=request.form.get('document_type')
+    )
     
     return jsonify(document.to_dict()), 201
 
+@bp.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a resumable chunked upload"""
+    data = request.json or {}
+    
+    project_id = data.get('project_id')
+    if not project_id:
+        return jsonify({'error': 'Project ID is required'}), 400
+    
+    # Verify project exists
+    project = Project.query.get(project_id)
+    if not project:
+        return jsonify({'error': f'Project with ID {project_id} not found'}), 404
+    
+    if not data.get('filename'):
+        return jsonify({'error': 'Filename is required'}), 400
+    
+    total_size = data.get('total_size')
+    if not isinstance(total_size, int) or total_size <= 0:
+        return jsonify({'error': 'Total size must be a positive integer'}), 400
+    
+    chunk_size = data.get('chunk_size') or app.config['UPLOAD_CHUNK_SIZE']
+    if not isinstance(chunk_size, int) or chunk_size <= 0 or chunk_size > app.config['UPLOAD_MAX_CHUNK_SIZE']:
+        return jsonify({'error': f"Chunk size must be between 1 and {app.config['UPLOAD_MAX_CHUNK_SIZE']} bytes"}), 400
+    
+    upload = create_upload_session(
+        project_id,
+        data['filename'],
+        total_size,
+        chunk_size=chunk_size,
+        document_type=data.get('document_type')
+    )
+    
+    return jsonify(upload.to_dict()), 201
+
+@bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Get the state of a resumable upload, including which chunks were received"""
+    upload = UploadSession.query.get_or_404(upload_id)
+    
+    received = get_received_chunks(upload)
+    
+    return jsonify({
+        **upload.to_dict(),
+        'received_chunks': received,
+        'missing_chunks': sorted(set(range(upload.total_chunks)) - set(received))
+    })
+
+@bp.route('/uploads/<upload_id>/chunks/<int:chunk_index>', methods=['PUT'])
+def upload_chunk(upload_id, chunk_index):
+    """Upload one chunk (0-based) of a resumable upload as the raw request body"""
+    upload = UploadSession.query.get_or_404(upload_id)
+    
+    if upload.status != 'open':
+        return jsonify({'error': f'Upload {upload_id} is {upload.status}'}), 409
+    
+    if chunk_index >= upload.total_chunks:
+        return jsonify({'error': f'Chunk index must be between 0 and {upload.total_chunks - 1}'}), 400
+    
+    result = save_chunk(upload, chunk_index, request.stream, request.headers.get('X-Chunk-SHA256'))
+    
+    if 'error' in result:
+        return jsonify(result), 400
+    
+    return jsonify(result)
+
+@bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+def finish_upload(upload_id):
+    """Assemble a resumable upload and create its document"""
+    upload = UploadSession.query.get_or_404(upload_id)
+    
+    if upload.status != 'open':
+        return jsonify({'error': f'Upload {upload_id} is {upload.status}'}), 409
+    
+    result = complete_upload(upload)
+    
+    if isinstance(result, dict):
+        return jsonify(result), 409
+    
+    return jsonify(result.to_dict()), 201
+
+@bp.route('/uploads/<upload_id>', methods=['DELETE'])
+def cancel_upload(upload_id):
+    """Abort a resumable upload and discard its chunks"""
+    upload = UploadSession.query.get_or_404(upload_id)
+    
+    if upload.status == 'assembling':
+        return jsonify({'error': f'Upload {upload_id} is being assembled'}), 409
+    
+    abort_upload(upload)
+    
+    return jsonify({'message': f'Upload {upload_id} deleted successfully'})
+
+@bp.route('/<int:document_id>/ingest', methods=['GET'])
+def get_ingest_status(document_id):
+    """Get the status of the latest background extraction job of a document"""
+    Document.query.get_or_404(document_id)  # Verify document exists
+    
+    job = get_latest_job(document_id)
+    if not job:
+        return jsonify({'error': f'No ingest job found for document {document_id}'}), 404
+    
+    return jsonify(job.to_dict())
+
+@bp.route('/<int:document_id>/ingest', methods=['POST'])
+def reingest_document(document_id):
+    """Queue a document for background extraction again"""
+    document = Document.query.get_or_404(document_id)
+    
+    if not file_exists(document.file_path):
+        return jsonify({'error': 'File not found'}), 404
+    
+    job = enqueue_document(document)
+    
+    return jsonify(job.to_dict()), 202
+
 @bp.route('/<int:document_id>', methods=['PUT'])
 def update_document(document_id):
     """Update document metadata"""
@@ -120,15 +351,15 @@ def delete_document(document_id):
     """Delete a document"""
     document = Document.query.get_or_404(document_id)
     
-    # Delete file from filesystem
-    if os.path.exists(document.file_path):
-        try:
-            os.remove(document.file_path)
-        except Exception as e:
-            print(f"Error deleting file {document.file_path}: {e}")
-    
-    # Delete document from database
+    # Delete document from database; its pages leave the search index with it.
+    # The row goes first so a failed delete never leaves it without its file.
     db.session.delete(document)
     db.session.commit()
     
+    # Release the stored file, which is kept while other documents share it
+    delete_document_file(document)
+    
+    # Delete cached page tiles
+    purge_document_tiles(document)
+    
     return jsonify({'message': f'Document {document_id} deleted successfully'})
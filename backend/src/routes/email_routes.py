@@ -1,12 +1,11 @@
 from flask import Blueprint, request, jsonify, redirect, url_for, session
 import os
 import json
-from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from src.services.email_service import process_emails, get_email_details
+from src.services.email_service import process_emails, get_email_details, build_gmail_service
+from src.services.poller_service import get_account_lock, get_poller_stats
 from src.models.models import EmailCredential
-from src.main import db
+from src.main import app, db
 
 bp = Blueprint('email', __name__, url_prefix='/api/email')
 
@@ -59,7 +58,7 @@ def oauth2callback():
     credentials = flow.credentials
     
     # Get user email from the Gmail API
-    gmail_service = build(API_SERVICE_NAME, API_VERSION, credentials=credentials)
+    gmail_service = build_gmail_service(credentials)
     user_info = gmail_service.users().getProfile(userId='me').execute()
     email = user_info.get('emailAddress')
     
@@ -75,7 +74,8 @@ def oauth2callback():
         'token_uri': credentials.token_uri,
         'client_id': credentials.client_id,
         'client_secret': credentials.client_secret,
-        'scopes': credentials.scopes
+        'scopes': credentials.scopes,
+        'expiry': credentials.expiry.isoformat() if credentials.expiry else None
     }
     cred.set_token(token_info)
     
@@ -102,7 +102,7 @@ def process_new_emails():
     """Process new emails for bid invitations"""
     data = request.json
     email_account = data.get('email')
-    query = data.get('query', 'subject:(bid invitation) OR subject:(request for proposal) OR subject:(RFP)')
+    query = data.get('query', app.config['EMAIL_QUERY'])
     max_results = data.get('max_results', 10)
     
     if not email_account:
@@ -113,23 +113,24 @@ def process_new_emails():
     if not cred_record:
         return jsonify({'error': 'Email account not authenticated'}), 401
     
-    # Create credentials object
-    token_info = cred_record.get_token()
-    credentials = Credentials(
-        token=token_info['token'],
-        refresh_token=token_info['refresh_token'],
-        token_uri=token_info['token_uri'],
-        client_id=token_info['client_id'],
-        client_secret=token_info['client_secret'],
-        scopes=token_info['scopes']
-    )
+    # The background poller may be syncing this mailbox right now
+    lock = get_account_lock(cred_record.id)
+    if not lock.acquire(blocking=False):
+        return jsonify({'error': 'Email account is already being processed'}), 409
     
     # Process emails
     try:
-        results = process_emails(credentials, query, max_results)
+        results = process_emails(None, query, max_results, account=cred_record)
         return jsonify(results)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        lock.release()
+
+@bp.route('/poller', methods=['GET'])
+def get_poller_status():
+    """Get the state of the background mailbox poller and the last run of every account"""
+    return jsonify(get_poller_stats())
 
 @bp.route('/email/<message_id>', methods=['GET'])
 def get_email(message_id):
@@ -144,20 +145,9 @@ def get_email(message_id):
     if not cred_record:
         return jsonify({'error': 'Email account not authenticated'}), 401
     
-    # Create credentials object
-    token_info = cred_record.get_token()
-    credentials = Credentials(
-        token=token_info['token'],
-        refresh_token=token_info['refresh_token'],
-        token_uri=token_info['token_uri'],
-        client_id=token_info['client_id'],
-        client_secret=token_info['client_secret'],
-        scopes=token_info['scopes']
-    )
-    
     # Get email details
     try:
-        email_data = get_email_details(credentials, message_id)
+        email_data = get_email_details(None, message_id, account=cred_record)
         return jsonify(email_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
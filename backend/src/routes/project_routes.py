@@ -1,16 +1,81 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, abort
 from src.models.models import Project, Document
 from src.main import db
-import os
+from src.services.document_service import delete_document_file
+from src.services.render_service import purge_document_tiles
+from src.services.storage_service import remove_storage_dir
+from src.services.summary_service import summarize_project, with_rollups, serialize_rollup
+from src.services.project_service import filter_projects
+from src.utils.query_utils import paginate, parse_fields, parse_page_size
 import datetime
 
 bp = Blueprint('project', __name__, url_prefix='/api/projects')
 
+# Fields the project list can be narrowed to with the fields parameter
+PROJECT_FIELDS = ('id', 'name', 'bid_due_date', 'sender_name', 'sender_email', 'email_subject',
+                  'created_at', 'updated_at', 'document_count')
+
 @bp.route('/', methods=['GET'])
 def get_projects():
-    """Get all projects"""
-    projects = Project.query.order_by(Project.created_at.desc()).all()
-    return jsonify([project.to_dict() for project in projects])
+    """
+    Get a page of projects, newest first
+    
+    Query parameters:
+        cursor: Cursor from the X-Next-Cursor header of the previous page
+        limit: Number of projects per page
+        fields: Comma-separated fields to return instead of the full project
+        due_after, due_before: ISO dates bounding the bid due date
+        sender: Sender email address, case-insensitive
+    """
+    try:
+        query = filter_projects(Project.query, request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid bid due date format'}), 400
+    
+    try:
+        fields = parse_fields(request.args.get('fields'), PROJECT_FIELDS)
+        projects, next_cursor = paginate(
+            query,
+            Project,
+            cursor=request.args.get('cursor'),
+            limit=parse_page_size(request.args.get('limit', type=int)),
+            fields=fields
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = jsonify(projects if fields else [project.to_dict() for project in projects])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+@bp.route('/summary', methods=['GET'])
+def get_projects_summary():
+    """
+    Get a page of projects with their document, estimate and proposal rollups, newest first
+    
+    Takes the cursor, limit and filter parameters of the project list. The
+    rollups of the whole page are computed in a single query.
+    """
+    try:
+        query = filter_projects(Project.query, request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid bid due date format'}), 400
+    
+    try:
+        rows, next_cursor = paginate(
+            with_rollups(query),
+            Project,
+            cursor=request.args.get('cursor'),
+            limit=parse_page_size(request.args.get('limit', type=int))
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = jsonify([serialize_rollup(row) for row in rows])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @bp.route('/<int:project_id>', methods=['GET'])
 def get_project(project_id):
@@ -48,11 +113,6 @@ def create_project():
     db.session.add(project)
     db.session.commit()
     
-    # Create storage directory for this project
-    storage_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                              'storage', 'projects', str(project.id))
-    os.makedirs(storage_dir, exist_ok=True)
-    
     return jsonify(project.to_dict()), 201
 
 @bp.route('/<int:project_id>', methods=['PUT'])
@@ -94,28 +154,22 @@ def update_project(project_id):
 def delete_project(project_id):
     """Delete a project"""
     project = Project.query.get_or_404(project_id)
+    documents = list(project.documents)
     
-    # Delete associated documents from filesystem
-    for document in project.documents:
-        if os.path.exists(document.file_path):
-            try:
-                os.remove(document.file_path)
-            except Exception as e:
-                print(f"Error deleting file {document.file_path}: {e}")
-    
-    # Delete project directory if it exists
-    project_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                              'storage', 'projects', str(project.id))
-    if os.path.exists(project_dir):
-        try:
-            os.rmdir(project_dir)
-        except Exception as e:
-            print(f"Error deleting directory {project_dir}: {e}")
-    
-    # Delete project from database (cascade will delete related records)
+    # Delete project from database (cascade will delete related records).
+    # Files are released afterwards so a failed delete never leaves rows
+    # pointing at removed files.
     db.session.delete(project)
     db.session.commit()
     
+    # Release associated document files and their cached page tiles
+    for document in documents:
+        delete_document_file(document)
+        purge_document_tiles(document)
+    
+    # Delete the project directory left over from before the storage backends existed
+    remove_storage_dir('projects', str(project_id))
+    
     return jsonify({'message': f'Project {project_id} deleted successfully'})
 
 @bp.route('/<int:project_id>/documents', methods=['GET'])
@@ -127,27 +181,8 @@ def get_project_documents(project_id):
 
 @bp.route('/<int:project_id>/summary', methods=['GET'])
 def get_project_summary(project_id):
-    """Get a summary of a project including document counts by type"""
-    project = Project.query.get_or_404(project_id)
-    
-    # Count documents by type
-    document_counts = {}
-    for document in project.documents:
-        doc_type = document.document_type or 'other'
-        if doc_type in document_counts:
-            document_counts[doc_type] += 1
-        else:
-            document_counts[doc_type] = 1
-    
-    # Get estimate count
-    estimate_count = len(project.estimates)
-    
-    # Get proposal count
-    proposal_count = len(project.proposals)
-    
-    return jsonify({
-        **project.to_dict(),
-        'document_counts': document_counts,
-        'estimate_count': estimate_count,
-        'proposal_count': proposal_count
-    })
+    """Get a summary of a project including document counts, sizes and pages by type and estimate totals"""
+    summary = summarize_project(project_id)
+    if summary is None:
+        abort(404)
+    return jsonify(summary)
@@ -1,38 +1,94 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from src.models.models import Document
-from src.services.pdf_service import extract_text_from_pdf, extract_specification_section, extract_quantities_and_materials, get_document_metadata
-import os
+from src.services.pdf_service import extract_quantities_and_materials
+from src.services.metadata_service import get_document_metadata
+from src.services.text_cache_service import get_document_text, get_document_pages, iter_document_pages
+from src.services.section_service import get_document_sections, extract_document_section as extract_indexed_section
+from src.services.storage_service import file_exists
+import json
 
 bp = Blueprint('proposal', __name__, url_prefix='/api/proposals')
 
+# Maximum number of pages returned by a single page range request
+MAX_PAGES_PER_REQUEST = 100
+
 @bp.route('/document/<int:document_id>/extract', methods=['GET'])
 def extract_document_text(document_id):
     """Extract text from a document"""
     document = Document.query.get_or_404(document_id)
     
-    if not os.path.exists(document.file_path):
+    if not file_exists(document.file_path):
         return jsonify({'error': 'File not found'}), 404
     
-    text = extract_text_from_pdf(document.file_path)
+    text = get_document_text(document)
     
     return jsonify({
         'document_id': document_id,
         'text': text
     })
 
+@bp.route('/document/<int:document_id>/extract/stream', methods=['GET'])
+def stream_document_text(document_id):
+    """Stream the text of a document as newline-delimited JSON, one record per page"""
+    document = Document.query.get_or_404(document_id)
+    
+    if not file_exists(document.file_path):
+        return jsonify({'error': 'File not found'}), 404
+    
+    start_page = request.args.get('from', 1, type=int)
+    if start_page < 1:
+        return jsonify({'error': 'Invalid start page'}), 400
+    
+    def generate():
+        for page_number, text in iter_document_pages(document, start_page):
+            yield json.dumps({
+                'document_id': document_id,
+                'page_number': page_number,
+                'text': text
+            }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@bp.route('/document/<int:document_id>/pages', methods=['GET'])
+def get_document_page_text(document_id):
+    """Get the text of a range of document pages"""
+    document = Document.query.get_or_404(document_id)
+    
+    if not file_exists(document.file_path):
+        return jsonify({'error': 'File not found'}), 404
+    
+    start_page = request.args.get('from', 1, type=int)
+    end_page = request.args.get('to', start_page, type=int)
+    
+    if start_page < 1 or end_page < start_page:
+        return jsonify({'error': 'Invalid page range'}), 400
+    
+    if end_page - start_page + 1 > MAX_PAGES_PER_REQUEST:
+        return jsonify({'error': f'At most {MAX_PAGES_PER_REQUEST} pages can be requested at once'}), 400
+    
+    pages = get_document_pages(document, start_page, end_page)
+    
+    return jsonify({
+        'document_id': document_id,
+        'page_count': document.page_count,
+        'from': start_page,
+        'to': end_page,
+        'pages': [page.to_dict() for page in pages]
+    })
+
 @bp.route('/document/<int:document_id>/section', methods=['GET'])
 def extract_document_section(document_id):
     """Extract a specific section from a document"""
     document = Document.query.get_or_404(document_id)
     
-    if not os.path.exists(document.file_path):
+    if not file_exists(document.file_path):
         return jsonify({'error': 'File not found'}), 404
     
     section_name = request.args.get('section', '')
     if not section_name:
         return jsonify({'error': 'Section name is required'}), 400
     
-    section_text = extract_specification_section(document.file_path, section_name)
+    section_text = extract_indexed_section(document, section_name)
     
     # Extract quantities and materials
     analysis = extract_quantities_and_materials(section_text)
@@ -44,6 +100,21 @@ def extract_document_section(document_id):
         'analysis': analysis
     })
 
+@bp.route('/document/<int:document_id>/sections', methods=['GET'])
+def get_document_section_index(document_id):
+    """Get the table of contents (DIVISION/SECTION headings) of a document"""
+    document = Document.query.get_or_404(document_id)
+    
+    if not file_exists(document.file_path):
+        return jsonify({'error': 'File not found'}), 404
+    
+    sections = get_document_sections(document)
+    
+    return jsonify({
+        'document_id': document_id,
+        'sections': [section.to_dict() for section in sections]
+    })
+
 @bp.route('/document/<int:document_id>/metadata', methods=['GET'])
 def get_document_meta(document_id):
     """Get metadata for a document"""
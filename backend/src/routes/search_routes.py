@@ -0,0 +1,41 @@
+from flask import Blueprint, request, jsonify
+from src.models.models import Document
+from src.services.search_service import search_documents
+from src.services.text_cache_service import get_document_pages
+from src.services.storage_service import file_exists
+
+bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+# Maximum number of hits returned by a single search request
+MAX_SEARCH_RESULTS = 200
+
+@bp.route('', methods=['GET'])
+def search():
+    """Search the text of all project documents"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Search query is required'}), 400
+    
+    project_id = request.args.get('project_id', type=int)
+    # A negative LIMIT means no limit to SQLite, so both are clamped
+    limit = max(1, min(request.args.get('limit', 50, type=int), MAX_SEARCH_RESULTS))
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    hits = search_documents(query, project_id=project_id, limit=limit, offset=offset)
+    
+    return jsonify({
+        'query': query,
+        'project_id': project_id,
+        'limit': limit,
+        'offset': offset,
+        'results': hits
+    })
+
+@bp.cli.command('index')
+def index_documents():
+    """Extract and index the pages of every document that is not fully indexed"""
+    for document in Document.query.all():
+        if not file_exists(document.file_path):
+            continue
+        pages = get_document_pages(document)
+        print(f"Indexed {len(pages)} pages of document {document.id}")
@@ -0,0 +1,157 @@
+import os
+import tempfile
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from src.main import db
+from src.models.models import Blob
+from src.services.storage_service import get_storage_dir, get_sharded_key, store_file, file_exists, delete_file
+from src.utils.file_utils import save_stream
+
+def get_blob_key(content_hash):
+    """
+    Get the storage key of a blob, sharded by hash prefix to keep directories small
+
+    Args:
+        content_hash: SHA-256 hex digest of the content
+
+    Returns:
+        Storage key of the blob
+    """
+    return get_sharded_key('blobs', content_hash)
+
+def new_staging_path():
+    """
+    Reserve a temporary path on the storage volume so finished files can be renamed into place
+
+    Returns:
+        Path of a new empty staging file
+    """
+    fd, staging_path = tempfile.mkstemp(dir=get_storage_dir('tmp'), suffix='.part')
+    os.close(fd)
+    return staging_path
+
+def store_blob_from_file(staging_path, size, content_hash, commit=True):
+    """
+    Move a fully written file into the blob store and take a reference on it
+
+    If a blob with the same content already exists the staged file is
+    discarded, so duplicate content uses no extra disk.
+
+    Args:
+        staging_path: Path of the written file, from new_staging_path
+        size: Size of the file in bytes
+        content_hash: SHA-256 hex digest of the file
+        commit: Commit the session; pass False to store many files in one transaction
+
+    Returns:
+        The Blob record
+    """
+    blob = Blob.query.get(content_hash)
+    if blob and file_exists(blob.file_path):
+        referenced = _add_reference(content_hash, commit)
+        if referenced is not None:
+            os.remove(staging_path)
+            return referenced
+        # The last reference was released and the blob deleted since the
+        # lookup, so the staged file is stored as new content instead
+        db.session.expunge(blob)
+        blob = None
+
+    blob_key = get_blob_key(content_hash)
+    store_file(staging_path, blob_key)
+
+    if blob:
+        # The row survived but its file went missing, so point it at the restored file
+        referenced = _add_reference(content_hash, commit, file_path=blob_key)
+        if referenced is not None:
+            return referenced
+        db.session.expunge(blob)
+
+    try:
+        # Inserted in a savepoint so a concurrent insert of the same content
+        # only undoes this statement, not the caller's transaction
+        with db.session.begin_nested():
+            blob = Blob(content_hash=content_hash, file_path=blob_key, size=size, ref_count=1)
+            db.session.add(blob)
+    except IntegrityError:
+        # Another request stored the same content concurrently
+        return _add_reference(content_hash, commit)
+
+    if commit:
+        db.session.commit()
+    return blob
+
+def store_blob_from_stream(stream):
+    """
+    Copy a binary stream into the blob store
+
+    Args:
+        stream: Readable binary stream
+
+    Returns:
+        The Blob record
+    """
+    staging_path = new_staging_path()
+    try:
+        size, content_hash = save_stream(stream, staging_path)
+    except BaseException:
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+        raise
+
+    return store_blob_from_file(staging_path, size, content_hash)
+
+def _add_reference(content_hash, commit=True, file_path=None):
+    """
+    Atomically increment the reference count of a blob
+
+    The update locks the row until the transaction ends, so a concurrent
+    release_blob can't delete the blob before the reference is committed.
+
+    Args:
+        content_hash: SHA-256 hex digest of the content
+        commit: Commit the session
+        file_path: New storage key of the blob, if its file was restored
+
+    Returns:
+        The Blob record, or None if the blob no longer exists
+    """
+    values = {Blob.ref_count: Blob.ref_count + 1}
+    if file_path:
+        values[Blob.file_path] = file_path
+    if not Blob.query.filter_by(content_hash=content_hash).update(values):
+        return None
+    if commit:
+        db.session.commit()
+    return Blob.query.get(content_hash)
+
+def release_blob(content_hash):
+    """
+    Drop a reference to a blob, deleting its file when no document uses it anymore
+
+    Args:
+        content_hash: SHA-256 hex digest of the content
+
+    Returns:
+        True if the blob was deleted
+    """
+    Blob.query.filter_by(content_hash=content_hash).update({Blob.ref_count: Blob.ref_count - 1})
+    db.session.commit()
+
+    # A single statement that only matches an unreferenced blob, so a
+    # reference added in the meantime keeps it. The file is deleted before
+    # the row deletion commits: a concurrent store waits for the row, finds
+    # it gone and stores its own copy of the file.
+    blob_key = db.session.execute(
+        delete(Blob)
+        .where(Blob.content_hash == content_hash, Blob.ref_count <= 0)
+        .returning(Blob.file_path)
+    ).scalar()
+    if blob_key is None:
+        db.session.commit()
+        return False
+
+    delete_file(blob_key)
+    db.session.commit()
+
+    return True
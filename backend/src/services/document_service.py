@@ -0,0 +1,88 @@
+import os
+import mimetypes
+from src.main import db
+from src.models.models import Document, Blob
+from src.services.blob_service import release_blob
+from src.services.storage_service import delete_file
+from src.services.ingest_service import enqueue_document
+from src.utils.file_utils import get_document_type, is_pdf_file
+
+def register_document(project_id, original_filename, blob, document_type=None, mime_type=None, commit=True):
+    """
+    Create the Document record for content already in the blob store and queue it for extraction
+
+    Args:
+        project_id: Project ID to associate the document with
+        original_filename: Name of the file as uploaded or attached
+        blob: Blob record holding the file content, with a reference taken for this document
+        document_type: Document type, derived from the filename if not provided
+        mime_type: MIME type, derived from the filename if not provided
+        commit: Commit and queue extraction; pass False to add many documents in one
+            transaction, then commit and call enqueue_documents for the PDFs
+
+    Returns:
+        The new Document record
+    """
+    document = Document(
+        project_id=project_id,
+        filename=os.path.basename(original_filename),
+        original_filename=original_filename,
+        file_path=blob.file_path,
+        file_size=blob.size,
+        content_hash=blob.content_hash,
+        mime_type=mime_type or mimetypes.guess_type(original_filename)[0] or 'application/octet-stream',
+        document_type=document_type or get_document_type(original_filename)
+    )
+
+    db.session.add(document)
+    if not commit:
+        db.session.flush()
+        return document
+
+    db.session.commit()
+
+    # Extract text, pages and sections in the background; duplicates of
+    # already extracted content reuse the existing results
+    if is_pdf_file(original_filename):
+        enqueue_document(document)
+
+    return document
+
+def delete_document_file(document):
+    """
+    Release the stored file of a document
+
+    Blob-backed files are reference counted and only removed once no other
+    document shares the content. Files stored before the blob store existed
+    are removed directly.
+
+    Args:
+        document: Document record
+    """
+    blob = Blob.query.get(document.content_hash) if document.content_hash else None
+    if blob and blob.file_path == document.file_path:
+        release_blob(blob.content_hash)
+        return
+
+    delete_file(document.file_path)
+
+def filter_documents(query, args):
+    """
+    Apply the project and document type filters of a document list request
+
+    Args:
+        query: Query of Document
+        args: Request arguments (MultiDict) with optional project_id and document_type
+
+    Returns:
+        Filtered query
+    """
+    project_id = args.get('project_id', type=int)
+    if project_id:
+        query = query.filter_by(project_id=project_id)
+
+    document_type = args.get('document_type')
+    if document_type:
+        query = query.filter_by(document_type=document_type)
+
+    return query
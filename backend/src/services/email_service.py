@@ -1,190 +1,629 @@
 import os
+import calendar
 import base64
 import email
+import threading
+import concurrent.futures
 from email.header import decode_header
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+import requests
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from src.models.models import Project, Document
-from src.main import db
-from src.utils.file_utils import save_attachment
+from googleapiclient.http import BatchHttpRequest
+from sqlalchemy.exc import IntegrityError
+from src.models.models import Project, ProcessedMessage
+from src.main import app, db
+from src.services.blob_service import new_staging_path, store_blob_from_file
+from src.services.document_service import register_document
+from src.services.ingest_service import enqueue_documents
+from src.utils.file_utils import save_base64_stream
+from src.utils.rate_limit import TokenBucket
+from src.utils.db_utils import begin_write_batch
 import datetime
 import re
 
-def process_emails(credentials, query='subject:(bid invitation)', max_results=10):
+# Bytes of encoded attachment data read from the network at a time
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+
+# Bytes standing for the single-character JSON escape sequences
+JSON_ESCAPES = {b'"': b'"', b'\\': b'\\', b'/': b'/', b'b': b'\b', b'f': b'\f', b'n': b'\n', b'r': b'\r', b't': b'\t'}
+
+# End of a JSON string or start of an escape sequence
+JSON_STRING_SPECIAL = re.compile(rb'["\\]')
+
+# Gmail quota units charged per method, see https://developers.google.com/gmail/api/reference/quota
+QUOTA_UNITS = {
+    'getProfile': 1,
+    'history.list': 2,
+    'messages.list': 5,
+    'messages.get': 5,
+    'attachments.get': 5
+}
+
+_rate_limiters_lock = threading.Lock()
+_rate_limiters = {}
+
+def get_rate_limiter(account):
+    """
+    Get the token bucket that keeps requests for an account within its Gmail quota
+    
+    Gmail quotas apply per mailbox, so all syncs of an account share one bucket.
+    
+    Args:
+        account: EmailCredential record, or None
+        
+    Returns:
+        TokenBucket measured in quota units, or None if no account is given
+    """
+    if account is None:
+        return None
+    
+    with _rate_limiters_lock:
+        if account.id not in _rate_limiters:
+            _rate_limiters[account.id] = TokenBucket(app.config['GMAIL_QUOTA_UNITS_PER_SECOND'])
+        return _rate_limiters[account.id]
+
+
+def _throttle(rate_limiter, method, count=1):
+    """Wait until the quota for count calls of a Gmail method is available"""
+    if rate_limiter is not None:
+        rate_limiter.acquire(QUOTA_UNITS[method] * count)
+
+
+def build_gmail_service(credentials=None, http=None):
+    """
+    Build a Gmail API client for the configured API root
+    
+    The discovery document bundled with the client library is used, so
+    building a client makes no network request.
+    
+    Args:
+        credentials: Google OAuth2 credentials, if no authorized http is given
+        http: Authorized httplib2 object to send requests with
+        
+    Returns:
+        Gmail API service
+    """
+    return build('gmail', 'v1', credentials=credentials, http=http,
+                 static_discovery=True, cache_discovery=False,
+                 client_options={'api_endpoint': app.config['GMAIL_API_ROOT']})
+
+
+class _SerializedHttp(httplib2.Http):
+    """httplib2 connection that can be shared by threads, which take turns using it"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+    
+    def request(self, *args, **kwargs):
+        with self._lock:
+            return super().request(*args, **kwargs)
+
+
+_clients_lock = threading.Lock()
+_clients = {}
+
+def credentials_from_token(token_info):
+    """
+    Build OAuth2 credentials from stored token information
+    
+    Args:
+        token_info: Dictionary as stored by EmailCredential.set_token
+        
+    Returns:
+        Google OAuth2 credentials
+    """
+    expiry = token_info.get('expiry')
+    return Credentials(
+        token=token_info['token'],
+        refresh_token=token_info['refresh_token'],
+        token_uri=token_info['token_uri'],
+        client_id=token_info['client_id'],
+        client_secret=token_info['client_secret'],
+        scopes=token_info['scopes'],
+        expiry=datetime.datetime.fromisoformat(expiry) if expiry else None
+    )
+
+
+def _get_account_client(account):
+    """
+    Get the cached credentials and Gmail client of an account, building them on first use
+    
+    The client keeps its HTTP connection open between calls, so repeated
+    lookups skip both discovery and the TLS handshake. The cache entry is
+    rebuilt when the stored token changes, e.g. after re-authorization.
+    """
+    with _clients_lock:
+        client = _clients.get(account.id)
+        if client is None or client['token_info'] != account.token_info:
+            credentials = credentials_from_token(account.get_token())
+            client = {
+                'token_info': account.token_info,
+                'credentials': credentials,
+                'service': build_gmail_service(http=AuthorizedHttp(credentials, http=_SerializedHttp()))
+            }
+            _clients[account.id] = client
+        return client
+
+
+def get_account_credentials(account):
+    """
+    Get the cached OAuth2 credentials of an account
+    
+    Args:
+        account: EmailCredential record
+        
+    Returns:
+        Google OAuth2 credentials
+    """
+    return _get_account_client(account)['credentials']
+
+
+def get_account_service(account):
+    """
+    Get the cached Gmail client of an account
+    
+    Args:
+        account: EmailCredential record
+        
+    Returns:
+        Gmail API service
+    """
+    return _get_account_client(account)['service']
+
+
+def save_refreshed_token(account):
+    """
+    Write the access token back to the account if the client library refreshed it
+    
+    Args:
+        account: EmailCredential record
+    """
+    client = _clients.get(account.id)
+    if client is None:
+        return
+    
+    credentials = client['credentials']
+    token_info = account.get_token() or {}
+    if credentials.token == token_info.get('token'):
+        return
+    
+    token_info['token'] = credentials.token
+    token_info['expiry'] = credentials.expiry.isoformat() if credentials.expiry else None
+    if credentials.refresh_token:
+        token_info['refresh_token'] = credentials.refresh_token
+    account.set_token(token_info)
+    db.session.commit()
+    
+    # The cached client already holds the new token
+    client['token_info'] = account.token_info
+
+
+def process_emails(credentials, query='subject:(bid invitation)', max_results=10, account=None):
     """
     Process emails matching the query for bid invitations
     
+    When an account is given and the query is the configured EMAIL_QUERY,
+    its mailbox is synced incrementally: only messages added since the
+    stored Gmail history position are considered, and max_results only
+    limits the initial full sync. Any other query is a one-off search of at
+    most max_results messages that leaves the sync position alone, so it
+    can't move the account past mail the configured query still has to see.
+    
     Args:
-        credentials: Google OAuth2 credentials
+        credentials: Google OAuth2 credentials, or None to use the cached credentials of the account
         query: Gmail search query
         max_results: Maximum number of emails to process
+        account: EmailCredential record whose sync position is used and updated
+            when the query is the configured one
         
     Returns:
         Dictionary with processing results
     """
-    # Build the Gmail API service
-    service = build('gmail', 'v1', credentials=credentials)
+    # Use the account's cached Gmail client when there is one
+    if account is not None:
+        service = get_account_service(account)
+        credentials = credentials or get_account_credentials(account)
+    else:
+        service = build_gmail_service(credentials)
+    rate_limiter = get_rate_limiter(account)
+    
+    # The account whose sync position this run reads and moves, if any
+    sync_account = account if account is not None and query == app.config['EMAIL_QUERY'] else None
     
     try:
-        # Get messages matching the query
-        response = service.users().messages().list(
-            userId='me',
-            q=query,
-            maxResults=max_results
-        ).execute()
+        message_ids = None
+        history_id = None
+        if sync_account is not None and sync_account.history_id and sync_account.last_synced_at:
+            message_ids, history_id = list_new_messages(service, sync_account, query)
+        
+        if message_ids is None:
+            # Full sync. The history position is read first so mail arriving
+            # during the sync is picked up by the next incremental sync.
+            if sync_account is not None:
+                _throttle(rate_limiter, 'getProfile')
+                history_id = service.users().getProfile(userId='me').execute()['historyId']
+            
+            # Get messages matching the query
+            _throttle(rate_limiter, 'messages.list')
+            response = service.users().messages().list(
+                userId='me',
+                q=query,
+                maxResults=max_results
+            ).execute()
+            
+            message_ids = [message['id'] for message in response.get('messages', [])]
         
-        messages = response.get('messages', [])
+        # Skip emails that have already been processed
+        message_ids = filter_unprocessed_messages(message_ids)
         
-        if not messages:
+        if not message_ids:
+            save_sync_position(sync_account, history_id)
             return {'message': 'No new bid invitations found', 'processed': 0}
         
-        processed_count = 0
-        new_projects = []
+        # Fetch the full messages in batch requests; the payload is reused for attachments
+        full_messages, failures = fetch_messages(service, message_ids, rate_limiter=rate_limiter)
         
-        # Process each message
-        for message in messages:
-            message_id = message['id']
-            
-            # Check if this email has already been processed
-            existing_project = Project.query.filter_by(email_subject=f"Gmail-{message_id}").first()
-            if existing_project:
-                continue
-                
-            # Get the message details
-            msg = service.users().messages().get(userId='me', id=message_id).execute()
-            
-            # Extract email details
-            headers = msg['payload']['headers']
-            subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), 'No Subject')
-            from_header = next((h['value'] for h in headers if h['name'].lower() == 'from'), '')
-            
-            # Extract sender name and email
-            sender_name = ''
-            sender_email = ''
-            if from_header:
-                match = re.match(r'(.*?)\s*<(.+@.+)>', from_header)
-                if match:
-                    sender_name = match.group(1).strip()
-                    sender_email = match.group(2).strip()
-                else:
-                    sender_email = from_header.strip()
-            
-            # Extract email body
-            body = ''
-            if 'parts' in msg['payload']:
-                for part in msg['payload']['parts']:
-                    if part['mimeType'] == 'text/plain':
-                        body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                        break
-            elif 'body' in msg['payload'] and 'data' in msg['payload']['body']:
-                body = base64.urlsafe_b64decode(msg['payload']['body']['data']).decode('utf-8')
+        # Download the attachments of all messages before writing anything, so
+        # a message whose attachments can't be fetched yet is left unprocessed
+        attachments = []
+        for message_id in message_ids:
+            msg = full_messages.get(message_id)
+            if msg is not None and 'parts' in msg['payload']:
+                attachments.extend(find_attachments(message_id, msg['payload']['parts']))
+        
+        downloads = {}
+        try:
+            downloads, download_failures = download_attachments(credentials, attachments, rate_limiter=rate_limiter)
+            failures.update(download_failures)
             
-            # Extract bid due date from email body or subject
-            bid_due_date = None
-            due_date_patterns = [
-                r'due\s+(?:date|by)?:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-                r'bid\s+(?:date|by)?:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-                r'deadline:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-            ]
+            processed_count = 0
+            new_projects = []
+            documents = []
+            pending_writes = 0
             
-            for pattern in due_date_patterns:
-                match = re.search(pattern, body, re.IGNORECASE) or re.search(pattern, subject, re.IGNORECASE)
-                if match:
-                    date_str = match.group(1)
-                    try:
-                        # Try different date formats
-                        for fmt in ['%m/%d/%Y', '%m-%d-%Y', '%m/%d/%y', '%m-%d-%y']:
-                            try:
-                                bid_due_date = datetime.datetime.strptime(date_str, fmt)
-                                break
-                            except ValueError:
-                                continue
-                    except Exception:
-                        pass
-                    break
+            # Projects are written in batches of GMAIL_WRITE_BATCH_SIZE messages
+            begin_write_batch()
             
-            # Create a new project
-            project = Project(
-                name=subject,
-                email_subject=f"Gmail-{message_id}",  # Use this to track processed emails
-                bid_due_date=bid_due_date,
-                sender_name=sender_name,
-                sender_email=sender_email,
-                email_body=body
-            )
+            # Process each message
+            for message_id in message_ids:
+                msg = full_messages.get(message_id)
+                if msg is None or message_id in download_failures:
+                    continue
+                
+                # Each message is written in its own savepoint, so a message that
+                # fails only rolls back itself and not the rest of the batch
+                try:
+                    with db.session.begin_nested():
+                        project = Project(**parse_bid_email(msg))
+                        db.session.add(project)
+                        db.session.flush()
+                        
+                        # Record the message so it is never turned into a project again
+                        db.session.add(ProcessedMessage(
+                            message_id=message_id,
+                            credential_id=account.id if account is not None else None,
+                            project_id=project.id
+                        ))
+                        
+                        documents.extend(save_attachments(project.id, downloads.get(message_id, [])))
+                except IntegrityError:
+                    # Another sync processed this message at the same time
+                    continue
+                except Exception:
+                    # Counted as a server error so the sync position is held
+                    # back and the message is tried again on the next run
+                    app.logger.exception('Error processing message %s', message_id)
+                    failures[message_id] = 500
+                    continue
+                
+                new_projects.append({
+                    'id': project.id,
+                    'name': project.name,
+                    'bid_due_date': project.bid_due_date.isoformat() if project.bid_due_date else None,
+                    'sender': f"{project.sender_name} <{project.sender_email}>" if project.sender_name else project.sender_email
+                })
+                
+                processed_count += 1
+                pending_writes += 1
+                if pending_writes >= app.config['GMAIL_WRITE_BATCH_SIZE']:
+                    db.session.commit()
+                    # Queue the new documents for extraction
+                    if documents:
+                        enqueue_documents(documents)
+                        documents = []
+                    begin_write_batch()
+                    pending_writes = 0
             
-            db.session.add(project)
             db.session.commit()
-            
-            # Process attachments
-            if 'parts' in msg['payload']:
-                process_attachments(service, message_id, project.id)
-            
-            new_projects.append({
-                'id': project.id,
-                'name': project.name,
-                'bid_due_date': project.bid_due_date.isoformat() if project.bid_due_date else None,
-                'sender': f"{project.sender_name} <{project.sender_email}>" if project.sender_name else project.sender_email
-            })
-            
-            processed_count += 1
+            if documents:
+                enqueue_documents(documents)
+        finally:
+            # Remove the staged files of attachments that were not stored
+            discard_downloads(downloads)
         
-        return {
+        # Only move the sync position forward once every message was stored,
+        # was already processed or failed for good (e.g. deleted meanwhile),
+        # so messages that failed for any other reason are retried next time
+        throttled = [status for status in failures.values() if is_retryable_status(status)]
+        if not throttled:
+            save_sync_position(sync_account, history_id)
+        
+        result = {
             'message': f'Processed {processed_count} new bid invitations',
             'processed': processed_count,
             'new_projects': new_projects
         }
+        if throttled:
+            result['status'] = max(throttled)
+        return result
         
     except HttpError as error:
-        return {'error': f'An error occurred: {error}'}
+        return {'error': f'An error occurred: {error}', 'status': error.resp.status}
+    
+    finally:
+        if account is not None:
+            save_refreshed_token(account)
+
+
+def parse_bid_email(message):
+    """
+    Extract the project fields of a bid invitation from a Gmail message
+    
+    Args:
+        message: Gmail message resource in full format
+        
+    Returns:
+        Dictionary of Project column values
+    """
+    # Extract email details
+    headers = message['payload']['headers']
+    subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), 'No Subject')
+    from_header = next((h['value'] for h in headers if h['name'].lower() == 'from'), '')
+    
+    # Extract sender name and email
+    sender_name = ''
+    sender_email = ''
+    if from_header:
+        match = re.match(r'(.*?)\s*<(.+@.+)>', from_header)
+        if match:
+            sender_name = match.group(1).strip()
+            sender_email = match.group(2).strip()
+        else:
+            sender_email = from_header.strip()
+    
+    # Extract email body
+    body = ''
+    if 'parts' in message['payload']:
+        for part in message['payload']['parts']:
+            if part['mimeType'] == 'text/plain':
+                body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
+                break
+    elif 'body' in message['payload'] and 'data' in message['payload']['body']:
+        body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
+    
+    # Extract bid due date from email body or subject
+    bid_due_date = None
+    due_date_patterns = [
+        r'due\s+(?:date|by)?:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        r'bid\s+(?:date|by)?:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        r'deadline:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
+    ]
+    
+    for pattern in due_date_patterns:
+        match = re.search(pattern, body, re.IGNORECASE) or re.search(pattern, subject, re.IGNORECASE)
+        if match:
+            date_str = match.group(1)
+            try:
+                # Try different date formats
+                for fmt in ['%m/%d/%Y', '%m-%d-%Y', '%m/%d/%y', '%m-%d-%y']:
+                    try:
+                        bid_due_date = datetime.datetime.strptime(date_str, fmt)
+                        break
+                    except ValueError:
+                        continue
+            except Exception:
+                pass
+            break
+    
+    return {
+        'name': subject,
+        'email_subject': subject,
+        'bid_due_date': bid_due_date,
+        'sender_name': sender_name,
+        'sender_email': sender_email,
+        'email_body': body
+    }
+
+
+def is_retryable_status(status):
+    """
+    Check whether a Gmail API error status is worth retrying after a delay
+    
+    Args:
+        status: HTTP status code
+        
+    Returns:
+        True for rate limiting (429) and server errors (5xx)
+    """
+    return status == 429 or status >= 500
 
 
-def process_attachments(service, message_id, project_id):
+def list_new_messages(service, account, query):
     """
-    Process attachments for a specific email message
+    List messages matching the query that were added since the account was last synced
+    
+    history.list returns every message added since the stored position
+    without looking at the rest of the mailbox. It cannot apply a search
+    query, so the new messages are matched against the query restricted to
+    mail received since the last sync.
     
     Args:
         service: Gmail API service
-        message_id: Email message ID
-        project_id: Project ID to associate attachments with
+        account: EmailCredential record with a stored history position
+        query: Gmail search query
+        
+    Returns:
+        Tuple of (message IDs oldest first, new history position), or (None, None)
+        if the stored position has expired and a full sync is needed
     """
+    rate_limiter = get_rate_limiter(account)
+    added_ids = []
+    history_id = account.history_id
+    page_token = None
+    
     try:
-        # Get the message with full content
-        message = service.users().messages().get(userId='me', id=message_id, format='full').execute()
+        while True:
+            _throttle(rate_limiter, 'history.list')
+            response = service.users().history().list(
+                userId='me',
+                startHistoryId=account.history_id,
+                historyTypes='messageAdded',
+                pageToken=page_token
+            ).execute()
+            
+            for record in response.get('history', []):
+                for added in record.get('messagesAdded', []):
+                    added_ids.append(added['message']['id'])
+            
+            history_id = response.get('historyId', history_id)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+    except HttpError as error:
+        # Gmail only keeps history for about a week
+        if error.resp.status == 404:
+            return None, None
+        raise
+    
+    if not added_ids:
+        return [], history_id
+    
+    since = account.last_synced_at - datetime.timedelta(seconds=app.config['GMAIL_SYNC_LOOKBACK'])
+    search_query = f"{query} after:{calendar.timegm(since.utctimetuple())}"
+    
+    matching_ids = set()
+    page_token = None
+    while True:
+        _throttle(rate_limiter, 'messages.list')
+        response = service.users().messages().list(
+            userId='me',
+            q=search_query,
+            maxResults=500,
+            pageToken=page_token
+        ).execute()
         
-        if 'payload' not in message or 'parts' not in message['payload']:
-            return
+        matching_ids.update(message['id'] for message in response.get('messages', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+    
+    return [message_id for message_id in dict.fromkeys(added_ids) if message_id in matching_ids], history_id
+
+
+def filter_unprocessed_messages(message_ids):
+    """
+    Drop messages that have already been turned into projects
+    
+    Args:
+        message_ids: Gmail message IDs
         
-        # Create storage directory for this project
-        storage_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                                  'storage', 'projects', str(project_id))
-        os.makedirs(storage_dir, exist_ok=True)
+    Returns:
+        List of the message IDs not processed yet, in their original order
+    """
+    if not message_ids:
+        return []
+    
+    processed = {message_id for (message_id,) in db.session.query(ProcessedMessage.message_id).filter(
+        ProcessedMessage.message_id.in_(message_ids)
+    )}
+    return [message_id for message_id in message_ids if message_id not in processed]
+
+
+def save_sync_position(account, history_id):
+    """
+    Store the Gmail history position an account has been synced to
+    
+    Args:
+        account: EmailCredential record, or None when not syncing an account
+        history_id: Gmail history ID, or None if unknown
+    """
+    if account is None or history_id is None:
+        return
+    
+    account.history_id = str(history_id)
+    account.last_synced_at = datetime.datetime.utcnow()
+    db.session.commit()
+
+
+def fetch_messages(service, message_ids, batch_size=None, rate_limiter=None):
+    """
+    Fetch full messages using Gmail batch requests
+    
+    Args:
+        service: Gmail API service
+        message_ids: IDs of the messages to fetch
+        batch_size: Messages per batch request, defaults to the GMAIL_BATCH_SIZE setting
+        rate_limiter: Optional TokenBucket charged with the quota of every message
         
-        # Process message parts recursively
-        process_parts(service, message_id, message['payload']['parts'], project_id, storage_dir)
+    Returns:
+        Tuple of (dictionary mapping message ID to message, dictionary mapping
+        the ID of every message that failed to load to its HTTP status)
+    """
+    batch_size = batch_size or app.config['GMAIL_BATCH_SIZE']
+    messages = {}
+    failures = {}
+    
+    def collect(request_id, response, exception):
+        if exception is not None:
+            print(f'An error occurred fetching message {request_id}: {exception}')
+            failures[request_id] = exception.resp.status if isinstance(exception, HttpError) else 500
+            return
+        messages[request_id] = response
+    
+    # The batch endpoint is derived from the configured root, not the discovery document,
+    # so batches go to the same server as every other request
+    batch_uri = app.config['GMAIL_API_ROOT'].rstrip('/') + '/batch/gmail/v1'
+    
+    for start in range(0, len(message_ids), batch_size):
+        chunk = message_ids[start:start + batch_size]
         
-    except HttpError as error:
-        print(f'An error occurred processing attachments: {error}')
+        # Every request in a batch counts against the quota on its own
+        _throttle(rate_limiter, 'messages.get', len(chunk))
+        
+        batch = BatchHttpRequest(callback=collect, batch_uri=batch_uri)
+        for message_id in chunk:
+            batch.add(service.users().messages().get(userId='me', id=message_id, format='full'),
+                      request_id=message_id)
+        batch.execute()
+    
+    return messages, failures
 
 
-def process_parts(service, message_id, parts, project_id, storage_dir, part_path=''):
+def find_attachments(message_id, parts, part_path=''):
     """
-    Recursively process message parts to find attachments
+    Recursively search message parts for PDF attachments
     
     Args:
-        service: Gmail API service
         message_id: Email message ID
-        parts: Message parts to process
-        project_id: Project ID to associate attachments with
-        storage_dir: Directory to store attachments
+        parts: Message parts to search
         part_path: Path to the current part (for nested parts)
+        
+    Returns:
+        List of dictionaries describing the attachments to download
     """
+    attachments = []
+    
     for i, part in enumerate(parts):
         current_path = f"{part_path}.{i}" if part_path else str(i)
         
         # Check if this part has nested parts
         if 'parts' in part:
-            process_parts(service, message_id, part['parts'], project_id, storage_dir, current_path)
+            attachments.extend(find_attachments(message_id, part['parts'], current_path))
             continue
         
         # Check if this part is an attachment
@@ -198,20 +637,6 @@ def process_parts(service, message_id, parts, project_id, storage_dir, part_path
             # Only process PDF files
             if not filename.lower().endswith('.pdf'):
                 continue
-                
-            attachment = service.users().messages().attachments().get(
-                userId='me',
-                messageId=message_id,
-                id=part['body']['attachmentId']
-            ).execute()
-            
-            # Decode attachment data
-            file_data = base64.urlsafe_b64decode(attachment['data'])
-            
-            # Save attachment to file system
-            file_path = os.path.join(storage_dir, filename)
-            with open(file_path, 'wb') as f:
-                f.write(file_data)
             
             # Determine document type based on filename
             document_type = 'unknown'
@@ -222,34 +647,269 @@ def process_parts(service, message_id, parts, project_id, storage_dir, part_path
             elif re.search(r'addendum|amendment', filename, re.IGNORECASE):
                 document_type = 'addendum'
             
-            # Create document record in database
-            document = Document(
-                project_id=project_id,
-                filename=os.path.basename(file_path),
-                original_filename=filename,
-                file_path=file_path,
-                file_size=len(file_data),
-                mime_type='application/pdf',
-                document_type=document_type
+            attachments.append({
+                'message_id': message_id,
+                'attachment_id': part['body']['attachmentId'],
+                'size': part['body'].get('size'),
+                'filename': filename,
+                'document_type': document_type
+            })
+    
+    return attachments
+
+
+def download_attachments(credentials, attachments, rate_limiter=None):
+    """
+    Download attachments concurrently to staging files
+    
+    Downloads run in a bounded thread pool, each worker thread with its own
+    HTTP session. Attachments that are gone or too large are skipped. A
+    download refused for a transient reason (rate limiting or a server
+    error) is reported per message, so the message can be retried as a whole.
+    
+    Args:
+        credentials: Google OAuth2 credentials
+        attachments: Attachments as returned by find_attachments
+        rate_limiter: Optional TokenBucket charged with the quota of every download
+        
+    Returns:
+        Tuple of (dictionary mapping message ID to a list of (attachment,
+        staging path, size, content hash) tuples, dictionary mapping the ID
+        of each message with a retryable download failure to its status)
+    """
+    max_bytes = app.config['GMAIL_ATTACHMENT_MAX_BYTES']
+    
+    # Skip attachments Gmail already reports as too large
+    allowed = []
+    for attachment in attachments:
+        if max_bytes and attachment['size'] and attachment['size'] > max_bytes:
+            print(f"Skipping attachment {attachment['filename']}: {attachment['size']} bytes exceeds the limit of {max_bytes}")
+            continue
+        allowed.append(attachment)
+    
+    downloads = {}
+    failures = {}
+    if not allowed:
+        return downloads, failures
+    
+    thread_state = threading.local()
+    
+    def download(attachment):
+        if not hasattr(thread_state, 'session'):
+            thread_state.session = AuthorizedSession(credentials)
+        
+        _throttle(rate_limiter, 'attachments.get')
+        staging_path = new_staging_path()
+        try:
+            size, content_hash = download_attachment(
+                thread_state.session,
+                attachment['message_id'],
+                attachment['attachment_id'],
+                staging_path,
+                max_bytes=max_bytes or None
             )
+        except BaseException:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+            raise
+        
+        return staging_path, size, content_hash
+    
+    futures = {}
+    workers = max(1, min(app.config['GMAIL_FETCH_WORKERS'], len(allowed)))
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gmail') as pool:
+            futures = {pool.submit(download, attachment): attachment for attachment in allowed}
             
-            db.session.add(document)
-            db.session.commit()
+            for future in concurrent.futures.as_completed(futures):
+                attachment = futures[future]
+                message_id = attachment['message_id']
+                try:
+                    staging_path, size, content_hash = future.result()
+                except requests.RequestException as error:
+                    print(f"An error occurred downloading attachment {attachment['filename']}: {error}")
+                    # Errors without a response (timeouts, dropped connections) are retried like server errors
+                    status = error.response.status_code if error.response is not None else 500
+                    if is_retryable_status(status):
+                        failures[message_id] = max(status, failures.get(message_id, 0))
+                    continue
+                except ValueError as error:
+                    print(f"An error occurred downloading attachment {attachment['filename']}: {error}")
+                    continue
+                
+                downloads.setdefault(message_id, []).append((attachment, staging_path, size, content_hash))
+    except BaseException:
+        # The pool waited for the remaining downloads, so every finished one can be discarded
+        for future in futures:
+            if not future.cancelled() and future.exception() is None:
+                staging_path = future.result()[0]
+                if os.path.exists(staging_path):
+                    os.remove(staging_path)
+        raise
+    
+    return downloads, failures
+
+
+def save_attachments(project_id, downloads):
+    """
+    Store downloaded attachments and create their documents without committing
+    
+    Each attachment is written in its own savepoint, so one that fails is
+    skipped without rolling back the project or its other attachments.
+    
+    Args:
+        project_id: Project ID to associate the documents with
+        downloads: (attachment, staging path, size, content hash) tuples from download_attachments
+        
+    Returns:
+        List of the new Document records, to be queued for extraction once committed
+    """
+    documents = []
+    for attachment, staging_path, size, content_hash in downloads:
+        try:
+            with db.session.begin_nested():
+                # Move into the content-addressed store; re-sent attachments reuse the existing file
+                blob = store_blob_from_file(staging_path, size, content_hash, commit=False)
+                
+                # Create document record in database
+                documents.append(register_document(project_id, attachment['filename'], blob,
+                                                   document_type=attachment['document_type'],
+                                                   mime_type='application/pdf', commit=False))
+        except Exception as e:
+            print(f"An error occurred saving attachment {attachment['filename']}: {e}")
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+    
+    return documents
 
 
-def get_email_details(credentials, message_id):
+def discard_downloads(downloads):
+    """
+    Remove the staged files of downloaded attachments that were not stored
+    
+    Args:
+        downloads: Dictionary returned by download_attachments
+    """
+    for message_downloads in downloads.values():
+        for attachment, staging_path, size, content_hash in message_downloads:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+
+
+def download_attachment(session, message_id, attachment_id, file_path, max_bytes=None):
+    """
+    Stream a message attachment to a file
+    
+    The attachment arrives base64url encoded inside a JSON response. The
+    response is read in chunks and the data field is decoded as it arrives,
+    so neither the JSON nor the decoded file is ever held in memory.
+    
+    Args:
+        session: Authorized requests session
+        message_id: Email message ID
+        attachment_id: Attachment ID from the message part
+        file_path: Destination path
+        max_bytes: Optional limit on the decoded size
+        
+    Returns:
+        Tuple of (size in bytes, SHA-256 hex digest)
+        
+    Raises:
+        requests.RequestException: If the download fails
+        ValueError: If the response is malformed or the attachment is too large
+    """
+    url = (f"{app.config['GMAIL_API_ROOT'].rstrip('/')}/gmail/v1/users/me/messages/"
+           f"{message_id}/attachments/{attachment_id}")
+    
+    with session.get(url, params={'alt': 'json'}, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        chunks = response.iter_content(chunk_size=ATTACHMENT_CHUNK_SIZE)
+        return save_base64_stream(_iter_json_string(chunks, b'data'), file_path, max_bytes=max_bytes)
+
+
+def _iter_json_string(chunks, key):
+    """
+    Yield the content of a string field of a streamed JSON object in pieces
+    
+    Escape sequences are decoded, also when a chunk boundary splits one,
+    e.g. the escaped slashes some encoders write into standard base64.
+    """
+    chunks = iter(chunks)
+    marker = re.compile(rb'"' + re.escape(key) + rb'"\s*:\s*"')
+    buffer = b''
+    
+    # Find the start of the value, keeping a short tail in case the key spans chunks
+    for chunk in chunks:
+        buffer += chunk
+        match = marker.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        buffer = buffer[-(len(key) + 16):]
+    else:
+        raise ValueError(f'Response has no {key.decode()} field')
+    
+    while True:
+        output = bytearray()
+        position = 0
+        while True:
+            match = JSON_STRING_SPECIAL.search(buffer, position)
+            if match is None:
+                output += buffer[position:]
+                position = len(buffer)
+                break
+            output += buffer[position:match.start()]
+            position = match.start()
+            if buffer[position:position + 1] == b'"':
+                yield bytes(output)
+                return
+            
+            # An escape sequence cut off by the end of the chunk waits for the next one
+            code = buffer[position + 1:position + 2]
+            if code == b'u':
+                if position + 6 > len(buffer):
+                    break
+                output += chr(int(buffer[position + 2:position + 6], 16)).encode('utf-8')
+                position += 6
+            elif code in JSON_ESCAPES:
+                output += JSON_ESCAPES[code]
+                position += 2
+            elif not code:
+                break
+            else:
+                raise ValueError(f'Invalid escape sequence in the {key.decode()} field')
+        
+        if output:
+            yield bytes(output)
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise ValueError(f'Response ended inside the {key.decode()} field')
+        buffer = buffer[position:] + chunk
+
+
+def get_email_details(credentials, message_id, account=None):
     """
     Get detailed information about a specific email
     
     Args:
-        credentials: Google OAuth2 credentials
+        credentials: Google OAuth2 credentials, or None to use the cached credentials of the account
         message_id: Email message ID
+        account: EmailCredential record whose cached Gmail client is used
         
     Returns:
         Dictionary with email details
     """
-    # Build the Gmail API service
-    service = build('gmail', 'v1', credentials=credentials)
+    if account is not None:
+        try:
+            return _get_email_details(get_account_service(account), message_id)
+        finally:
+            save_refreshed_token(account)
+    
+    return _get_email_details(build_gmail_service(credentials), message_id)
+
+
+def _get_email_details(service, message_id):
+    """Get detailed information about a specific email using the given Gmail client"""
     
     try:
         # Get the message
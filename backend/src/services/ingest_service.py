@@ -0,0 +1,260 @@
+import concurrent.futures
+import datetime
+import threading
+import time
+from src.main import app, db
+from sqlalchemy import insert, select, update, literal
+from src.models.models import Document, DocumentPage, DocumentSection, IngestJob
+from src.services.pdf_service import extract_document_content, extract_pages_parallel, get_pdf_page_count, build_section_index, read_pdf_metadata
+from src.services.text_cache_service import store_document_pages, cache_document_text
+from src.services.section_service import store_document_sections
+from src.services.metadata_service import apply_document_metadata
+from src.services.storage_service import get_document_path, get_document_fingerprint
+
+_executor_lock = threading.Lock()
+_process_pool = None
+_job_runner = None
+
+def _get_executors():
+    """
+    Create the worker process pool and the job runner threads on first use
+
+    PDF parsing runs in the process pool so it uses all cores and never holds
+    the GIL of the web workers. The runner threads wait on the pool and write
+    the results to the database inside an application context.
+
+    Returns:
+        Tuple of (process pool, job runner thread pool)
+    """
+    global _process_pool, _job_runner
+    with _executor_lock:
+        if _process_pool is None:
+            workers = max(1, app.config['INGEST_WORKERS'])
+            _process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            _job_runner = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest')
+        return _process_pool, _job_runner
+
+def enqueue_document(document):
+    """
+    Queue a document for background extraction of its text, page count and section index
+
+    Args:
+        document: Document record, already committed
+
+    Returns:
+        The queued IngestJob record
+    """
+    return enqueue_documents([document])[0]
+
+def enqueue_documents(documents):
+    """
+    Queue several documents for background extraction in a single transaction
+
+    Args:
+        documents: Document records, already committed
+
+    Returns:
+        List of the queued IngestJob records
+    """
+    jobs = [IngestJob(document_id=document.id, status='queued') for document in documents]
+    db.session.add_all(jobs)
+    db.session.commit()
+
+    for job in jobs:
+        _submit_job(job.id)
+
+    return jobs
+
+def _submit_job(job_id):
+    """Hand a persisted job over to the runner threads"""
+    _, job_runner = _get_executors()
+    job_runner.submit(_run_job, job_id)
+
+def _run_job(job_id):
+    """
+    Run a single ingest job
+
+    Args:
+        job_id: ID of the IngestJob to run
+    """
+    with app.app_context():
+        # Claim the job with a conditional update, so a job submitted twice
+        # (e.g. resumed by two processes) only runs once
+        claimed = db.session.execute(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, IngestJob.status == 'queued')
+            .values(status='running', started_at=datetime.datetime.utcnow(), error=None)
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = IngestJob.query.get(job_id)
+
+        try:
+            document = Document.query.get(job.document_id)
+            fingerprint = get_document_fingerprint(document) if document else None
+            if fingerprint is None:
+                raise FileNotFoundError(f'File for document {job.document_id} not found')
+
+            # Identical content that was already extracted is copied instead of parsed again
+            source = _find_extracted_duplicate(document, fingerprint)
+            if source:
+                _copy_extraction(source, document, fingerprint)
+                cache_document_text(document, fingerprint)
+                job.page_count = document.page_count
+                job.section_count = DocumentSection.query.filter_by(document_id=document.id).count()
+            else:
+                file_path = get_document_path(document)
+                if file_path is None:
+                    raise FileNotFoundError(f'File for document {job.document_id} not found')
+
+                content = _extract(file_path)
+                if not content['page_count']:
+                    raise ValueError(f'No pages could be extracted from {document.file_path}')
+
+                apply_document_metadata(document, content['metadata'])
+                store_document_pages(document, content['page_count'], content['pages'], fingerprint)
+                store_document_sections(document, content['sections'], fingerprint)
+
+                # Assembled from the page store, so this does not parse the PDF again
+                cache_document_text(document, fingerprint)
+
+                job.page_count = content['page_count']
+                job.section_count = len(content['sections'])
+                job.pages_per_second = content['pages_per_second']
+
+            job.status = 'completed'
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error ingesting document {job.document_id}: {e}")
+            job = IngestJob.query.get(job_id)
+            job.status = 'failed'
+            job.error = str(e)
+
+        job.finished_at = datetime.datetime.utcnow()
+        db.session.commit()
+
+def _find_extracted_duplicate(document, fingerprint):
+    """
+    Find another document with the same content whose extraction results are current
+
+    Args:
+        document: Document record being ingested
+        fingerprint: Fingerprint of its file
+
+    Returns:
+        Document record or None
+    """
+    if not document.content_hash:
+        return None
+
+    return Document.query.filter(
+        Document.content_hash == document.content_hash,
+        Document.id != document.id,
+        Document.page_count.isnot(None),
+        Document.section_index_fingerprint == fingerprint,
+        Document.file_path == document.file_path
+    ).first()
+
+def _copy_extraction(source, document, fingerprint):
+    """
+    Copy pages, sections and metadata from a document with identical content
+
+    Rows are copied with INSERT ... SELECT so no page text passes through
+    Python. The search index follows the page store by itself.
+
+    Args:
+        source: Document record with current extraction results
+        document: Document record receiving them
+        fingerprint: Fingerprint shared by both files
+    """
+    DocumentPage.query.filter_by(document_id=document.id).delete()
+    DocumentSection.query.filter_by(document_id=document.id).delete()
+
+    db.session.execute(insert(DocumentPage).from_select(
+        ['document_id', 'page_number', 'fingerprint', 'text'],
+        select(literal(document.id), DocumentPage.page_number, DocumentPage.fingerprint, DocumentPage.text)
+        .where(DocumentPage.document_id == source.id)
+    ))
+    db.session.execute(insert(DocumentSection).from_select(
+        ['document_id', 'kind', 'number', 'title', 'heading', 'page_number', 'start_offset', 'end_offset'],
+        select(literal(document.id), DocumentSection.kind, DocumentSection.number, DocumentSection.title,
+               DocumentSection.heading, DocumentSection.page_number, DocumentSection.start_offset,
+               DocumentSection.end_offset)
+        .where(DocumentSection.document_id == source.id)
+    ))
+
+    document.page_count = source.page_count
+    document.pdf_title = source.pdf_title
+    document.pdf_producer = source.pdf_producer
+    document.is_encrypted = source.is_encrypted
+    document.page_width = source.page_width
+    document.page_height = source.page_height
+    document.section_index_fingerprint = fingerprint
+    db.session.commit()
+
+def _extract(file_path):
+    """
+    Extract a document in the worker pool, splitting large documents into page chunks
+
+    Args:
+        file_path: Path to the PDF file
+
+    Returns:
+        Dictionary with the page count, page text by page number, section headings, PDF metadata
+        and pages per second
+    """
+    process_pool, _ = _get_executors()
+    started = time.monotonic()
+
+    if get_pdf_page_count(file_path) >= app.config['PARALLEL_EXTRACTION_MIN_PAGES']:
+        page_count, pages, stats = extract_pages_parallel(
+            file_path,
+            workers=app.config['PARALLEL_EXTRACTION_WORKERS'],
+            executor=process_pool
+        )
+        content = {
+            'page_count': page_count,
+            'pages': pages,
+            'sections': build_section_index(sorted(pages.items())),
+            'metadata': read_pdf_metadata(file_path, sample_chars=0)
+        }
+        print(f"Extracted {page_count} pages of {file_path} in {stats['chunks']} chunks "
+              f"({stats['pages_per_second']} pages/sec)")
+    else:
+        content = process_pool.submit(extract_document_content, file_path).result()
+
+    seconds = time.monotonic() - started
+    content['pages_per_second'] = round(content['page_count'] / seconds, 1) if seconds > 0 else None
+
+    return content
+
+def resume_ingest_jobs():
+    """
+    Requeue jobs that were queued or running when the server last stopped
+
+    Returns:
+        Number of requeued jobs
+    """
+    jobs = IngestJob.query.filter(IngestJob.status.in_(['queued', 'running'])).all()
+    for job in jobs:
+        job.status = 'queued'
+    db.session.commit()
+
+    for job in jobs:
+        _submit_job(job.id)
+
+    return len(jobs)
+
+def get_latest_job(document_id):
+    """
+    Get the most recent ingest job of a document
+
+    Args:
+        document_id: ID of the document
+
+    Returns:
+        IngestJob record or None
+    """
+    return IngestJob.query.filter_by(document_id=document_id).order_by(IngestJob.id.desc()).first()
@@ -0,0 +1,107 @@
+from src.main import db
+from src.models.models import Document, DocumentPage
+from src.services.pdf_service import read_pdf_metadata
+from src.services.storage_service import get_document_path, get_document_fingerprint
+
+# Number of characters of text included in document metadata
+TEXT_SAMPLE_CHARS = 1000
+
+# Number of leading stored pages read for the sample before falling back to the PDF
+TEXT_SAMPLE_MAX_PAGES = 10
+
+def apply_document_metadata(document, metadata):
+    """
+    Copy PDF metadata onto a document record
+
+    The caller is responsible for committing the session.
+
+    Args:
+        document: Document record
+        metadata: Dictionary as returned by read_pdf_metadata
+    """
+    document.page_count = metadata['page_count']
+    document.pdf_title = (metadata['pdf_title'] or '')[:255] or None
+    document.pdf_producer = (metadata['pdf_producer'] or '')[:255] or None
+    document.is_encrypted = metadata['is_encrypted']
+    document.page_width = metadata['page_width']
+    document.page_height = metadata['page_height']
+
+def _get_stored_text_sample(document, sample_chars, max_pages=TEXT_SAMPLE_MAX_PAGES):
+    """
+    Build a text sample from the page store
+
+    Only the first max_pages stored pages are read. If they hold fewer than
+    sample_chars characters and the document has more pages, the sample is
+    left to be read from the PDF instead, so mostly blank leading pages don't
+    load the whole page store.
+
+    Args:
+        document: Document record
+        sample_chars: Number of characters of text to sample
+        max_pages: Maximum number of stored pages to read
+
+    Returns:
+        Text sample, "" if the file is missing, or None if the leading pages
+        are not stored yet
+    """
+    fingerprint = get_document_fingerprint(document)
+    if fingerprint is None:
+        return ''
+
+    pages = DocumentPage.query.filter(
+        DocumentPage.document_id == document.id,
+        DocumentPage.fingerprint == fingerprint
+    ).order_by(DocumentPage.page_number).limit(max_pages)
+
+    sample = []
+    sample_length = 0
+    expected_page = 1
+    for page in pages:
+        # Only use pages contiguous from the start of the document
+        if page.page_number != expected_page:
+            break
+        sample.append(page.text or '')
+        sample_length += len(page.text or '')
+        expected_page += 1
+        if sample_length >= sample_chars:
+            break
+
+    if sample_length < sample_chars and expected_page <= (document.page_count or 0):
+        return None
+
+    return "".join(sample)[:sample_chars]
+
+def get_document_metadata(document_id):
+    """
+    Get metadata for a document including extracted information
+
+    Metadata persisted at ingest is served from the database. The PDF is only
+    opened when it has not been ingested yet, and then just once.
+
+    Args:
+        document_id: ID of the document
+
+    Returns:
+        Dictionary with document metadata and extracted information
+    """
+    document = Document.query.get(document_id)
+    if not document:
+        return {'error': f'Document with ID {document_id} not found'}
+
+    text_sample = None
+    if document.page_count is not None and document.is_encrypted is not None:
+        text_sample = _get_stored_text_sample(document, TEXT_SAMPLE_CHARS)
+
+    file_path = get_document_path(document) if text_sample is None else None
+    if file_path:
+        metadata = read_pdf_metadata(file_path, sample_chars=TEXT_SAMPLE_CHARS)
+        if metadata['page_count']:
+            apply_document_metadata(document, metadata)
+            db.session.commit()
+        text_sample = metadata['text_sample']
+
+    metadata = document.to_dict()
+    metadata['text_sample'] = text_sample or ''
+    metadata['page_count'] = document.page_count or 0
+
+    return metadata
@@ -1,8 +1,22 @@
 import os
+import concurrent.futures
+import math
+import time
 import fitz  # PyMuPDF
 import pdfplumber
 import re
-from src.models.models import Document
+
+# DIVISION/SECTION heading at the start of a line, e.g. "SECTION 09 29 00 - GYPSUM BOARD"
+SECTION_HEADING_PATTERN = re.compile(
+    r'^[ \t]*(DIVISION|SECTION)[ \t]+(\d[\d .]*\d|\d)\b[ \t]*(?:[-\u2013\u2014:][ \t]*)?(.*)$',
+    re.MULTILINE | re.IGNORECASE
+)
+
+# PART heading of the CSI three-part section format, e.g. "PART 1 - GENERAL"
+PART_HEADING_PATTERN = re.compile(r'[ \t]*PART[ \t]+\d+\b', re.IGNORECASE)
+
+# Next non-blank line, where a heading without a title continues
+NEXT_LINE_PATTERN = re.compile(r'\s*([^\r\n]*\S)')
 
 def extract_text_from_pdf(file_path):
     """
@@ -15,15 +29,227 @@ def extract_text_from_pdf(file_path):
         Extracted text content
     """
     try:
-        text = ""
         with fitz.open(file_path) as pdf:
-            for page in pdf:
-                text += page.get_text()
-        return text
+            return "".join(page.get_text() for page in pdf)
     except Exception as e:
         print(f"Error extracting text from PDF {file_path}: {e}")
         return ""
 
+def extract_pages_from_pdf(file_path, page_numbers=None):
+    """
+    Extract text content of individual pages from a PDF file using PyMuPDF
+    
+    Args:
+        file_path: Path to the PDF file
+        page_numbers: 1-based page numbers to extract, all pages if not provided
+        
+    Returns:
+        Tuple of (page count, dictionary mapping page number to page text)
+    """
+    try:
+        with fitz.open(file_path) as pdf:
+            page_count = len(pdf)
+            if page_numbers is None:
+                page_numbers = range(1, page_count + 1)
+            
+            pages = {}
+            for page_number in page_numbers:
+                if 1 <= page_number <= page_count:
+                    pages[page_number] = pdf.load_page(page_number - 1).get_text()
+            return page_count, pages
+    except Exception as e:
+        print(f"Error extracting pages from PDF {file_path}: {e}")
+        return 0, {}
+
+def iter_pdf_pages(file_path, start_page=1):
+    """
+    Lazily extract the text of a PDF file one page at a time
+    
+    Only one page of text is held in memory at a time, so callers can stream
+    results as soon as the first page is extracted.
+    
+    Args:
+        file_path: Path to the PDF file
+        start_page: First page to extract (1-based)
+        
+    Yields:
+        Tuples of (page number, page text)
+    """
+    try:
+        with fitz.open(file_path) as pdf:
+            for page_index in range(max(start_page, 1) - 1, len(pdf)):
+                yield page_index + 1, pdf.load_page(page_index).get_text()
+    except Exception as e:
+        print(f"Error extracting pages from PDF {file_path}: {e}")
+
+def read_pdf_metadata(file_path, sample_chars=1000):
+    """
+    Read document information and a short text sample from a PDF file
+    
+    The file is opened once and text extraction stops as soon as the sample
+    is long enough.
+    
+    Args:
+        file_path: Path to the PDF file
+        sample_chars: Number of characters of text to sample from the start of the document
+        
+    Returns:
+        Dictionary with the page count, title, producer, encryption flag,
+        first page dimensions in points and text sample
+    """
+    metadata = {
+        'page_count': 0,
+        'pdf_title': None,
+        'pdf_producer': None,
+        'is_encrypted': None,
+        'page_width': None,
+        'page_height': None,
+        'text_sample': ''
+    }
+    
+    try:
+        with fitz.open(file_path) as pdf:
+            info = pdf.metadata or {}
+            metadata['page_count'] = len(pdf)
+            metadata['pdf_title'] = (info.get('title') or None)
+            metadata['pdf_producer'] = (info.get('producer') or None)
+            metadata['is_encrypted'] = bool(pdf.is_encrypted or info.get('encryption'))
+            
+            if len(pdf):
+                first_page = pdf.load_page(0)
+                metadata['page_width'] = first_page.rect.width
+                metadata['page_height'] = first_page.rect.height
+            
+            sample = []
+            sample_length = 0
+            for page in pdf:
+                if sample_length >= sample_chars:
+                    break
+                page_text = page.get_text()
+                sample.append(page_text)
+                sample_length += len(page_text)
+            metadata['text_sample'] = "".join(sample)[:sample_chars]
+    except Exception as e:
+        print(f"Error reading metadata of PDF {file_path}: {e}")
+    
+    return metadata
+
+def get_pdf_page_count(file_path):
+    """
+    Get the number of pages of a PDF file without extracting any text
+    
+    Args:
+        file_path: Path to the PDF file
+        
+    Returns:
+        Number of pages, 0 if the file can't be opened
+    """
+    try:
+        with fitz.open(file_path) as pdf:
+            return len(pdf)
+    except Exception as e:
+        print(f"Error reading page count of PDF {file_path}: {e}")
+        return 0
+
+def extract_page_range(file_path, start_page, end_page):
+    """
+    Extract the text of a contiguous page range, opening the file independently
+    
+    Used as the unit of work of parallel extraction, so it must stay a
+    module-level function that can be pickled to worker processes.
+    
+    Args:
+        file_path: Path to the PDF file
+        start_page: First page to extract (1-based)
+        end_page: Last page to extract (inclusive)
+        
+    Returns:
+        Dictionary mapping page number to page text
+
+    Raises:
+        ValueError: If the pages could not be extracted
+    """
+    page_count, pages = extract_pages_from_pdf(file_path, range(start_page, end_page + 1))
+
+    # extract_pages_from_pdf reports errors as an empty result, which would
+    # silently leave the chunk's pages out of the merged document
+    if not page_count:
+        raise ValueError(f'Pages {start_page}-{end_page} of {file_path} could not be extracted')
+    return pages
+
+def extract_pages_parallel(file_path, workers=None, chunk_size=None, executor=None):
+    """
+    Extract the text of all pages of a large PDF across several worker processes
+    
+    The page range is split into chunks that are extracted concurrently and
+    merged back in page order.
+    
+    Args:
+        file_path: Path to the PDF file
+        workers: Number of worker processes, defaults to the CPU count
+        chunk_size: Pages per chunk, defaults to about four chunks per worker
+        executor: Existing process pool to submit chunks to instead of starting one
+        
+    Returns:
+        Tuple of (page count, dictionary mapping page number to page text, stats dictionary
+        with the worker count, chunk count, elapsed seconds and pages per second)
+
+    Raises:
+        ValueError: If a chunk could not be extracted
+    """
+    started = time.monotonic()
+    workers = max(1, workers or os.cpu_count() or 1)
+    
+    page_count = get_pdf_page_count(file_path)
+    if not page_count:
+        return 0, {}, {'workers': workers, 'chunks': 0, 'seconds': 0.0, 'pages_per_second': 0.0}
+    
+    if not chunk_size:
+        chunk_size = max(1, math.ceil(page_count / (workers * 4)))
+    ranges = [(start, min(start + chunk_size - 1, page_count)) for start in range(1, page_count + 1, chunk_size)]
+    
+    pool = executor or concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(extract_page_range, file_path, start, end) for start, end in ranges]
+        pages = {}
+        for future in futures:
+            pages.update(future.result())
+    finally:
+        if executor is None:
+            pool.shutdown()
+    
+    seconds = time.monotonic() - started
+    stats = {
+        'workers': workers,
+        'chunks': len(ranges),
+        'seconds': round(seconds, 3),
+        'pages_per_second': round(page_count / seconds, 1) if seconds > 0 else 0.0
+    }
+    
+    return page_count, pages, stats
+
+def extract_document_content(file_path):
+    """
+    Extract everything the ingestion pipeline stores for a PDF file
+    
+    This only depends on the file so it can run in a worker process.
+    
+    Args:
+        file_path: Path to the PDF file
+        
+    Returns:
+        Dictionary with the page count, page text by page number, section headings and PDF metadata
+    """
+    page_count, pages = extract_pages_from_pdf(file_path)
+    sections = build_section_index(sorted(pages.items()))
+    
+    return {
+        'page_count': page_count,
+        'pages': pages,
+        'sections': sections,
+        'metadata': read_pdf_metadata(file_path, sample_chars=0)
+    }
+
 def extract_text_with_positions(file_path):
     """
     Extract text with position information using pdfplumber
@@ -53,19 +279,21 @@ def extract_text_with_positions(file_path):
         print(f"Error extracting text with positions from PDF {file_path}: {e}")
         return []
 
-def extract_specification_section(file_path, section_name):
+def extract_specification_section(file_path, section_name, text=None):
     """
     Extract content from a specific specification section
     
     Args:
         file_path: Path to the PDF file
         section_name: Name of the section to extract (e.g., "Division 09 – Finishes")
+        text: Previously extracted text of the document, extracted from the file if not provided
         
     Returns:
         Extracted section content
     """
     try:
-        text = extract_text_from_pdf(file_path)
+        if text is None:
+            text = extract_text_from_pdf(file_path)
         
         # Create a pattern to match the section name
         # This is a simplified approach and may need refinement based on actual document structure
@@ -80,6 +308,110 @@ def extract_specification_section(file_path, section_name):
         print(f"Error extracting section from PDF {file_path}: {e}")
         return f"Error extracting section: {str(e)}"
 
+def build_section_index(pages):
+    """
+    Find DIVISION/SECTION headings in the page text of a specification in a single pass
+    
+    A heading without a title, e.g. "SECTION 092900" followed by "GYPSUM
+    BOARD" on the next line, takes its title from the next line, also when
+    that line starts the next page. PART headings within a section are not
+    indexed.
+    
+    Args:
+        pages: List of (page number, page text) tuples in page order
+        
+    Returns:
+        List of dictionaries with the kind, number, title, page and character
+        offsets of each heading. Offsets refer to the concatenated page text.
+        A section ends at the next heading, a division at the next division.
+    """
+    headings = []
+    page_texts = []
+    page_offset = 0
+    for page_number, page_text in pages:
+        page_text = page_text or ''
+        for match in SECTION_HEADING_PATTERN.finditer(page_text):
+            headings.append({
+                'kind': match.group(1).lower(),
+                'number': ' '.join(match.group(2).split()),
+                'title': match.group(3).strip(),
+                'heading': match.group(0).strip(),
+                'page_number': page_number,
+                'start_offset': page_offset + match.start(),
+                'heading_end': page_offset + match.end()
+            })
+        page_texts.append(page_text)
+        page_offset += len(page_text)
+    
+    text = ''.join(page_texts)
+    for heading in headings:
+        heading_end = heading.pop('heading_end')
+        if not heading['title']:
+            line = NEXT_LINE_PATTERN.match(text, heading_end)
+            if line and not SECTION_HEADING_PATTERN.match(line.group(1)) and not PART_HEADING_PATTERN.match(line.group(1)):
+                heading['title'] = line.group(1).strip()
+                heading['heading'] = f"{heading['heading']} {heading['title']}"
+        heading['title'] = heading['title'][:255]
+        heading['heading'] = heading['heading'][:512]
+    
+    # Close each heading at the start of the next one, walking backwards so
+    # the next division is known for every division
+    next_heading = page_offset
+    next_division = page_offset
+    for heading in reversed(headings):
+        heading['end_offset'] = next_division if heading['kind'] == 'division' else next_heading
+        next_heading = heading['start_offset']
+        if heading['kind'] == 'division':
+            next_division = heading['start_offset']
+    
+    return headings
+
+def render_page_tile(file_path, page_number, zoom=0, x=0, y=0, tile_size=256, image_format='png'):
+    """
+    Render a square tile of a PDF page as an image
+    
+    At zoom level 0 the whole page fits in a single tile, which makes it a
+    thumbnail. Every further zoom level doubles the resolution, so level z is
+    covered by up to 2^z x 2^z tiles.
+    
+    Args:
+        file_path: Path to the PDF file
+        page_number: Page to render (1-based)
+        zoom: Zoom level, 0 for the whole page
+        x: Tile column, counted from the left edge
+        y: Tile row, counted from the top edge
+        tile_size: Width and height of a tile in pixels
+        image_format: "png", "jpeg" or "webp" (WebP requires Pillow)
+        
+    Returns:
+        Encoded image bytes, or None if the page or tile is outside the document
+    """
+    with fitz.open(file_path) as pdf:
+        if page_number < 1 or page_number > len(pdf):
+            return None
+        
+        page = pdf.load_page(page_number - 1)
+        page_rect = page.rect
+        scale = tile_size / max(page_rect.width, page_rect.height) * (2 ** zoom)
+        
+        # Size of one tile in page coordinates
+        span = tile_size / scale
+        clip = fitz.Rect(
+            page_rect.x0 + x * span,
+            page_rect.y0 + y * span,
+            page_rect.x0 + (x + 1) * span,
+            page_rect.y0 + (y + 1) * span
+        ) & page_rect
+        if x < 0 or y < 0 or clip.is_empty:
+            return None
+        
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=clip, alpha=False)
+        if image_format == 'webp':
+            return pixmap.pil_tobytes(format='WEBP')
+        if image_format == 'jpeg':
+            return pixmap.tobytes('jpeg')
+        return pixmap.tobytes('png')
+
 def highlight_text_in_pdf(input_path, output_path, text_to_highlight):
     """
     Create a new PDF with highlighted text
@@ -144,33 +476,3 @@ def extract_quantities_and_materials(text):
     results['materials'] = list(set([m.lower() for m in materials]))
     
     return results
-
-def get_document_metadata(document_id):
-    """
-    Get metadata for a document including extracted information
-    
-    Args:
-        document_id: ID of the document
-        
-    Returns:
-        Dictionary with document metadata and extracted information
-    """
-    document = Document.query.get(document_id)
-    if not document:
-        return {'error': f'Document with ID {document_id} not found'}
-    
-    # Basic metadata
-    metadata = document.to_dict()
-    
-    # Extract text sample (first 1000 characters)
-    text = extract_text_from_pdf(document.file_path)
-    metadata['text_sample'] = text[:1000] if text else ""
-    
-    # Get page count
-    try:
-        with fitz.open(document.file_path) as pdf:
-            metadata['page_count'] = len(pdf)
-    except Exception:
-        metadata['page_count'] = 0
-    
-    return metadata
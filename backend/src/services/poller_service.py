@@ -0,0 +1,211 @@
+import concurrent.futures
+import datetime
+import random
+import threading
+from src.main import app, db
+from src.models.models import EmailCredential
+from src.services.email_service import process_emails, is_retryable_status
+
+_state_lock = threading.Lock()
+_scheduler = None
+_stop_event = threading.Event()
+_started_at = None
+
+# Per-account locks so an account is never synced by two threads at once
+_account_locks = {}
+
+# Last-run statistics by account ID, read and written under _state_lock
+_account_stats = {}
+
+def get_account_lock(account_id):
+    """
+    Get the lock that serializes syncs of an account
+
+    Both the poller and the manual /api/email/process route take it, so a
+    mailbox is never processed twice concurrently.
+
+    Args:
+        account_id: ID of the EmailCredential
+
+    Returns:
+        threading.Lock
+    """
+    with _state_lock:
+        if account_id not in _account_locks:
+            _account_locks[account_id] = threading.Lock()
+        return _account_locks[account_id]
+
+def _get_backoff(failures):
+    """
+    Delay before retrying an account after consecutive transient failures
+
+    Exponential in the number of failures, capped, with jitter so accounts
+    that failed together don't retry in lockstep.
+    """
+    delay = min(app.config['EMAIL_POLL_BACKOFF_MAX'], app.config['EMAIL_POLL_BACKOFF_BASE'] * 2 ** (failures - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+def start_poller():
+    """
+    Start the background thread that syncs every authenticated mailbox on an interval
+
+    Does nothing if EMAIL_POLL_INTERVAL is 0 or the poller is already running.
+
+    Returns:
+        True if the poller was started
+    """
+    global _scheduler, _started_at
+    with _state_lock:
+        if app.config['EMAIL_POLL_INTERVAL'] <= 0 or (_scheduler and _scheduler.is_alive()):
+            return False
+
+        _stop_event.clear()
+        _started_at = datetime.datetime.utcnow()
+        _scheduler = threading.Thread(target=_run_scheduler, name='email-poller', daemon=True)
+        _scheduler.start()
+        return True
+
+def stop_poller(timeout=None):
+    """
+    Stop the poller after the syncs in progress finish
+
+    Args:
+        timeout: Maximum number of seconds to wait for the scheduler thread
+    """
+    _stop_event.set()
+    if _scheduler:
+        _scheduler.join(timeout)
+
+def _run_scheduler():
+    """Main loop of the poller: start a sync for every account that is due"""
+    workers = max(1, app.config['EMAIL_POLL_WORKERS'])
+    running = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='email-poll') as pool:
+        while not _stop_event.is_set():
+            # Forget finished syncs
+            for account_id in [account_id for account_id, future in running.items() if future.done()]:
+                del running[account_id]
+
+            now = datetime.datetime.utcnow()
+            with app.app_context():
+                account_ids = [account_id for (account_id,) in db.session.query(EmailCredential.id)]
+
+            for account_id in account_ids:
+                if account_id in running or len(running) >= workers:
+                    continue
+                with _state_lock:
+                    stats = _account_stats.get(account_id)
+                    next_run_at = stats['next_run_at'] if stats else None
+                if next_run_at and next_run_at > now:
+                    continue
+                running[account_id] = pool.submit(_poll_account, account_id)
+
+            _stop_event.wait(app.config['EMAIL_POLL_TICK'])
+
+def _poll_account(account_id):
+    """
+    Sync one mailbox and schedule its next run
+
+    Args:
+        account_id: ID of the EmailCredential
+    """
+    lock = get_account_lock(account_id)
+    if not lock.acquire(blocking=False):
+        # A manual sync is running; try again on the next tick
+        return
+
+    try:
+        with app.app_context():
+            account = EmailCredential.query.get(account_id)
+            if not account:
+                with _state_lock:
+                    _account_stats.pop(account_id, None)
+                return
+
+            started = datetime.datetime.utcnow()
+            with _state_lock:
+                stats = _account_stats.setdefault(account_id, {
+                    'account_id': account_id,
+                    'email': None,
+                    'runs': 0,
+                    'processed': 0,
+                    'consecutive_failures': 0,
+                    'last_run_at': None,
+                    'last_success_at': None,
+                    'last_duration': None,
+                    'last_processed': None,
+                    'last_error': None,
+                    'next_run_at': None
+                })
+                stats['email'] = account.email
+                stats['last_run_at'] = started
+                stats['runs'] += 1
+
+            try:
+                result = process_emails(
+                    None,
+                    app.config['EMAIL_QUERY'],
+                    app.config['EMAIL_POLL_MAX_RESULTS'],
+                    account=account
+                )
+            except Exception as e:
+                db.session.rollback()
+                result = {'error': str(e), 'status': 500}
+
+            finished = datetime.datetime.utcnow()
+            status = result.get('status')
+            failed = 'error' in result or (status and is_retryable_status(status))
+            error = result.get('error') or f'Gmail responded with status {status}'
+
+            with _state_lock:
+                stats['last_duration'] = round((finished - started).total_seconds(), 3)
+                stats['processed'] += result.get('processed', 0)
+                stats['last_processed'] = result.get('processed', 0)
+
+                if failed:
+                    stats['last_error'] = error
+                    stats['consecutive_failures'] += 1
+                    if status and is_retryable_status(status):
+                        delay = _get_backoff(stats['consecutive_failures'])
+                    else:
+                        delay = app.config['EMAIL_POLL_INTERVAL']
+                else:
+                    stats['last_error'] = None
+                    stats['last_success_at'] = finished
+                    stats['consecutive_failures'] = 0
+                    delay = app.config['EMAIL_POLL_INTERVAL']
+
+                stats['next_run_at'] = finished + datetime.timedelta(seconds=delay)
+
+            if failed:
+                print(f"Error polling {account.email}: {error}, retrying in {delay:.0f}s")
+    finally:
+        lock.release()
+
+def get_poller_stats():
+    """
+    Get the state of the poller and the last-run statistics of every account
+
+    Returns:
+        Dictionary with poller settings and per-account statistics
+    """
+    def serialize(value):
+        return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+    # Copy under the lock so a sync finishing meanwhile can't show half updated
+    with _state_lock:
+        running = bool(_scheduler and _scheduler.is_alive())
+        started_at = _started_at
+        accounts = [dict(stats) for stats in _account_stats.values()]
+
+    return {
+        'running': running,
+        'started_at': serialize(started_at),
+        'interval': app.config['EMAIL_POLL_INTERVAL'],
+        'workers': app.config['EMAIL_POLL_WORKERS'],
+        'accounts': [
+            {key: serialize(value) for key, value in stats.items()}
+            for stats in sorted(accounts, key=lambda stats: stats['account_id'])
+        ]
+    }
@@ -0,0 +1,31 @@
+import datetime
+from sqlalchemy import func
+from src.models.models import Project
+
+def filter_projects(query, args):
+    """
+    Apply the due date window and sender filters of a project list request
+
+    The sender is matched case-insensitively against the whole email
+    address, which the lower(sender_email) index answers directly.
+
+    Args:
+        query: Query of Project
+        args: Request arguments (MultiDict) with optional due_after, due_before and sender
+
+    Returns:
+        Filtered query
+
+    Raises:
+        ValueError: If a due date is not an ISO date
+    """
+    if args.get('due_after'):
+        query = query.filter(Project.bid_due_date >= datetime.datetime.fromisoformat(args['due_after']))
+    if args.get('due_before'):
+        query = query.filter(Project.bid_due_date <= datetime.datetime.fromisoformat(args['due_before']))
+
+    sender = (args.get('sender') or '').strip()
+    if sender:
+        query = query.filter(func.lower(Project.sender_email) == sender.lower())
+
+    return query
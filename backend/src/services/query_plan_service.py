@@ -0,0 +1,108 @@
+import datetime
+import re
+from sqlalchemy import select
+from werkzeug.datastructures import MultiDict
+from src.main import db
+from src.models.models import Project, Document, DocumentSection, IngestJob, Estimate, EstimateItem, Proposal, ProcessedMessage
+from src.services.document_service import filter_documents
+from src.services.project_service import filter_projects
+from src.services.summary_service import with_rollups
+from src.utils.query_utils import page_query, encode_cursor
+
+# Plan steps that read a whole table or sort it instead of walking an index
+FULL_SCAN_PATTERN = re.compile(r'^SCAN \w+$|^SCAN \w+ AS \w+$|USE TEMP B-TREE FOR ORDER BY')
+TABLE_SCAN_PATTERN = re.compile(r'^SCAN \w+$|^SCAN \w+ AS \w+$')
+
+# Queries with a range filter on another column than the sort key. The range
+# is answered from an index and only the matching rows are sorted.
+SORTED_QUERIES = {'projects by bid due date'}
+
+def get_hot_queries():
+    """
+    Build the queries the list endpoints, ingest pipeline and email sync run most
+
+    The list queries are built with the same filter and pagination helpers
+    as the routes, so the check covers the SQL the app actually sends.
+
+    Returns:
+        List of (name, SQLAlchemy statement) tuples
+    """
+    now = datetime.datetime.utcnow()
+    cursor = encode_cursor(now, 100)
+
+    def project_page(**args):
+        query = filter_projects(Project.query, MultiDict(args))
+        return page_query(query, Project, cursor=args.get('cursor')).statement
+
+    def document_page(**args):
+        query = filter_documents(Document.query, MultiDict(args))
+        return page_query(query, Document, cursor=args.get('cursor')).statement
+
+    return [
+        ('project list', project_page()),
+        ('project list, next page', project_page(cursor=cursor)),
+        ('project summaries', page_query(with_rollups(Project.query), Project).statement),
+        ('projects by sender', project_page(sender='Bids@Example.com')),
+        ('projects by sender, next page', project_page(sender='bids@example.com', cursor=cursor)),
+        ('projects by bid due date', project_page(
+            due_after=now.isoformat(), due_before=(now + datetime.timedelta(days=7)).isoformat()
+        )),
+        ('legacy Gmail projects', select(Project.id).where(
+            Project.email_subject >= 'Gmail-', Project.email_subject < 'Gmail.'
+        )),
+        ('document list', document_page()),
+        ('documents of a project', document_page(project_id='1')),
+        ('documents by type', document_page(document_type='plans')),
+        ('documents with the same content', select(Document).where(Document.content_hash == '0' * 64)),
+        ('sections of a document', select(DocumentSection).where(DocumentSection.document_id == 1)),
+        ('ingest jobs of a document', select(IngestJob).where(IngestJob.document_id == 1)
+            .order_by(IngestJob.id.desc())),
+        ('unfinished ingest jobs', select(IngestJob).where(IngestJob.status.in_(['queued', 'running']))),
+        ('estimates of a project', select(Estimate).where(Estimate.project_id == 1)),
+        ('items of an estimate', select(EstimateItem).where(EstimateItem.estimate_id == 1)),
+        ('proposals of a project', select(Proposal).where(Proposal.project_id == 1)),
+        ('processed Gmail messages', select(ProcessedMessage.message_id)
+            .where(ProcessedMessage.message_id.in_(['a', 'b']))),
+    ]
+
+def explain_query(statement):
+    """
+    Get the query plan the database chooses for a statement
+
+    Args:
+        statement: SQLAlchemy statement
+
+    Returns:
+        List of plan lines
+    """
+    connection = db.session.connection()
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+
+    if connection.dialect.name == 'sqlite':
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).all()
+        return [row[-1] for row in rows]
+
+    rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', compiled.params).all()
+    return [row[0] for row in rows]
+
+def check_query_plans():
+    """
+    Check that every hot query is answered from an index
+
+    Only SQLite plans are checked. PostgreSQL deliberately scans small
+    tables sequentially, so its plans are reported without a verdict.
+
+    Returns:
+        List of dictionaries with the query name, plan lines and whether an
+        index is used (None when not checked)
+    """
+    checked = db.session.connection().dialect.name == 'sqlite'
+    results = []
+    for name, statement in get_hot_queries():
+        plan = explain_query(statement)
+        pattern = TABLE_SCAN_PATTERN if name in SORTED_QUERIES else FULL_SCAN_PATTERN
+        uses_index = not any(pattern.search(line) for line in plan) if checked else None
+        results.append({'name': name, 'plan': plan, 'uses_index': uses_index})
+    db.session.rollback()
+    return results
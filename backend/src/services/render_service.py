@@ -0,0 +1,169 @@
+import os
+import shutil
+import tempfile
+import threading
+from src.main import app
+from src.models.models import Document
+from src.services.pdf_service import render_page_tile
+from src.services.storage_service import get_storage_dir, get_sharded_key, get_document_path, get_document_fingerprint
+
+try:
+    import PIL
+except ImportError:  # Only needed for WebP tiles
+    PIL = None
+
+# Highest supported zoom level (2^6 = 64 tiles across)
+MAX_ZOOM = 6
+
+# Supported image formats and their file extensions
+IMAGE_FORMATS = {
+    'png': 'png',
+    'jpeg': 'jpg',
+    'webp': 'webp'
+}
+
+# Fraction of the size budget the cache is trimmed to when it overflows
+EVICTION_TARGET = 0.9
+
+_cache_lock = threading.Lock()
+_cache_size = None
+
+def is_format_available(image_format):
+    """Check whether tiles can be encoded in an image format; WebP requires Pillow"""
+    return image_format != 'webp' or PIL is not None
+
+def _get_tile_dir(document, fingerprint):
+    """
+    Get the cache directory of the tiles of a document's current file
+
+    Content-addressed files are keyed by their hash, so documents sharing
+    the same content share their tiles. Files stored before the blob store
+    are keyed by document, because their fingerprint isn't unique.
+
+    Returns:
+        Tuple of (directory, prefix of the cache keys of its tiles)
+    """
+    tiles_dir = get_storage_dir('cache', 'tiles')
+    if fingerprint == document.content_hash:
+        return os.path.join(tiles_dir, *get_sharded_key('blobs', fingerprint).split('/')), fingerprint
+    return os.path.join(tiles_dir, str(document.id), fingerprint), f"{document.id}-{fingerprint}"
+
+def _scan_cache():
+    """List cached tiles as (modification time, size, path) tuples"""
+    entries = []
+    for root, _, files in os.walk(get_storage_dir('cache', 'tiles')):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+def _add_to_cache_size(delta):
+    """
+    Track the total cache size and evict least recently used tiles when it exceeds the budget
+    """
+    global _cache_size
+    with _cache_lock:
+        if _cache_size is None:
+            _cache_size = sum(size for _, size, _ in _scan_cache())
+        else:
+            _cache_size += delta
+
+        max_bytes = app.config['TILE_CACHE_MAX_BYTES']
+        if _cache_size <= max_bytes:
+            return
+
+        target = max_bytes * EVICTION_TARGET
+        for _, size, path in sorted(_scan_cache()):
+            if _cache_size <= target:
+                break
+            try:
+                os.remove(path)
+                _cache_size -= size
+            except OSError:
+                pass
+
+def get_page_tile(document, page_number, zoom=0, x=0, y=0, image_format='png'):
+    """
+    Get a rendered tile of a document page, rendering it on a cache miss
+
+    Args:
+        document: Document record
+        page_number: Page to render (1-based)
+        zoom: Zoom level, 0 for a whole-page thumbnail
+        x: Tile column
+        y: Tile row
+        image_format: "png", "jpeg" or "webp"
+
+    Returns:
+        Tuple of (encoded image bytes, cache key), or None if the tile is outside the document
+    """
+    fingerprint = get_document_fingerprint(document)
+    if fingerprint is None:
+        return None
+
+    tile_size = app.config['TILE_SIZE']
+    extension = IMAGE_FORMATS[image_format]
+
+    # The fingerprint is part of the key, so tiles of older file versions are
+    # never served and simply age out of the cache
+    tile_dir, key_prefix = _get_tile_dir(document, fingerprint)
+    tile_name = f"p{page_number}-s{tile_size}-z{zoom}-{x}-{y}.{extension}"
+    tile_path = os.path.join(tile_dir, tile_name)
+    cache_key = f"{key_prefix}-{tile_name}"
+
+    # The tile may be evicted at any moment, so read it rather than checking for it first
+    try:
+        with open(tile_path, 'rb') as f:
+            image = f.read()
+        # Mark as recently used for eviction
+        os.utime(tile_path)
+        return image, cache_key
+    except OSError:
+        pass
+
+    file_path = get_document_path(document)
+    if file_path is None:
+        return None
+
+    image = render_page_tile(file_path, page_number, zoom, x, y,
+                             tile_size=tile_size, image_format=image_format)
+    if image is None:
+        return None
+
+    # Write atomically so concurrent requests never read a partial tile
+    os.makedirs(tile_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=tile_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(image)
+    os.replace(temp_path, tile_path)
+
+    _add_to_cache_size(len(image))
+
+    return image, cache_key
+
+def purge_document_tiles(document):
+    """
+    Remove the cached tiles of a deleted document
+
+    Tiles of content-addressed files are only removed once no other
+    document has the same content.
+
+    Args:
+        document: Document record, already deleted
+    """
+    global _cache_size
+    tiles_dir = get_storage_dir('cache', 'tiles')
+    tile_dirs = [os.path.join(tiles_dir, str(document.id))]
+    if document.content_hash and not Document.query.filter_by(content_hash=document.content_hash).first():
+        tile_dirs.append(os.path.join(tiles_dir, *get_sharded_key('blobs', document.content_hash).split('/')))
+
+    for tile_dir in tile_dirs:
+        if os.path.exists(tile_dir):
+            shutil.rmtree(tile_dir, ignore_errors=True)
+            with _cache_lock:
+                # Recomputed on the next write
+                _cache_size = None
@@ -0,0 +1,116 @@
+import re
+from sqlalchemy import text
+from src.main import db
+from src.models.models import Document
+
+# Tokens of a search query: quoted phrases or single words
+QUERY_TOKEN_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+# Page text as a text search vector on PostgreSQL. Matches the expression of
+# the ix_document_page_text_tsvector GIN index, so searches use the index.
+PAGE_TSVECTOR = "to_tsvector('english', COALESCE(text, ''))"
+
+def uses_fts_index():
+    """
+    Check whether page text is searched through the SQLite FTS5 index
+
+    The index, document_page_fts, and the triggers that keep it in step
+    with the page store are created by a migration. PostgreSQL searches the
+    page store directly through a GIN index instead.
+    """
+    return db.engine.dialect.name == 'sqlite'
+
+def build_match_query(query):
+    """
+    Convert a user search string into an FTS5 match expression
+
+    Every word or quoted phrase must appear on the page. Terms are quoted so
+    FTS5 operators and punctuation in the input are matched literally.
+
+    Args:
+        query: Search string entered by the user
+
+    Returns:
+        FTS5 match expression, or None if the query has no terms
+    """
+    terms = []
+    for phrase, word in QUERY_TOKEN_PATTERN.findall(query):
+        term = (phrase or word).strip()
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"')
+
+    return ' '.join(terms) if terms else None
+
+def search_documents(query, project_id=None, limit=50, offset=0):
+    """
+    Search the page text of all indexed documents
+
+    Args:
+        query: Search string entered by the user
+        project_id: Restrict results to documents of this project
+        limit: Maximum number of hits to return
+        offset: Number of hits to skip
+
+    Returns:
+        List of dictionaries describing the matching pages, best matches first
+    """
+    match_query = build_match_query(query)
+    if not match_query:
+        return []
+
+    dialect = db.engine.dialect.name
+    if uses_fts_index():
+        # The index only holds page IDs, so document and project come from the page store
+        sql = ("SELECT p.document_id, d.project_id, p.page_number, "
+               "snippet(document_page_fts, 0, '<mark>', '</mark>', '...', 16) AS snippet, "
+               "-bm25(document_page_fts) AS score "
+               "FROM document_page_fts "
+               "JOIN document_page p ON p.id = document_page_fts.rowid "
+               "JOIN document d ON d.id = p.document_id "
+               "WHERE document_page_fts MATCH :query")
+        params = {'query': match_query, 'limit': limit, 'offset': offset}
+        if project_id is not None:
+            sql += " AND d.project_id = :project_id"
+            params['project_id'] = project_id
+    elif dialect == 'postgresql':
+        # PostgreSQL full-text search over the page store. websearch_to_tsquery
+        # parses the query as entered: quoted phrases and words must all
+        # appear, as with FTS5. Only the few matching pages found through the
+        # GIN index are ranked and highlighted.
+        sql = ("SELECT p.document_id, d.project_id, p.page_number, "
+               "ts_headline('english', COALESCE(p.text, ''), q, "
+               "'StartSel=<mark>, StopSel=</mark>, MaxWords=16, MinWords=8') AS snippet, "
+               f"ts_rank({PAGE_TSVECTOR}, q) AS score "
+               "FROM document_page p JOIN document d ON d.id = p.document_id, "
+               "websearch_to_tsquery('english', :query) q "
+               f"WHERE {PAGE_TSVECTOR} @@ q")
+        params = {'query': query, 'limit': limit, 'offset': offset}
+        if project_id is not None:
+            sql += " AND d.project_id = :project_id"
+            params['project_id'] = project_id
+    else:
+        raise RuntimeError(f'Full-text search is not supported on {dialect} databases')
+
+    sql += " ORDER BY score DESC LIMIT :limit OFFSET :offset"
+    rows = db.session.execute(text(sql), params).all()
+
+    # Look up document names in a single query
+    document_ids = {row.document_id for row in rows}
+    documents = {}
+    if document_ids:
+        documents = {document.id: document for document in Document.query.filter(Document.id.in_(document_ids))}
+
+    hits = []
+    for row in rows:
+        document = documents.get(row.document_id)
+        hits.append({
+            'document_id': row.document_id,
+            'project_id': row.project_id,
+            'filename': (document.original_filename or document.filename) if document else None,
+            'document_type': document.document_type if document else None,
+            'page_number': row.page_number,
+            'snippet': row.snippet,
+            'score': row.score
+        })
+
+    return hits
@@ -0,0 +1,104 @@
+import bisect
+import re
+from src.main import db
+from src.models.models import DocumentSection
+from src.services.pdf_service import build_section_index
+from src.services.text_cache_service import get_document_text, get_document_pages
+from src.services.storage_service import get_document_fingerprint
+
+def _normalize_heading(value):
+    """Lowercase a heading and collapse dashes and whitespace so names compare loosely"""
+    value = re.sub(r'[-–—:]', ' ', value.lower())
+    return ' '.join(value.split())
+
+def index_document_sections(document, fingerprint=None):
+    """
+    Build and store the DIVISION/SECTION index of a document
+
+    Args:
+        document: Document record
+        fingerprint: Fingerprint of the file, computed if not provided
+
+    Returns:
+        List of DocumentSection records ordered by position
+    """
+    fingerprint = fingerprint or get_document_fingerprint(document)
+    if fingerprint is None:
+        return []
+
+    pages = get_document_pages(document, fingerprint=fingerprint)
+    headings = build_section_index([(page.page_number, page.text) for page in pages])
+
+    return store_document_sections(document, headings, fingerprint)
+
+def store_document_sections(document, headings, fingerprint):
+    """
+    Replace the stored section index of a document
+
+    Args:
+        document: Document record
+        headings: Headings as returned by build_section_index
+        fingerprint: Fingerprint of the file the headings were found in
+
+    Returns:
+        List of DocumentSection records ordered by position
+    """
+    DocumentSection.query.filter_by(document_id=document.id).delete()
+    sections = [DocumentSection(document_id=document.id, **heading) for heading in headings]
+    db.session.add_all(sections)
+
+    document.section_index_fingerprint = fingerprint
+    db.session.commit()
+
+    return sections
+
+def get_document_sections(document):
+    """
+    Get the DIVISION/SECTION index of a document, building it on first access
+
+    Args:
+        document: Document record
+
+    Returns:
+        List of DocumentSection records ordered by position
+    """
+    fingerprint = get_document_fingerprint(document)
+    if fingerprint is None:
+        return []
+
+    if document.section_index_fingerprint != fingerprint:
+        return index_document_sections(document, fingerprint)
+
+    return DocumentSection.query.filter_by(document_id=document.id).order_by(DocumentSection.start_offset).all()
+
+def extract_document_section(document, section_name):
+    """
+    Extract a specification section using the section index
+
+    Args:
+        document: Document record
+        section_name: Name of the section to extract (e.g., "Division 09 – Finishes")
+
+    Returns:
+        Extracted section content
+    """
+    sections = get_document_sections(document)
+    text = get_document_text(document)
+
+    # Prefer a heading that starts with the requested name
+    wanted = _normalize_heading(section_name)
+    for section in sections:
+        if _normalize_heading(section.heading or '').startswith(wanted):
+            return text[section.start_offset:section.end_offset]
+
+    # Otherwise slice from the first mention of the name up to the next heading
+    position = text.lower().find(section_name.lower())
+    if position == -1:
+        return f"Section '{section_name}' not found in the document."
+
+    name_end = position + len(section_name)
+    starts = [section.start_offset for section in sections]
+    index = bisect.bisect_left(starts, name_end)
+    end = starts[index] if index < len(starts) else len(text)
+
+    return text[position:end]
@@ -0,0 +1,299 @@
+import os
+import tempfile
+import threading
+from src.main import app
+from src.utils.file_utils import get_file_fingerprint
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # Only needed for the S3 backend
+    boto3 = None
+    ClientError = None
+
+# Fraction of the size budget the local copy cache is trimmed to when it overflows
+EVICTION_TARGET = 0.9
+
+_storage_lock = threading.Lock()
+_storage = None
+
+def get_storage_dir(*parts):
+    """
+    Get a working directory on the local storage volume, creating it if needed
+
+    Staging areas and caches always live on local disk, whatever backend
+    holds the stored files.
+
+    Args:
+        parts: Path components below the storage root
+
+    Returns:
+        Path of the directory
+    """
+    directory = os.path.join(app.config['STORAGE_ROOT'], *parts)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def remove_storage_dir(*parts):
+    """
+    Remove an empty working directory on the local storage volume
+
+    Args:
+        parts: Path components below the storage root
+    """
+    directory = os.path.join(app.config['STORAGE_ROOT'], *parts)
+    if os.path.exists(directory):
+        try:
+            os.rmdir(directory)
+        except Exception as e:
+            print(f"Error deleting directory {directory}: {e}")
+
+def get_sharded_key(namespace, name):
+    """
+    Build a storage key sharded by name prefix to keep directories small
+
+    Args:
+        namespace: Top level grouping, e.g. "blobs"
+        name: Hex name of the stored object, e.g. a SHA-256 digest
+
+    Returns:
+        Storage key such as "blobs/ab/cd/abcd..."
+    """
+    return '/'.join([namespace, name[:2], name[2:4], name])
+
+class LocalStorage:
+    """Stores files in a directory tree on the app server's disk"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def put_file(self, source_path, key):
+        """Move a local file into storage under the given key"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def delete(self, key):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def get_local_path(self, key):
+        """Get a path PyMuPDF and send_file can open, or None if the file is missing"""
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+
+class S3Storage:
+    """
+    Stores files in an S3-compatible bucket
+
+    Files are downloaded on first local access into a size-bounded cache on
+    local disk, because PDF parsing and range responses need a seekable file.
+    Setting endpoint_url points the backend at MinIO or a moto server.
+    """
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region_name=None, cache_dir=None, cache_max_bytes=None):
+        if boto3 is None:
+            raise RuntimeError('The S3 storage backend requires boto3 to be installed')
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region_name)
+        self.cache = LocalStorage(cache_dir)
+        self.cache_max_bytes = cache_max_bytes
+        self._cache_lock = threading.Lock()
+
+    def _object_key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put_file(self, source_path, key):
+        """Upload a local file under the given key and keep it as the cached local copy"""
+        self.client.upload_file(source_path, self.bucket, self._object_key(key))
+        self.cache.put_file(source_path, key)
+        self._trim_cache()
+
+    def exists(self, key):
+        if self.cache.exists(key):
+            return True
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        self.cache.delete(key)
+
+    def get_local_path(self, key):
+        """Get the path of a local copy of a stored file, downloading it on a cache miss"""
+        path = self.cache.get_local_path(key)
+        if path:
+            # Mark as recently used for eviction
+            os.utime(path)
+            return path
+
+        directory = get_storage_dir('tmp')
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._object_key(key), temp_path)
+        except ClientError as e:
+            os.remove(temp_path)
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+        self.cache.put_file(temp_path, key)
+        self._trim_cache()
+        return self.cache.get_local_path(key)
+
+    def _trim_cache(self):
+        """Evict least recently used local copies when the cache exceeds its budget"""
+        if not self.cache_max_bytes:
+            return
+
+        with self._cache_lock:
+            entries = []
+            for root, _, files in os.walk(self.cache.root):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total_size = sum(size for _, size, _ in entries)
+            if total_size <= self.cache_max_bytes:
+                return
+
+            target = self.cache_max_bytes * EVICTION_TARGET
+            for _, size, path in sorted(entries):
+                if total_size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total_size -= size
+                except OSError:
+                    pass
+
+def get_storage():
+    """
+    Get the configured storage backend
+
+    STORAGE_BACKEND selects "local" (default) or "s3".
+
+    Returns:
+        LocalStorage or S3Storage instance
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if app.config['STORAGE_BACKEND'] == 's3':
+                _storage = S3Storage(
+                    app.config['S3_BUCKET'],
+                    prefix=app.config['S3_PREFIX'],
+                    endpoint_url=app.config['S3_ENDPOINT_URL'],
+                    region_name=app.config['S3_REGION'],
+                    cache_dir=get_storage_dir('cache', 'files'),
+                    cache_max_bytes=app.config['STORAGE_CACHE_MAX_BYTES']
+                )
+            else:
+                _storage = LocalStorage(app.config['STORAGE_ROOT'])
+        return _storage
+
+def _is_legacy_path(key):
+    # Files stored before the storage backends existed are recorded by absolute path
+    return os.path.isabs(key)
+
+def store_file(source_path, key):
+    """
+    Move a local file into storage
+
+    Args:
+        source_path: Path of the file, removed once stored
+        key: Storage key to store it under
+    """
+    get_storage().put_file(source_path, key)
+
+def file_exists(key):
+    """
+    Check whether a stored file exists
+
+    Args:
+        key: Storage key or legacy absolute path
+
+    Returns:
+        True if the file exists
+    """
+    if _is_legacy_path(key):
+        return os.path.exists(key)
+    return get_storage().exists(key)
+
+def delete_file(key):
+    """
+    Delete a stored file if it exists
+
+    Args:
+        key: Storage key or legacy absolute path
+    """
+    try:
+        if _is_legacy_path(key):
+            if os.path.exists(key):
+                os.remove(key)
+        else:
+            get_storage().delete(key)
+    except Exception as e:
+        print(f"Error deleting file {key}: {e}")
+
+def get_local_path(key):
+    """
+    Resolve a stored file to a local path that can be opened directly
+
+    Args:
+        key: Storage key or legacy absolute path
+
+    Returns:
+        Local path, or None if the file does not exist
+    """
+    if _is_legacy_path(key):
+        return key if os.path.exists(key) else None
+    return get_storage().get_local_path(key)
+
+def get_document_path(document):
+    """
+    Resolve the file of a document to a local path
+
+    Args:
+        document: Document record
+
+    Returns:
+        Local path, or None if the file does not exist
+    """
+    return get_local_path(document.file_path)
+
+def get_document_fingerprint(document):
+    """
+    Get a value that changes whenever the file content of a document changes
+
+    Content-addressed files never change, so their hash is used and no
+    file access is needed. Legacy files use their size and modification time.
+
+    Args:
+        document: Document record
+
+    Returns:
+        Fingerprint string, or None if the file does not exist
+    """
+    if not _is_legacy_path(document.file_path) and document.content_hash:
+        return document.content_hash
+    return get_file_fingerprint(document.file_path)
@@ -0,0 +1,137 @@
+from sqlalchemy import select, func, true
+from src.main import db
+from src.models.models import Project, Document, Estimate, Proposal
+
+def get_rollup_columns():
+    """
+    Build the per-project rollups as subqueries correlated to the outer project row
+
+    Each subquery is answered from the project_id index of its table, so the
+    cost grows with the number of projects returned, not the size of the tables.
+
+    Returns:
+        List of labeled scalar subqueries
+    """
+    def rollup(column, model, label):
+        return (select(column)
+                .where(model.project_id == Project.id)
+                .correlate(Project)
+                .scalar_subquery()
+                .label(label))
+
+    return [
+        rollup(func.count(Document.id), Document, 'document_count'),
+        rollup(func.coalesce(func.sum(Document.file_size), 0), Document, 'total_bytes'),
+        rollup(func.coalesce(func.sum(Document.page_count), 0), Document, 'total_pages'),
+        rollup(func.count(Estimate.id), Estimate, 'estimate_count'),
+        rollup(func.sum(Estimate.total_cost), Estimate, 'estimate_total_cost'),
+        rollup(func.min(Estimate.total_cost), Estimate, 'estimate_min_cost'),
+        rollup(func.max(Estimate.total_cost), Estimate, 'estimate_max_cost'),
+        rollup(func.count(Proposal.id), Proposal, 'proposal_count'),
+    ]
+
+def with_rollups(query):
+    """
+    Select the listed project columns and their rollups from a project query
+
+    Args:
+        query: Query of Project, with any filters applied
+
+    Returns:
+        Query returning rows for serialize_rollup
+    """
+    return query.with_entities(
+        Project.id,
+        Project.name,
+        Project.bid_due_date,
+        Project.sender_name,
+        Project.sender_email,
+        Project.created_at,
+        *get_rollup_columns()
+    )
+
+def serialize_rollup(row):
+    """
+    Convert a row of with_rollups to a dictionary
+
+    Args:
+        row: Result row
+
+    Returns:
+        Dictionary with the project fields and rollups
+    """
+    return {
+        'id': row.id,
+        'name': row.name,
+        'bid_due_date': row.bid_due_date.isoformat() if row.bid_due_date else None,
+        'sender_name': row.sender_name,
+        'sender_email': row.sender_email,
+        'created_at': row.created_at.isoformat(),
+        'document_count': row.document_count,
+        'total_bytes': row.total_bytes,
+        'total_pages': row.total_pages,
+        'estimate_count': row.estimate_count,
+        'estimate_total_cost': row.estimate_total_cost,
+        'estimate_min_cost': row.estimate_min_cost,
+        'estimate_max_cost': row.estimate_max_cost,
+        'proposal_count': row.proposal_count
+    }
+
+def summarize_project(project_id):
+    """
+    Summarize a project's documents, estimates and proposals in a single query
+
+    Documents are grouped by type in a subquery joined to the project row,
+    so the result has one row per document type (or one row for a project
+    without documents) that also carries the project-wide rollups.
+
+    Args:
+        project_id: ID of the project
+
+    Returns:
+        Dictionary with the project, its rollups and the documents by type,
+        or None if the project doesn't exist
+    """
+    document_type = func.coalesce(Document.document_type, 'other')
+    by_type = (select(
+                   document_type.label('document_type'),
+                   func.count(Document.id).label('type_count'),
+                   func.coalesce(func.sum(Document.file_size), 0).label('type_bytes'),
+                   func.coalesce(func.sum(Document.page_count), 0).label('type_pages'))
+               .where(Document.project_id == project_id)
+               .group_by(document_type)
+               .subquery())
+
+    rows = db.session.execute(
+        select(Project, by_type, *get_rollup_columns())
+        .outerjoin(by_type, true())
+        .where(Project.id == project_id)
+    ).all()
+    if not rows:
+        return None
+
+    first = rows[0]
+    summary = first.Project.to_dict()
+    summary.update({
+        'document_counts': {},
+        'document_types': {},
+        'total_bytes': first.total_bytes,
+        'total_pages': first.total_pages,
+        'estimate_count': first.estimate_count,
+        'estimate_total_cost': first.estimate_total_cost,
+        'estimate_min_cost': first.estimate_min_cost,
+        'estimate_max_cost': first.estimate_max_cost,
+        'proposal_count': first.proposal_count
+    })
+
+    for row in rows:
+        if row.document_type is None:
+            continue
+        summary['document_counts'][row.document_type] = row.type_count
+        summary['document_types'][row.document_type] = {
+            'count': row.type_count,
+            'total_bytes': row.type_bytes,
+            'total_pages': row.type_pages
+        }
+
+    return summary
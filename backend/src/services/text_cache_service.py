@@ -0,0 +1,264 @@
+import datetime
+from src.main import app, db
+from src.models.models import DocumentText, DocumentPage
+from src.services.pdf_service import extract_pages_from_pdf, iter_pdf_pages, get_pdf_page_count
+from src.services.storage_service import get_document_path, get_document_fingerprint
+
+# Only refresh the last access time of a cache entry this often to avoid a write on every read
+ACCESS_TIME_RESOLUTION = datetime.timedelta(minutes=1)
+
+def get_document_text(document):
+    """
+    Get the extracted text of a document, using the text cache when possible
+
+    Args:
+        document: Document record
+
+    Returns:
+        Extracted text content
+    """
+    fingerprint = get_document_fingerprint(document)
+    if fingerprint is None:
+        return ""
+
+    entry = DocumentText.query.filter_by(document_id=document.id).first()
+    if entry and entry.fingerprint == fingerprint:
+        now = datetime.datetime.utcnow()
+        if not entry.last_accessed_at or now - entry.last_accessed_at > ACCESS_TIME_RESOLUTION:
+            entry.last_accessed_at = now
+            db.session.commit()
+        return entry.text or ""
+
+    return cache_document_text(document, fingerprint)
+
+def cache_document_text(document, fingerprint=None):
+    """
+    Extract the text of a document and store it in the text cache
+
+    Args:
+        document: Document record
+        fingerprint: Fingerprint of the file, computed if not provided
+
+    Returns:
+        Extracted text content
+    """
+    fingerprint = fingerprint or get_document_fingerprint(document)
+    if fingerprint is None:
+        return ""
+
+    # Build the full text from the page store so both caches are filled by a single parse
+    pages = get_document_pages(document, fingerprint=fingerprint)
+    text = "".join(page.text or '' for page in pages)
+
+    # Don't cache failed extractions so they are retried on the next access
+    if not text:
+        return text
+
+    entry = DocumentText.query.filter_by(document_id=document.id).first()
+    if not entry:
+        entry = DocumentText(document_id=document.id)
+        db.session.add(entry)
+
+    entry.fingerprint = fingerprint
+    entry.text = text
+    entry.text_size = len(text.encode('utf-8'))
+    entry.last_accessed_at = datetime.datetime.utcnow()
+    db.session.commit()
+
+    evict_text_cache()
+
+    return text
+
+def _drop_stale_pages(document, fingerprint):
+    """Drop pages extracted from an older version of the file"""
+    stale_query = DocumentPage.query.filter(
+        DocumentPage.document_id == document.id,
+        DocumentPage.fingerprint != fingerprint
+    )
+
+    # Look before deleting: a DELETE opens a write transaction even when it
+    # matches nothing, which would hold the database write lock while the
+    # caller extracts or streams pages
+    if stale_query.with_entities(DocumentPage.id).first() is None:
+        return
+
+    stale_query.delete()
+    document.page_count = None
+    db.session.commit()
+
+def store_document_pages(document, page_count, extracted, fingerprint):
+    """
+    Store already extracted page text in the page store, which also updates the search index
+
+    Args:
+        document: Document record
+        page_count: Total number of pages in the document
+        extracted: Dictionary mapping page number to page text
+        fingerprint: Fingerprint of the file the text was extracted from
+
+    Returns:
+        List of newly stored DocumentPage records
+    """
+    _drop_stale_pages(document, fingerprint)
+
+    stored = {n for (n,) in db.session.query(DocumentPage.page_number).filter_by(document_id=document.id)}
+
+    new_pages = []
+    for page_number, text in sorted(extracted.items()):
+        if page_number in stored:
+            continue
+        page = DocumentPage(document_id=document.id, page_number=page_number, fingerprint=fingerprint, text=text)
+        db.session.add(page)
+        new_pages.append(page)
+
+    document.page_count = page_count
+    db.session.commit()
+
+    return new_pages
+
+def get_document_pages(document, start_page=1, end_page=None, fingerprint=None):
+    """
+    Get the extracted text of a range of document pages, extracting missing pages lazily
+
+    Args:
+        document: Document record
+        start_page: First page to return (1-based)
+        end_page: Last page to return, defaults to the last page of the document
+        fingerprint: Fingerprint of the file, computed if not provided
+
+    Returns:
+        List of DocumentPage records ordered by page number
+    """
+    fingerprint = fingerprint or get_document_fingerprint(document)
+    if fingerprint is None:
+        return []
+
+    _drop_stale_pages(document, fingerprint)
+
+    query = DocumentPage.query.filter(
+        DocumentPage.document_id == document.id,
+        DocumentPage.page_number >= start_page
+    )
+    if end_page is not None:
+        query = query.filter(DocumentPage.page_number <= end_page)
+    pages = query.order_by(DocumentPage.page_number).all()
+
+    # Work out which pages still need extracting; None means all of them
+    # because the page count is not known yet
+    last_page = end_page
+    if document.page_count is not None:
+        last_page = document.page_count if end_page is None else min(end_page, document.page_count)
+
+    missing = None
+    if last_page is not None:
+        stored = {page.page_number for page in pages}
+        missing = [n for n in range(start_page, last_page + 1) if n not in stored]
+        if not missing:
+            return pages
+
+    file_path = get_document_path(document)
+    if file_path is None:
+        return pages
+
+    page_count, extracted = extract_pages_from_pdf(file_path, missing)
+    if not page_count:
+        return pages
+
+    new_pages = store_document_pages(document, page_count, extracted, fingerprint)
+    pages.extend(page for page in new_pages
+                 if page.page_number >= start_page and (end_page is None or page.page_number <= end_page))
+
+    pages.sort(key=lambda page: page.page_number)
+    return pages
+
+def iter_document_pages(document, start_page=1, batch_size=50):
+    """
+    Iterate over the text of document pages without holding the whole document in memory
+
+    Pages come from the page store when it is complete. Otherwise they are
+    extracted one at a time from the PDF and stored in batches as they go.
+
+    Args:
+        document: Document record
+        start_page: First page to return (1-based)
+        batch_size: Number of pages loaded or stored per database round trip
+
+    Yields:
+        Tuples of (page number, page text)
+    """
+    fingerprint = get_document_fingerprint(document)
+    if fingerprint is None:
+        return
+
+    _drop_stale_pages(document, fingerprint)
+
+    stored_query = DocumentPage.query.filter(
+        DocumentPage.document_id == document.id,
+        DocumentPage.page_number >= start_page
+    )
+
+    if document.page_count is not None and stored_query.count() >= document.page_count - start_page + 1:
+        for page in stored_query.order_by(DocumentPage.page_number).yield_per(batch_size):
+            yield page.page_number, page.text or ''
+        return
+
+    file_path = get_document_path(document)
+    if file_path is None:
+        return
+
+    stored = {n for (n,) in db.session.query(DocumentPage.page_number).filter_by(document_id=document.id)}
+    page_count = get_pdf_page_count(file_path)
+
+    batch = {}
+    for page_number, text in iter_pdf_pages(file_path, start_page):
+        yield page_number, text
+
+        if page_number not in stored:
+            batch[page_number] = text
+        if len(batch) >= batch_size:
+            store_document_pages(document, page_count, batch, fingerprint)
+            batch = {}
+
+    if batch:
+        store_document_pages(document, page_count, batch, fingerprint)
+
+def invalidate_document_text(document_id):
+    """
+    Remove the cached text and pages of a document
+
+    Args:
+        document_id: ID of the document
+    """
+    DocumentText.query.filter_by(document_id=document_id).delete()
+    DocumentPage.query.filter_by(document_id=document_id).delete()
+    db.session.commit()
+
+def evict_text_cache(max_bytes=None):
+    """
+    Evict least recently used entries until the text cache fits its size budget
+
+    Args:
+        max_bytes: Maximum total size of cached text, defaults to the TEXT_CACHE_MAX_BYTES setting
+
+    Returns:
+        Number of evicted entries
+    """
+    if max_bytes is None:
+        max_bytes = app.config['TEXT_CACHE_MAX_BYTES']
+
+    total_size = db.session.query(db.func.coalesce(db.func.sum(DocumentText.text_size), 0)).scalar()
+    if total_size <= max_bytes:
+        return 0
+
+    evicted = 0
+    entries = db.session.query(DocumentText.id, DocumentText.text_size).order_by(DocumentText.last_accessed_at.asc())
+    for entry_id, text_size in entries.all():
+        if total_size <= max_bytes:
+            break
+        DocumentText.query.filter_by(id=entry_id).delete()
+        total_size -= text_size or 0
+        evicted += 1
+
+    db.session.commit()
+
+    return evicted
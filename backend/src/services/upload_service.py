@@ -0,0 +1,222 @@
+import datetime
+import math
+import os
+import shutil
+import uuid
+from sqlalchemy import update
+from src.main import app, db
+from src.models.models import UploadSession
+from src.services.document_service import register_document
+from src.services.blob_service import new_staging_path, store_blob_from_file, release_blob
+from src.services.ingest_service import enqueue_document
+from src.services.storage_service import get_storage_dir
+from src.utils.file_utils import save_stream, concatenate_files, is_pdf_file
+
+def _get_upload_dir(upload_id):
+    """Directory on local disk holding the chunks of an upload in progress"""
+    return os.path.join(get_storage_dir('uploads'), upload_id)
+
+def _get_chunk_path(upload_id, chunk_index):
+    return os.path.join(_get_upload_dir(upload_id), f"{chunk_index:06d}.chunk")
+
+def create_upload_session(project_id, filename, total_size, chunk_size=None, document_type=None):
+    """
+    Start a resumable upload
+
+    Args:
+        project_id: Project ID the document will belong to
+        filename: Original name of the file
+        total_size: Size of the complete file in bytes
+        chunk_size: Size of every chunk except the last, defaults to UPLOAD_CHUNK_SIZE
+        document_type: Document type, derived from the filename if not provided
+
+    Returns:
+        The new UploadSession record
+    """
+    chunk_size = chunk_size or app.config['UPLOAD_CHUNK_SIZE']
+
+    upload = UploadSession(
+        id=uuid.uuid4().hex,
+        project_id=project_id,
+        filename=os.path.basename(filename),
+        document_type=document_type,
+        total_size=total_size,
+        chunk_size=chunk_size,
+        total_chunks=math.ceil(total_size / chunk_size),
+        status='open'
+    )
+    db.session.add(upload)
+    db.session.commit()
+
+    os.makedirs(_get_upload_dir(upload.id), exist_ok=True)
+
+    # Clean up after clients that gave up on their uploads
+    expire_upload_sessions()
+
+    return upload
+
+def get_received_chunks(upload):
+    """
+    List the chunks of an upload that are completely staged
+
+    Args:
+        upload: UploadSession record
+
+    Returns:
+        Sorted list of chunk indexes
+    """
+    staging_dir = _get_upload_dir(upload.id)
+    if not os.path.isdir(staging_dir):
+        return []
+
+    # Chunks are renamed into place when complete, so partial writes never match
+    return sorted(int(name.split('.')[0]) for name in os.listdir(staging_dir) if name.endswith('.chunk'))
+
+def save_chunk(upload, chunk_index, stream, expected_sha256=None):
+    """
+    Stage one chunk of an upload. Chunks may arrive in any order and in parallel,
+    and re-sending a chunk replaces it.
+
+    Args:
+        upload: UploadSession record
+        chunk_index: 0-based index of the chunk
+        stream: Readable binary stream with the chunk data
+        expected_sha256: Optional SHA-256 hex digest the chunk must match
+
+    Returns:
+        Dictionary with the chunk index, size and SHA-256, or an error
+    """
+    if chunk_index == upload.total_chunks - 1:
+        expected_size = upload.total_size - upload.chunk_size * (upload.total_chunks - 1)
+    else:
+        expected_size = upload.chunk_size
+
+    chunk_path = _get_chunk_path(upload.id, chunk_index)
+    try:
+        # Reads at most one byte more than expected, so an oversized chunk can't fill the disk
+        size, sha256 = save_stream(stream, chunk_path, max_bytes=expected_size)
+    except ValueError:
+        return {'error': f'Chunk {chunk_index} must be {expected_size} bytes, got more'}
+
+    if size != expected_size:
+        os.remove(chunk_path)
+        return {'error': f'Chunk {chunk_index} must be {expected_size} bytes, got {size}'}
+
+    if expected_sha256 and expected_sha256.lower() != sha256:
+        os.remove(chunk_path)
+        return {'error': f'Chunk {chunk_index} does not match the expected SHA-256'}
+
+    return {'chunk': chunk_index, 'size': size, 'sha256': sha256}
+
+def complete_upload(upload):
+    """
+    Assemble the staged chunks into the blob store and register the document
+
+    Args:
+        upload: UploadSession record
+
+    Returns:
+        The new Document record, or a dictionary with an error and the missing chunk indexes
+    """
+    received = set(get_received_chunks(upload))
+    missing = [index for index in range(upload.total_chunks) if index not in received]
+    if missing:
+        return {'error': f'{len(missing)} chunks have not been uploaded', 'missing_chunks': missing}
+
+    # Claimed with a conditional update, so of two concurrent requests
+    # completing the same upload only one creates the document
+    claimed = db.session.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload.id, UploadSession.status == 'open')
+        .values(status='assembling', updated_at=datetime.datetime.utcnow())
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return {'error': f'Upload {upload.id} is already being completed'}
+
+    # Any failure reopens the upload so it can be completed again or cancelled
+    staging_path = new_staging_path()
+    content_hash = None
+    stored = False
+    try:
+        chunk_paths = [_get_chunk_path(upload.id, index) for index in range(upload.total_chunks)]
+        file_size, content_hash = concatenate_files(chunk_paths, staging_path)
+
+        blob = store_blob_from_file(staging_path, file_size, content_hash)
+        stored = True
+
+        # The document is committed together with the completed upload
+        document = register_document(
+            upload.project_id,
+            upload.filename,
+            blob,
+            document_type=upload.document_type,
+            commit=False
+        )
+        upload.status = 'completed'
+        upload.document_id = document.id
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+        if stored:
+            # Drop the blob reference taken for the document that was never registered
+            release_blob(content_hash)
+        upload.status = 'open'
+        db.session.commit()
+        raise
+
+    shutil.rmtree(_get_upload_dir(upload.id), ignore_errors=True)
+
+    if is_pdf_file(upload.filename):
+        enqueue_document(document)
+
+    return document
+
+def abort_upload(upload):
+    """
+    Discard an upload and its staged chunks
+
+    Args:
+        upload: UploadSession record
+    """
+    shutil.rmtree(_get_upload_dir(upload.id), ignore_errors=True)
+    db.session.delete(upload)
+    db.session.commit()
+
+def expire_upload_sessions(max_age=None):
+    """
+    Discard uploads that have seen no activity for longer than their time to live
+
+    Activity is the last change of the session or the last chunk staged,
+    whichever is later. Completed uploads keep their record.
+
+    Args:
+        max_age: Seconds without activity after which an upload expires,
+            defaults to the UPLOAD_SESSION_TTL setting
+
+    Returns:
+        Number of expired uploads
+    """
+    if max_age is None:
+        max_age = app.config['UPLOAD_SESSION_TTL']
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=max_age)
+
+    expired = 0
+    stale = UploadSession.query.filter(
+        UploadSession.status.in_(['open', 'assembling']),
+        UploadSession.updated_at < cutoff
+    ).all()
+    for upload in stale:
+        # Staging a chunk renames it into the upload directory, which updates its modification time
+        upload_dir = _get_upload_dir(upload.id)
+        if os.path.isdir(upload_dir) and datetime.datetime.utcfromtimestamp(os.path.getmtime(upload_dir)) >= cutoff:
+            continue
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        db.session.delete(upload)
+        expired += 1
+
+    db.session.commit()
+
+    return expired
@@ -0,0 +1,96 @@
+import contextlib
+import threading
+from flask import g, has_request_context
+from flask_migrate import stamp, upgrade
+from sqlalchemy import event, inspect
+from src.main import db
+
+# Migration matching the original schema, before any table or column was added
+BASELINE_REVISION = '0c748d82ee86'
+
+def upgrade_database():
+    """
+    Bring the database schema up to date by applying pending migrations
+
+    Databases created by db.create_all before migrations existed are
+    stamped with the baseline revision first. The later migrations only add
+    the tables and columns such a database is missing, so they apply to it
+    whichever version of the app created it. Must be called inside an
+    application context.
+    """
+    tables = inspect(db.engine).get_table_names()
+    if tables and 'alembic_version' not in tables:
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+
+def begin_write_batch():
+    """
+    Commit the session and start a write transaction for a batch of inserts
+
+    On SQLite the transaction is opened with BEGIN IMMEDIATE, so the write
+    lock is taken up front (waiting for other writers instead of failing
+    midway) and savepoints nest inside one transaction that is committed
+    once for the whole batch.
+    """
+    db.session.commit()
+    if db.engine.dialect.name == 'sqlite':
+        db.session.connection(execution_options={'sqlite_begin': 'BEGIN IMMEDIATE'})
+
+@contextlib.contextmanager
+def count_queries():
+    """
+    Record the SQL statements the current thread executes inside the block
+
+    Statements run by background threads (ingest, email polling) are not
+    counted, so the result only reflects the code under measurement.
+
+    Yields:
+        List that receives each executed statement
+    """
+    statements = []
+    thread_id = threading.get_ident()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread_id:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+@contextlib.contextmanager
+def assert_max_queries(max_queries):
+    """
+    Fail if the block executes more than max_queries SQL statements
+
+    Meant for tests guarding against N+1 loading, e.g. that listing projects
+    costs the same number of queries for 5 or 5,000 rows.
+
+    Args:
+        max_queries: Maximum number of statements allowed
+    """
+    with count_queries() as statements:
+        yield statements
+    if len(statements) > max_queries:
+        raise AssertionError(f"{len(statements)} queries executed, expected at most {max_queries}:\n" + '\n'.join(statements))
+
+def init_query_count_header(app):
+    """
+    Report the number of SQL statements each request executed in an X-Query-Count header
+
+    Args:
+        app: Flask application
+    """
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g.query_count = g.get('query_count', 0) + 1
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    @app.after_request
+    def add_query_count_header(response):
+        response.headers['X-Query-Count'] = str(g.get('query_count', 0))
+        return response
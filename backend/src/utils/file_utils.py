@@ -1,28 +1,178 @@
 import os
+import base64
+import hashlib
+import tempfile
 
-def save_attachment(file_data, project_id, filename):
+def save_stream(stream, file_path, chunk_size=1024 * 1024, max_bytes=None):
     """
-    Save an attachment to the file system
+    Copy a binary stream to a file in fixed-size chunks
+    
+    The data is written to a temporary file next to the destination and
+    renamed into place once complete, so readers never see a partial file.
+    Size and SHA-256 are computed in the same pass.
     
     Args:
-        file_data: Binary file data
-        project_id: Project ID to associate the file with
-        filename: Name of the file
+        stream: Readable binary stream
+        file_path: Destination path
+        chunk_size: Number of bytes copied at a time
+        max_bytes: Optional limit on the size; at most one byte more is read
+        
+    Returns:
+        Tuple of (size in bytes, SHA-256 hex digest)
+        
+    Raises:
+        ValueError: If the stream holds more than max_bytes
+    """
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                # Never read past the limit, so an oversized stream is not consumed
+                read_size = chunk_size if max_bytes is None else min(chunk_size, max_bytes + 1 - size)
+                chunk = stream.read(read_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise ValueError(f'Data exceeds the limit of {max_bytes} bytes')
+                f.write(chunk)
+                digest.update(chunk)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    return size, digest.hexdigest()
+
+def save_base64_stream(chunks, file_path, max_bytes=None):
+    """
+    Decode base64 or base64url text to a file as it arrives
+    
+    Only a few bytes of undecoded text are held back between chunks, so
+    memory use does not depend on the file size. Size and SHA-256 of the
+    decoded data are computed in the same pass.
+    
+    Args:
+        chunks: Iterable of encoded text chunks (bytes)
+        file_path: Destination path
+        max_bytes: Optional limit on the decoded size
+        
+    Returns:
+        Tuple of (size in bytes, SHA-256 hex digest)
+        
+    Raises:
+        ValueError: If the decoded data exceeds max_bytes
+    """
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    
+    digest = hashlib.sha256()
+    size = 0
+    pending = b''
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            def write(encoded):
+                nonlocal size
+                # Accepts both the standard and the URL-safe alphabet
+                data = base64.urlsafe_b64decode(encoded)
+                size += len(data)
+                if max_bytes is not None and size > max_bytes:
+                    raise ValueError(f'Decoded data exceeds the limit of {max_bytes} bytes')
+                f.write(data)
+                digest.update(data)
+            
+            for chunk in chunks:
+                pending += chunk
+                # Decode whole 4-character groups and keep the rest for the next chunk
+                usable = len(pending) - len(pending) % 4
+                if usable:
+                    write(pending[:usable])
+                    pending = pending[usable:]
+            
+            if pending:
+                write(pending + b'=' * (-len(pending) % 4))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    return size, digest.hexdigest()
+
+def concatenate_files(source_paths, file_path, chunk_size=1024 * 1024):
+    """
+    Concatenate files into a new file without loading them into memory
+    
+    Args:
+        source_paths: Paths of the files to join, in order
+        file_path: Destination path
+        chunk_size: Number of bytes copied at a time
         
     Returns:
-        Path to the saved file
+        Tuple of (size in bytes, SHA-256 hex digest) of the joined file
     """
-    # Create storage directory for this project
-    storage_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                              'storage', 'projects', str(project_id))
-    os.makedirs(storage_dir, exist_ok=True)
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for source_path in source_paths:
+                with open(source_path, 'rb') as source:
+                    for chunk in iter(lambda: source.read(chunk_size), b''):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
     
-    # Save file
-    file_path = os.path.join(storage_dir, filename)
-    with open(file_path, 'wb') as f:
-        f.write(file_data)
+    return size, digest.hexdigest()
+
+def get_file_fingerprint(file_path):
+    """
+    Build a cheap fingerprint identifying the current version of a file
     
-    return file_path
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Fingerprint string based on file size and modification time, or None if the file is missing
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+def compute_file_hash(file_path, chunk_size=1024 * 1024):
+    """
+    Compute the SHA-256 hash of a file without loading it into memory
+    
+    Args:
+        file_path: Path to the file
+        chunk_size: Number of bytes read at a time
+        
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 def get_file_extension(filename):
     """
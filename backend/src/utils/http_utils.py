@@ -0,0 +1,86 @@
+import os
+import secrets
+from flask import Response
+
+# Requests asking for more ranges than this are served the full file instead
+MAX_BYTE_RANGES = 50
+
+def resolve_byte_ranges(byte_range, complete_length):
+    """
+    Convert a parsed Range header into absolute byte ranges
+
+    Args:
+        byte_range: werkzeug Range object from request.range
+        complete_length: Size of the resource in bytes
+
+    Returns:
+        List of (start, stop) tuples with an exclusive stop, sorted and with
+        overlapping ranges merged. Unsatisfiable ranges are dropped.
+    """
+    resolved = []
+    for start, stop in byte_range.ranges:
+        if start < 0:
+            # Suffix range, e.g. "bytes=-500"
+            start = max(complete_length + start, 0)
+            stop = complete_length
+        elif stop is None or stop > complete_length:
+            stop = complete_length
+
+        if start < stop:
+            resolved.append((start, stop))
+
+    merged = []
+    for start, stop in sorted(resolved):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+
+    return merged
+
+def send_file_ranges(file_path, ranges, mimetype, chunk_size=64 * 1024):
+    """
+    Build a 206 multipart/byteranges response streaming several ranges of a file
+
+    Args:
+        file_path: Path to the file
+        ranges: List of (start, stop) tuples as returned by resolve_byte_ranges
+        mimetype: Content type of the file
+        chunk_size: Number of bytes read at a time
+
+    Returns:
+        Streaming Flask response
+    """
+    complete_length = os.path.getsize(file_path)
+    boundary = secrets.token_hex(16)
+
+    part_headers = [
+        (f"--{boundary}\r\nContent-Type: {mimetype}\r\n"
+         f"Content-Range: bytes {start}-{stop - 1}/{complete_length}\r\n\r\n").encode('ascii')
+        for start, stop in ranges
+    ]
+    closing = f"--{boundary}--\r\n".encode('ascii')
+
+    content_length = len(closing) + sum(
+        len(header) + (stop - start) + 2 for header, (start, stop) in zip(part_headers, ranges)
+    )
+
+    def generate():
+        with open(file_path, 'rb') as f:
+            for header, (start, stop) in zip(part_headers, ranges):
+                yield header
+                f.seek(start)
+                remaining = stop - start
+                while remaining > 0:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+                yield b"\r\n"
+        yield closing
+
+    response = Response(generate(), status=206, mimetype=f'multipart/byteranges; boundary={boundary}')
+    response.content_length = content_length
+    response.accept_ranges = 'bytes'
+    return response
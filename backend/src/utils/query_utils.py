@@ -0,0 +1,154 @@
+import base64
+import datetime
+import json
+from sqlalchemy import and_, or_
+
+# Rows per page of list endpoints when no limit is given, and the most a client may ask for
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(created_at, row_id):
+    """
+    Encode the position after a row as an opaque cursor
+
+    Args:
+        created_at: Creation time of the last row on the page
+        row_id: ID of the last row on the page, breaks ties between equal times
+
+    Returns:
+        URL-safe cursor string
+    """
+    data = json.dumps([created_at.isoformat(), row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by encode_cursor
+
+    Args:
+        cursor: Cursor string from a previous page
+
+    Returns:
+        Tuple of (created_at, row_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(data)
+        return datetime.datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def parse_page_size(value):
+    """
+    Parse the limit parameter of a list request
+
+    Args:
+        value: Requested page size, or None for the default
+
+    Returns:
+        Page size between 1 and MAX_PAGE_SIZE
+    """
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(value, MAX_PAGE_SIZE))
+
+def parse_fields(value, allowed):
+    """
+    Parse a comma-separated fields parameter
+
+    Args:
+        value: Value of the fields parameter, or None for all fields
+        allowed: Names of the fields that may be selected
+
+    Returns:
+        List of field names, or None if all fields were requested
+
+    Raises:
+        ValueError: If a field is not allowed
+    """
+    if not value:
+        return None
+
+    fields = list(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields or None
+
+def page_query(query, model, cursor=None, limit=DEFAULT_PAGE_SIZE, fields=None):
+    """
+    Build the query for one page of a list, newest first, without running it
+
+    One row more than the limit is selected, so the caller can tell whether
+    another page follows.
+
+    Args:
+        query: Query of the model, with any filters applied
+        model: Model class with created_at and id columns
+        cursor: Cursor returned with the previous page, or None for the first page
+        limit: Maximum number of rows on the page
+        fields: Names of model attributes to select, or None for full model objects
+
+    Returns:
+        Query for the page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+
+    if fields:
+        # The sort columns are always selected so the next cursor can be built
+        names = list(dict.fromkeys(['created_at', 'id'] + fields))
+        query = query.with_entities(*[getattr(model, name) for name in names])
+
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+def paginate(query, model, cursor=None, limit=DEFAULT_PAGE_SIZE, fields=None):
+    """
+    Get one page of a query, newest first, by keyset pagination on (created_at, id)
+
+    Rows after the cursor are found with a range condition instead of an
+    OFFSET, so every page costs the same however deep into the list it is.
+    With fields, only those columns are selected and no model objects are
+    built.
+
+    Args:
+        query: Query of the model, with any filters applied
+        model: Model class with created_at and id columns
+        cursor: Cursor returned with the previous page, or None for the first page
+        limit: Maximum number of rows on the page
+        fields: Names of model attributes to return, or None for full model objects
+
+    Returns:
+        Tuple of (rows, cursor of the next page or None on the last page). Rows
+        are model objects, or dictionaries of the requested fields.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    rows = page_query(query, model, cursor=cursor, limit=limit, fields=fields).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    if fields:
+        rows = [{field: _to_json(getattr(row, field)) for field in fields} for row in rows]
+
+    return rows, next_cursor
+
+def _to_json(value):
+    # Dates are serialized the same way as in the to_dict methods of the models
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
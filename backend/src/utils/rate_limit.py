@@ -0,0 +1,51 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+
+    Tokens refill continuously at a fixed rate up to the bucket capacity,
+    so short bursts are allowed while the long-run rate stays bounded.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of stored tokens, defaults to one second's worth
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens from the bucket, waiting until enough are available
+
+        Requests for more tokens than the capacity wait until the bucket is
+        full and then drive it negative, so they are delayed but never stuck.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= min(tokens, self.capacity):
+                    self._tokens -= tokens
+                    return waited
+                delay = (min(tokens, self.capacity) - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# The app reads its settings when src.main is imported, so point it at a
+# throwaway database and storage root first
+_work_dir = tempfile.mkdtemp(prefix='bid-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_work_dir, 'test.db')
+os.environ['STORAGE_ROOT'] = os.path.join(_work_dir, 'storage')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import app as flask_app, db
+
+
+@pytest.fixture
+def app():
+    """Application context with empty tables, dropped again after the test"""
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,78 @@
+import base64
+import hashlib
+import json
+import os
+import pytest
+
+from src.services.email_service import _iter_json_string
+from src.utils.file_utils import save_base64_stream
+
+DATA = bytes(range(256)) * 3 + b'\xfb\xff\xfe'
+
+
+def split(text, size):
+    """Split bytes into chunks of the given size"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def decode(chunks, tmp_path, **kwargs):
+    """Run chunks through save_base64_stream, returning the written bytes with the size and hash"""
+    path = str(tmp_path / 'attachment.bin')
+    size, content_hash = save_base64_stream(chunks, path, **kwargs)
+    with open(path, 'rb') as f:
+        return f.read(), size, content_hash
+
+
+@pytest.mark.parametrize('size', range(1, 12))
+def test_escapes_split_across_chunks(tmp_path, size):
+    # Standard base64 with every slash escaped, as some JSON encoders write it
+    encoded = base64.b64encode(DATA).decode()
+    body = ('{"size": %d, "data": "%s"}' % (len(DATA), encoded.replace('/', '\\/'))).encode()
+    assert b'\\/' in body
+
+    data, decoded_size, content_hash = decode(_iter_json_string(split(body, size), b'data'), tmp_path)
+
+    assert data == DATA == base64.urlsafe_b64decode(encoded)
+    assert decoded_size == len(DATA)
+    assert content_hash == hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 7])
+def test_unicode_escapes_split_across_chunks(size):
+    body = json.dumps({'data': 'ab+/=\n'}, ensure_ascii=True).replace('+', '\\u002b').encode()
+
+    assert b''.join(_iter_json_string(split(body, size), b'data')) == b'ab+/=\n'
+
+
+def test_missing_or_unterminated_field():
+    with pytest.raises(ValueError):
+        list(_iter_json_string([b'{"size": 0}'], b'data'))
+    with pytest.raises(ValueError):
+        list(_iter_json_string([b'{"data": "QUJD'], b'data'))
+    with pytest.raises(ValueError):
+        list(_iter_json_string([b'{"data": "QU\\x"}'], b'data'))
+
+
+@pytest.mark.parametrize('length', range(6))
+@pytest.mark.parametrize('padded', [True, False])
+def test_url_safe_alphabet_and_padding(tmp_path, length, padded):
+    # Bytes chosen so the encoding uses the '-' and '_' characters
+    raw = (b'\xfb\xff\xbf' * 2)[:length]
+    encoded = base64.urlsafe_b64encode(raw)
+    if not padded:
+        encoded = encoded.rstrip(b'=')
+    assert length < 2 or set(encoded) & set(b'-_')
+
+    for size in range(1, 5):
+        data, decoded_size, _ = decode(split(encoded, size), tmp_path)
+        assert data == base64.urlsafe_b64decode(encoded + b'=' * (-len(encoded) % 4)) == raw
+        assert decoded_size == length
+
+
+def test_limit_leaves_no_file(tmp_path):
+    encoded = base64.urlsafe_b64encode(DATA)
+
+    with pytest.raises(ValueError):
+        decode(split(encoded, 64), tmp_path, max_bytes=len(DATA) - 1)
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,146 @@
+import hashlib
+import pytest
+
+from src.main import db
+from src.models.models import Project, Document
+from src.services.storage_service import get_sharded_key, store_file
+from src.utils.http_utils import MAX_BYTE_RANGES
+
+DATA = bytes(range(256)) * 8
+
+
+@pytest.fixture
+def document(app, tmp_path):
+    """Stored document whose content is DATA"""
+    content_hash = hashlib.sha256(DATA).hexdigest()
+    path = str(tmp_path / f'{content_hash}.part')
+    with open(path, 'wb') as f:
+        f.write(DATA)
+    key = get_sharded_key('blobs', content_hash)
+    store_file(path, key)
+
+    project = Project(name='Tower')
+    db.session.add(project)
+    db.session.flush()
+    document = Document(project_id=project.id, filename='spec.pdf', file_path=key, file_size=len(DATA),
+                        content_hash=content_hash, mime_type='application/pdf')
+    db.session.add(document)
+    db.session.commit()
+    return document
+
+
+def download(client, document, **headers):
+    return client.get(f'/api/documents/{document.id}/download', headers=headers)
+
+
+def parse_byteranges(response):
+    """Split a multipart/byteranges body into (Content-Range, data) tuples"""
+    boundary = response.mimetype_params['boundary'].encode()
+    body = response.get_data()
+    assert body.endswith(b'--' + boundary + b'--\r\n')
+    assert len(body) == response.content_length
+
+    parts = []
+    for part in body.split(b'--' + boundary)[1:-1]:
+        headers, data = part[2:-2].split(b'\r\n\r\n', 1)
+        header_lines = dict(line.split(b': ', 1) for line in headers.split(b'\r\n'))
+        assert header_lines[b'Content-Type'] == b'application/pdf'
+        parts.append((header_lines[b'Content-Range'].decode(), data))
+    return parts
+
+
+def test_full_download(client, document):
+    response = download(client, document)
+
+    assert response.status_code == 200
+    assert response.data == DATA
+    assert response.headers['ETag'] == f'"{document.content_hash}"'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+
+def test_single_range(client, document):
+    response = download(client, document, Range='bytes=10-19')
+
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 10-19/{len(DATA)}'
+    assert response.data == DATA[10:20]
+
+
+def test_suffix_range(client, document):
+    response = download(client, document, Range='bytes=-100')
+
+    assert response.status_code == 206
+    assert response.data == DATA[-100:]
+
+
+def test_multiple_ranges(client, document):
+    response = download(client, document, Range='bytes=0-9,100-149,-5')
+
+    assert response.status_code == 206
+    assert response.mimetype == 'multipart/byteranges'
+    assert response.headers['ETag'] == f'"{document.content_hash}"'
+    assert parse_byteranges(response) == [
+        (f'bytes 0-9/{len(DATA)}', DATA[0:10]),
+        (f'bytes 100-149/{len(DATA)}', DATA[100:150]),
+        (f'bytes {len(DATA) - 5}-{len(DATA) - 1}/{len(DATA)}', DATA[-5:]),
+    ]
+
+
+def test_adjacent_ranges_merge_into_one(client, document):
+    response = download(client, document, Range='bytes=0-99,100-149')
+
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 0-149/{len(DATA)}'
+    assert response.data == DATA[:150]
+
+
+@pytest.mark.parametrize('byte_range', [f'bytes={len(DATA)}-', f'bytes={len(DATA)}-{len(DATA) + 9},{len(DATA) + 20}-'])
+def test_unsatisfiable_range(client, document, byte_range):
+    response = download(client, document, Range=byte_range)
+
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{len(DATA)}'
+
+
+def test_too_many_ranges_are_served_in_full(client, document):
+    ranges = ','.join(f'{i * 10}-{i * 10 + 4}' for i in range(MAX_BYTE_RANGES + 1))
+    response = download(client, document, Range=f'bytes={ranges}')
+
+    assert response.status_code == 200
+    assert response.data == DATA
+
+    ranges = ','.join(f'{i * 10}-{i * 10 + 4}' for i in range(MAX_BYTE_RANGES))
+    response = download(client, document, Range=f'bytes={ranges}')
+
+    assert response.status_code == 206
+    assert len(parse_byteranges(response)) == MAX_BYTE_RANGES
+
+
+@pytest.mark.parametrize('byte_range', [None, 'bytes=0-9', 'bytes=0-9,20-29'])
+def test_if_none_match(client, document, byte_range):
+    headers = {'If-None-Match': f'"{document.content_hash}"'}
+    if byte_range:
+        headers['Range'] = byte_range
+    response = download(client, document, **headers)
+
+    assert response.status_code == 304
+    assert response.data == b''
+
+    headers['If-None-Match'] = '"other"'
+    response = download(client, document, **headers)
+
+    assert response.status_code == (206 if byte_range else 200)
+
+
+@pytest.mark.parametrize('byte_range', ['bytes=0-9', 'bytes=0-9,20-29'])
+def test_if_range(client, document, byte_range):
+    response = download(client, document, Range=byte_range, **{'If-Range': f'"{document.content_hash}"'})
+
+    assert response.status_code == 206
+    assert response.headers['ETag'] == f'"{document.content_hash}"'
+
+    # A stale validator gets the whole current file
+    response = download(client, document, Range=byte_range, **{'If-Range': '"other"'})
+
+    assert response.status_code == 200
+    assert response.data == DATA
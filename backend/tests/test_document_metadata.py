@@ -0,0 +1,46 @@
+import hashlib
+
+from src.main import db
+from src.models.models import Project, Document, DocumentPage
+from src.services.metadata_service import get_document_metadata, _get_stored_text_sample
+
+
+def add_document(file_path, content_hash=None, page_count=None, page_texts=()):
+    """Add a document, storing the given page texts under its content hash"""
+    project = Project(name='Tower')
+    db.session.add(project)
+    db.session.flush()
+    document = Document(project_id=project.id, filename='spec.pdf', file_path=file_path, content_hash=content_hash,
+                        page_count=page_count, is_encrypted=False if page_count is not None else None)
+    db.session.add(document)
+    db.session.flush()
+    db.session.add_all([
+        DocumentPage(document_id=document.id, page_number=page_number, fingerprint=content_hash, text=text)
+        for page_number, text in enumerate(page_texts, 1)
+    ])
+    db.session.commit()
+    return document
+
+
+def test_missing_file_has_an_empty_text_sample(app):
+    document = add_document('projects/1/missing.pdf', page_count=3)
+
+    assert _get_stored_text_sample(document, 100) == ''
+    assert get_document_metadata(document.id)['text_sample'] == ''
+
+    document.page_count = None
+    db.session.commit()
+
+    assert get_document_metadata(document.id)['text_sample'] == ''
+
+
+def test_text_sample_from_stored_pages(app):
+    content_hash = hashlib.sha256(b'spec').hexdigest()
+    document = add_document(f'blobs/{content_hash}', content_hash, page_count=3,
+                            page_texts=['SECTION 09 29 00\n', 'Gypsum board.\n', 'Type X.\n'])
+
+    assert _get_stored_text_sample(document, 20) == 'SECTION 09 29 00\nGyp'
+    assert _get_stored_text_sample(document, 1000) == 'SECTION 09 29 00\nGypsum board.\nType X.\n'
+
+    # Leading pages too short for the sample leave it to be read from the PDF
+    assert _get_stored_text_sample(document, 1000, max_pages=2) is None
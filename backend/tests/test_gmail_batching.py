@@ -0,0 +1,56 @@
+import json
+import re
+import httplib2
+from src.services.email_service import build_gmail_service, fetch_messages
+
+
+class FakeGmailHttp:
+    """Answers Gmail batch requests from canned messages and records every request"""
+
+    def __init__(self, message_ids):
+        self.message_ids = set(message_ids)
+        self.requests = []
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        self.requests.append(uri)
+        assert uri.endswith('/batch/gmail/v1'), f'unexpected request to {uri}'
+
+        boundary = re.search(r'boundary="?([^";]+)', headers['content-type']).group(1)
+        parts = []
+        for part in body.split('--' + boundary)[1:]:
+            if part.startswith('--'):
+                break
+            content_id = re.search(r'Content-ID: <(.+?)>', part, re.I).group(1)
+            message_id = re.search(r'GET \S*/messages/([^?/\s]+)', part).group(1)
+            if message_id in self.message_ids:
+                status, payload = '200 OK', {'id': message_id}
+            else:
+                status, payload = '404 Not Found', {'error': {'code': 404, 'message': 'Not Found'}}
+            parts.append(f'--batch_response\r\nContent-Type: application/http\r\n'
+                         f'Content-ID: <response-{content_id}>\r\n\r\n'
+                         f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n\r\n{json.dumps(payload)}\r\n')
+        parts.append('--batch_response--')
+
+        response = httplib2.Response({'status': '200', 'content-type': 'multipart/mixed; boundary=batch_response'})
+        return response, ''.join(parts).encode()
+
+
+def test_fetch_messages_sends_one_request_per_batch(app):
+    message_ids = [f'm{i:03d}' for i in range(120)]
+    http = FakeGmailHttp(message_ids)
+
+    messages, failures = fetch_messages(build_gmail_service(http=http), message_ids, batch_size=50)
+
+    assert len(http.requests) == 3
+    assert sorted(messages) == message_ids
+    assert failures == {}
+
+
+def test_fetch_messages_reports_failed_messages(app):
+    http = FakeGmailHttp(['m1', 'm3'])
+
+    messages, failures = fetch_messages(build_gmail_service(http=http), ['m1', 'm2', 'm3'], batch_size=50)
+
+    assert len(http.requests) == 1
+    assert sorted(messages) == ['m1', 'm3']
+    assert failures == {'m2': 404}
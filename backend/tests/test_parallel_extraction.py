@@ -0,0 +1,43 @@
+import fitz
+import pytest
+from src.services.ingest_service import _extract
+from src.services.pdf_service import extract_pages_from_pdf, extract_pages_parallel
+
+
+@pytest.fixture
+def spec_pdf(tmp_path):
+    """A 12-page specification with a section heading every third page"""
+    path = str(tmp_path / 'spec.pdf')
+    document = fitz.open()
+    for page_number in range(1, 13):
+        page = document.new_page()
+        if page_number % 3 == 1:
+            page.insert_text((72, 72), f'SECTION 09 {page_number:02d} 00 - FINISHES {page_number}')
+        page.insert_text((72, 100), f'Provide {page_number * 100} sq ft of gypsum board.')
+    document.save(path)
+    document.close()
+    return path
+
+
+def test_parallel_pages_match_sequential_extraction(spec_pdf):
+    page_count, pages = extract_pages_from_pdf(spec_pdf)
+
+    parallel_count, parallel_pages, stats = extract_pages_parallel(spec_pdf, workers=2, chunk_size=5)
+
+    assert stats['chunks'] == 3
+    assert parallel_count == page_count == 12
+    assert parallel_pages == pages
+
+
+def test_parallel_ingest_matches_sequential_ingest(app, spec_pdf, monkeypatch):
+    monkeypatch.setitem(app.config, 'PARALLEL_EXTRACTION_WORKERS', 2)
+
+    monkeypatch.setitem(app.config, 'PARALLEL_EXTRACTION_MIN_PAGES', 1000)
+    sequential = _extract(spec_pdf)
+
+    monkeypatch.setitem(app.config, 'PARALLEL_EXTRACTION_MIN_PAGES', 1)
+    parallel = _extract(spec_pdf)
+
+    assert len(sequential['sections']) == 4
+    for key in ('page_count', 'pages', 'sections', 'metadata'):
+        assert parallel[key] == sequential[key], key
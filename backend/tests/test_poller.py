@@ -0,0 +1,125 @@
+import datetime
+import pytest
+from types import SimpleNamespace
+
+from src.main import db
+from src.models.models import EmailCredential
+from src.services import poller_service
+from src.services.poller_service import _get_backoff, _poll_account, get_account_lock
+
+
+@pytest.fixture
+def account(app, monkeypatch):
+    """Email account with a clean poller state"""
+    monkeypatch.setattr(poller_service, '_account_stats', {})
+    monkeypatch.setattr(poller_service, '_account_locks', {})
+    account = EmailCredential(email='bids@example.com')
+    db.session.add(account)
+    db.session.commit()
+    return account
+
+
+@pytest.fixture
+def gmail(monkeypatch):
+    """Stand-in for process_emails, returning the queued results one per call"""
+    gmail = SimpleNamespace(results=[], calls=[])
+
+    def process_emails(credentials, query, max_results, account=None):
+        gmail.calls.append(account.id)
+        return gmail.results.pop(0)
+
+    monkeypatch.setattr(poller_service, 'process_emails', process_emails)
+    return gmail
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(poller_service.random, 'uniform', lambda low, high: high)
+
+
+def configure(app, monkeypatch, **settings):
+    for key, value in settings.items():
+        monkeypatch.setitem(app.config, key, value)
+
+
+def test_backoff_doubles_up_to_the_cap(app, monkeypatch):
+    configure(app, monkeypatch, EMAIL_POLL_BACKOFF_BASE=30, EMAIL_POLL_BACKOFF_MAX=200)
+
+    assert [_get_backoff(failures) for failures in range(1, 6)] == [30, 60, 120, 200, 200]
+
+
+def test_backoff_jitter_stays_within_half_the_delay(app, monkeypatch):
+    configure(app, monkeypatch, EMAIL_POLL_BACKOFF_BASE=30, EMAIL_POLL_BACKOFF_MAX=200)
+    monkeypatch.setattr(poller_service.random, 'uniform', lambda low, high: low)
+
+    assert _get_backoff(3) == 60
+    assert _get_backoff(10) == 100
+
+
+def test_transient_failures_back_off_and_success_resets(app, account, gmail, monkeypatch):
+    configure(app, monkeypatch, EMAIL_POLL_INTERVAL=60, EMAIL_POLL_BACKOFF_BASE=30, EMAIL_POLL_BACKOFF_MAX=200)
+    gmail.results.extend([
+        {'error': 'Rate limited', 'status': 429},
+        {'error': 'Rate limited', 'status': 429},
+        {'processed': 3},
+    ])
+
+    def poll():
+        _poll_account(account.id)
+        stats = dict(poller_service._account_stats[account.id])
+        return stats, (stats['next_run_at'] - stats['last_run_at']).total_seconds()
+
+    stats, delay = poll()
+    assert stats['consecutive_failures'] == 1 and stats['last_error'] == 'Rate limited'
+    assert 30 <= delay < 31
+
+    stats, delay = poll()
+    assert stats['consecutive_failures'] == 2
+    assert 60 <= delay < 61
+
+    stats, delay = poll()
+    assert stats['consecutive_failures'] == 0
+    assert stats['last_error'] is None
+    assert stats['last_success_at'] is not None
+    assert stats['runs'] == 3 and stats['processed'] == 3
+    assert 60 <= delay < 61
+
+
+def test_permanent_failure_waits_for_the_interval(app, account, gmail, monkeypatch):
+    configure(app, monkeypatch, EMAIL_POLL_INTERVAL=60, EMAIL_POLL_BACKOFF_BASE=1)
+    gmail.results.append({'error': 'Invalid credentials', 'status': 401})
+
+    _poll_account(account.id)
+
+    stats = poller_service._account_stats[account.id]
+    assert stats['consecutive_failures'] == 1
+    assert stats['next_run_at'] - stats['last_run_at'] >= datetime.timedelta(seconds=60)
+
+
+def test_exception_counts_as_failure(app, account, monkeypatch):
+    def process_emails(*args, **kwargs):
+        raise RuntimeError('Connection reset')
+
+    monkeypatch.setattr(poller_service, 'process_emails', process_emails)
+
+    _poll_account(account.id)
+
+    stats = poller_service._account_stats[account.id]
+    assert stats['consecutive_failures'] == 1
+    assert stats['last_error'] == 'Connection reset'
+    assert not get_account_lock(account.id).locked()
+
+
+def test_locked_account_is_skipped(app, account, gmail):
+    lock = get_account_lock(account.id)
+    with lock:
+        _poll_account(account.id)
+
+    assert gmail.calls == []
+    assert account.id not in poller_service._account_stats
+
+    gmail.results.append({'processed': 0})
+    _poll_account(account.id)
+
+    assert gmail.calls == [account.id]
+    assert not lock.locked()
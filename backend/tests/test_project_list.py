@@ -0,0 +1,47 @@
+from src.main import db
+from src.models.models import Project, Document, Estimate, EstimateItem
+from src.utils.db_utils import count_queries, assert_max_queries
+
+
+def add_projects(count):
+    """Add projects that each have a document and an estimate with items"""
+    for i in range(count):
+        project = Project(name=f'Project {i}', sender_email=f'gc{i}@example.com')
+        db.session.add(project)
+        db.session.flush()
+        db.session.add(Document(project_id=project.id, filename=f'spec{i}.pdf', file_path=f'spec{i}.pdf'))
+        estimate = Estimate(project_id=project.id, name=f'Estimate {i}')
+        db.session.add(estimate)
+        db.session.flush()
+        db.session.add_all([EstimateItem(estimate_id=estimate.id, description='Drywall') for _ in range(3)])
+    db.session.commit()
+
+
+def test_project_list_query_count_does_not_grow_with_projects(client):
+    add_projects(2)
+    with count_queries() as statements:
+        response = client.get('/api/projects/')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+
+    add_projects(30)
+    with assert_max_queries(len(statements)):
+        response = client.get('/api/projects/')
+    assert response.status_code == 200
+
+    projects = response.get_json()
+    assert len(projects) == 32
+    assert all(project['document_count'] == 1 for project in projects)
+
+
+def test_project_summary_query_count_does_not_grow_with_projects(client):
+    add_projects(2)
+    with count_queries() as statements:
+        response = client.get('/api/projects/summary')
+    assert response.status_code == 200
+
+    add_projects(30)
+    with assert_max_queries(len(statements)):
+        response = client.get('/api/projects/summary')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 32
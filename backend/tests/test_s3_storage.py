@@ -0,0 +1,105 @@
+import hashlib
+import os
+import pytest
+
+moto = pytest.importorskip('moto')
+boto3 = pytest.importorskip('boto3')
+
+from src.main import db
+from src.models.models import Project, Document
+from src.services import storage_service
+from src.services.storage_service import S3Storage, get_sharded_key, store_file, file_exists, delete_file, get_local_path
+
+BUCKET = 'bid-documents'
+
+
+@pytest.fixture
+def s3_storage(app, tmp_path, monkeypatch):
+    """S3 storage backend on a moto bucket, installed as the app's storage"""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+
+    with moto.mock_aws():
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+        storage = S3Storage(BUCKET, prefix='documents', region_name='us-east-1',
+                            cache_dir=str(tmp_path / 'cache'), cache_max_bytes=2500)
+        monkeypatch.setattr(storage_service, '_storage', storage)
+        yield storage
+
+
+def write_file(tmp_path, data, mtime=None):
+    """Write data to a new file named by its hash, returning its path and storage key"""
+    content_hash = hashlib.sha256(data).hexdigest()
+    path = str(tmp_path / f'{content_hash}.part')
+    with open(path, 'wb') as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path, get_sharded_key('blobs', content_hash)
+
+
+def test_sharded_key_layout():
+    content_hash = hashlib.sha256(b'spec').hexdigest()
+    assert get_sharded_key('blobs', content_hash) == f'blobs/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}'
+
+
+def test_put_get_exists_delete(s3_storage, tmp_path):
+    data = b'%PDF-1.4 specification'
+    path, key = write_file(tmp_path, data)
+
+    store_file(path, key)
+
+    assert not os.path.exists(path)
+    stored = s3_storage.client.get_object(Bucket=BUCKET, Key=f'documents/{key}')['Body'].read()
+    assert stored == data
+    assert file_exists(key)
+
+    # A cache miss downloads the object again
+    s3_storage.cache.delete(key)
+    with open(get_local_path(key), 'rb') as f:
+        assert f.read() == data
+
+    delete_file(key)
+    assert not file_exists(key)
+    assert get_local_path(key) is None
+
+
+def test_cache_evicts_least_recently_used_copies(s3_storage, tmp_path):
+    keys = []
+    for i in range(3):
+        path, key = write_file(tmp_path, bytes([i]) * 1000, mtime=1000 + i)
+        store_file(path, key)
+        keys.append(key)
+
+    # 3000 bytes exceed the 2500 byte budget, so the oldest copy was evicted
+    assert not s3_storage.cache.exists(keys[0])
+    assert s3_storage.cache.exists(keys[1]) and s3_storage.cache.exists(keys[2])
+    assert file_exists(keys[0])
+
+    # Reading the evicted file brings it back as the most recently used copy
+    with open(get_local_path(keys[0]), 'rb') as f:
+        assert f.read() == bytes([0]) * 1000
+    assert not s3_storage.cache.exists(keys[1])
+    assert s3_storage.cache.exists(keys[0]) and s3_storage.cache.exists(keys[2])
+
+
+def test_range_download_of_a_file_held_in_s3(s3_storage, client, tmp_path):
+    data = bytes(range(256)) * 4
+    path, key = write_file(tmp_path, data)
+    store_file(path, key)
+    s3_storage.cache.delete(key)
+
+    project = Project(name='Tower')
+    db.session.add(project)
+    db.session.flush()
+    document = Document(project_id=project.id, filename='spec.pdf', file_path=key, file_size=len(data),
+                        content_hash=hashlib.sha256(data).hexdigest(), mime_type='application/pdf')
+    db.session.add(document)
+    db.session.commit()
+
+    response = client.get(f'/api/documents/{document.id}/download', headers={'Range': 'bytes=100-199'})
+
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(data)}'
+    assert response.data == data[100:200]
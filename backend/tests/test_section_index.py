@@ -0,0 +1,144 @@
+import hashlib
+import fitz
+import pytest
+
+from src.main import db
+from src.models.models import Project, Document
+from src.services.pdf_service import build_section_index, SECTION_HEADING_PATTERN
+from src.services.storage_service import get_sharded_key, store_file
+
+
+@pytest.mark.parametrize('line, kind, number, title', [
+    ('SECTION 09 29 00 - GYPSUM BOARD', 'section', '09 29 00', 'GYPSUM BOARD'),
+    ('Section 092900 – Gypsum Board', 'section', '092900', 'Gypsum Board'),
+    ('  SECTION 09 29 00.13: ACOUSTIC BOARD', 'section', '09 29 00.13', 'ACOUSTIC BOARD'),
+    ('DIVISION 09 — FINISHES', 'division', '09', 'FINISHES'),
+    ('DIVISION 9', 'division', '9', ''),
+])
+def test_heading_pattern(line, kind, number, title):
+    match = SECTION_HEADING_PATTERN.search(line)
+
+    assert match.group(1).lower() == kind
+    assert match.group(2) == number
+    assert match.group(3).strip() == title
+
+
+@pytest.mark.parametrize('line', [
+    'PART 1 - GENERAL',
+    'Refer to SECTION 01 10 00 for the summary of work.',
+    'SECTIONS OF THE SPECIFICATION',
+])
+def test_heading_pattern_ignores_other_lines(line):
+    assert SECTION_HEADING_PATTERN.search(line) is None
+
+
+def test_offsets_of_csi_sections_and_parts():
+    pages = [
+        (1, 'DIVISION 09 - FINISHES\nSECTION 09 29 00 - GYPSUM BOARD\nPART 1 - GENERAL\nSubmittals.\n'),
+        (2, 'PART 2 - PRODUCTS\nType X board.\nSECTION 09 91 23 - INTERIOR PAINTING\nPART 1 - GENERAL\n'),
+        (3, 'DIVISION 10 - SPECIALTIES\nSECTION 10 14 00 - SIGNAGE\n'),
+    ]
+    text = ''.join(page_text for _, page_text in pages)
+
+    headings = build_section_index(pages)
+
+    assert [(h['kind'], h['number'], h['title'], h['page_number']) for h in headings] == [
+        ('division', '09', 'FINISHES', 1),
+        ('section', '09 29 00', 'GYPSUM BOARD', 1),
+        ('section', '09 91 23', 'INTERIOR PAINTING', 2),
+        ('division', '10', 'SPECIALTIES', 3),
+        ('section', '10 14 00', 'SIGNAGE', 3),
+    ]
+
+    division, gypsum, painting, specialties, signage = headings
+    assert text[gypsum['start_offset']:gypsum['end_offset']] == (
+        'SECTION 09 29 00 - GYPSUM BOARD\nPART 1 - GENERAL\nSubmittals.\nPART 2 - PRODUCTS\nType X board.\n'
+    )
+    assert text[painting['start_offset']:painting['end_offset']] == 'SECTION 09 91 23 - INTERIOR PAINTING\nPART 1 - GENERAL\n'
+    assert text[signage['start_offset']:signage['end_offset']] == 'SECTION 10 14 00 - SIGNAGE\n'
+
+    # A division runs up to the next division, over all of its sections
+    assert division['start_offset'] == 0
+    assert division['end_offset'] == specialties['start_offset']
+    assert specialties['end_offset'] == len(text)
+
+
+def test_heading_split_across_pages():
+    pages = [
+        (1, 'Type X board.\nSECTION 09 91 23\n'),
+        (2, '\nINTERIOR PAINTING\nPART 1 - GENERAL\n'),
+        (3, 'SECTION 09 96 00 -\n'),
+        (4, 'PART 1 - GENERAL\nHigh performance coatings.'),
+    ]
+    text = ''.join(page_text for _, page_text in pages)
+
+    painting, coatings = build_section_index(pages)
+
+    assert painting['page_number'] == 1
+    assert painting['title'] == 'INTERIOR PAINTING'
+    assert painting['heading'] == 'SECTION 09 91 23 INTERIOR PAINTING'
+    assert text[painting['start_offset']:].startswith('SECTION 09 91 23\n')
+    assert painting['end_offset'] == coatings['start_offset'] == len(pages[0][1]) + len(pages[1][1])
+
+    # A PART heading is not taken for the title
+    assert coatings['page_number'] == 3
+    assert coatings['title'] == ''
+    assert coatings['end_offset'] == len(text)
+
+
+def test_heading_at_the_top_of_a_page_without_a_trailing_newline():
+    pages = [(1, 'Type X board.'), (2, 'SECTION 09 91 23 - INTERIOR PAINTING')]
+
+    [painting] = build_section_index(pages)
+
+    assert painting['page_number'] == 2
+    assert painting['start_offset'] == len('Type X board.')
+    assert painting['end_offset'] == len('Type X board.SECTION 09 91 23 - INTERIOR PAINTING')
+
+
+def test_sections_route_returns_offsets_into_the_document_text(client, tmp_path):
+    page_texts = [
+        ['DIVISION 09 - FINISHES', 'SECTION 09 29 00 - GYPSUM BOARD', 'PART 1 - GENERAL'],
+        ['PART 2 - PRODUCTS', 'SECTION 09 91 23', 'INTERIOR PAINTING'],
+    ]
+    path = str(tmp_path / 'spec.pdf')
+    pdf = fitz.open()
+    for lines in page_texts:
+        page = pdf.new_page()
+        for i, line in enumerate(lines):
+            page.insert_text((72, 72 + 20 * i), line)
+    pdf.save(path)
+    pdf.close()
+
+    with fitz.open(path) as pdf:
+        text = ''.join(page.get_text() for page in pdf)
+    with open(path, 'rb') as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+    key = get_sharded_key('blobs', content_hash)
+    store_file(path, key)
+
+    project = Project(name='Tower')
+    db.session.add(project)
+    db.session.flush()
+    document = Document(project_id=project.id, filename='spec.pdf', file_path=key, content_hash=content_hash,
+                        mime_type='application/pdf')
+    db.session.add(document)
+    db.session.commit()
+
+    response = client.get(f'/api/proposals/document/{document.id}/sections')
+
+    assert response.status_code == 200
+    sections = response.get_json()['sections']
+    assert [(s['kind'], s['number'], s['title'], s['page_number']) for s in sections] == [
+        ('division', '09', 'FINISHES', 1),
+        ('section', '09 29 00', 'GYPSUM BOARD', 1),
+        ('section', '09 91 23', 'INTERIOR PAINTING', 2),
+    ]
+
+    division, gypsum, painting = sections
+    assert text[gypsum['start_offset']:gypsum['end_offset']].split() == (
+        'SECTION 09 29 00 - GYPSUM BOARD PART 1 - GENERAL PART 2 - PRODUCTS'.split()
+    )
+    assert text[painting['start_offset']:painting['end_offset']].split() == 'SECTION 09 91 23 INTERIOR PAINTING'.split()
+    assert division['start_offset'] == 0
+    assert division['end_offset'] == painting['end_offset'] == len(text)
@@ -16,13 +16,16 @@ const Dashboard: React.FC = () => {
   const [projects, setProjects] = useState<Project[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState<boolean>(false);
 
   useEffect(() => {
     const fetchProjects = async () => {
       try {
         setLoading(true);
-        const data = await projectApi.getProjects();
-        setProjects(data);
+        const page = await projectApi.getProjectsPage();
+        setProjects(page.projects);
+        setNextCursor(page.nextCursor);
         setError(null);
       } catch (err) {
         console.error('Error fetching projects:', err);
@@ -35,6 +38,21 @@ const Dashboard: React.FC = () => {
     fetchProjects();
   }, []);
 
+  const loadMoreProjects = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await projectApi.getProjectsPage({ cursor: nextCursor });
+      setProjects([...projects, ...page.projects]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Error fetching projects:', err);
+      alert('Failed to load more projects. Please try again.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const formatDate = (dateString: string | null) => {
     if (!dateString) return 'Not specified';
     const date = new Date(dateString);
@@ -89,7 +107,7 @@ const Dashboard: React.FC = () => {
         <>
           <div className="flex justify-between items-center mb-6">
             <div>
-              <h2 className="text-xl font-semibold">Projects ({projects.length})</h2>
+              <h2 className="text-xl font-semibold">Projects ({projects.length}{nextCursor ? '+' : ''})</h2>
             </div>
             <button 
               className="bg-blue-500 hover:bg-blue-600 text-white font-medium py-2 px-4 rounded"
@@ -205,6 +223,18 @@ const Dashboard: React.FC = () => {
             </table>
           </div>
           
+          {nextCursor && (
+            <div className="flex justify-center mt-4">
+              <button
+                className="bg-white border border-gray-300 hover:bg-gray-50 text-gray-700 font-medium py-2 px-4 rounded disabled:opacity-50"
+                onClick={loadMoreProjects}
+                disabled={loadingMore}
+              >
+                {loadingMore ? 'Loading...' : 'Load More'}
+              </button>
+            </div>
+          )}
+          
           <div className="mt-8">
             <h2 className="text-xl font-semibold mb-4">Process Emails</h2>
             <div className="bg-white shadow-md rounded-lg p-6">
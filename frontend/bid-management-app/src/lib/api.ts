@@ -5,12 +5,21 @@ const API_BASE_URL = 'http://localhost:5000/api';
 
 // Project API endpoints
 export const projectApi = {
-  // Get all projects
+  // Get the first page of projects, newest first
   getProjects: async () => {
     const response = await axios.get(`${API_BASE_URL}/projects/`);
     return response.data;
   },
   
+  // Get a page of projects; params may hold cursor, limit, fields, due_after, due_before and sender
+  getProjectsPage: async (params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/projects/`, { params });
+    return {
+      projects: response.data,
+      nextCursor: response.headers['x-next-cursor'] || null
+    };
+  },
+  
   // Get a specific project by ID
   getProject: async (projectId) => {
     const response = await axios.get(`${API_BASE_URL}/projects/${projectId}`);
@@ -41,6 +50,15 @@ export const projectApi = {
     return response.data;
   },
   
+  // Get a page of projects with document, estimate and proposal rollups; takes the getProjectsPage params
+  getProjectsSummaryPage: async (params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/projects/summary`, { params });
+    return {
+      projects: response.data,
+      nextCursor: response.headers['x-next-cursor'] || null
+    };
+  },
+  
   // Get project documents
   getProjectDocuments: async (projectId) => {
     const response = await axios.get(`${API_BASE_URL}/projects/${projectId}/documents`);
@@ -50,13 +68,25 @@ export const projectApi = {
 
 // Document API endpoints
 export const documentApi = {
-  // Get all documents
+  // Get all documents, newest first, following the X-Next-Cursor header from page to page
   getDocuments: async (projectId = null) => {
-    const url = projectId 
-      ? `${API_BASE_URL}/documents/?project_id=${projectId}`
-      : `${API_BASE_URL}/documents/`;
-    const response = await axios.get(url);
-    return response.data;
+    const documents = [];
+    let cursor = undefined;
+    do {
+      const page = await documentApi.getDocumentsPage({ project_id: projectId || undefined, cursor });
+      documents.push(...page.documents);
+      cursor = page.nextCursor || undefined;
+    } while (cursor);
+    return documents;
+  },
+  
+  // Get a page of documents; params may hold cursor, limit, fields, project_id and document_type
+  getDocumentsPage: async (params = {}) => {
+    const response = await axios.get(`${API_BASE_URL}/documents/`, { params });
+    return {
+      documents: response.data,
+      nextCursor: response.headers['x-next-cursor'] || null
+    };
   },
   
   // Get a specific document by ID
@@ -82,6 +112,37 @@ export const documentApi = {
     return response.data;
   },
   
+  // Upload a large document in chunks that can be retried individually
+  uploadDocumentResumable: async (projectId, file, documentType = null, parallelChunks = 3) => {
+    const session = (await axios.post(`${API_BASE_URL}/documents/uploads`, {
+      project_id: projectId,
+      filename: file.name,
+      total_size: file.size,
+      document_type: documentType
+    })).data;
+    
+    // Only send chunks the server doesn't have yet
+    const status = (await axios.get(`${API_BASE_URL}/documents/uploads/${session.id}`)).data;
+    const pending = [...status.missing_chunks];
+    
+    const worker = async () => {
+      while (pending.length > 0) {
+        const index = pending.shift();
+        const start = index * session.chunk_size;
+        const chunk = file.slice(start, Math.min(start + session.chunk_size, file.size));
+        await axios.put(`${API_BASE_URL}/documents/uploads/${session.id}/chunks/${index}`, chunk, {
+          headers: {
+            'Content-Type': 'application/octet-stream'
+          }
+        });
+      }
+    };
+    await Promise.all(Array.from({ length: parallelChunks }, worker));
+    
+    const response = await axios.post(`${API_BASE_URL}/documents/uploads/${session.id}/complete`);
+    return response.data;
+  },
+  
   // Update document metadata
   updateDocument: async (documentId, documentData) => {
     const response = await axios.put(`${API_BASE_URL}/documents/${documentId}`, documentData);
@@ -99,12 +160,35 @@ export const documentApi = {
     return `${API_BASE_URL}/documents/${documentId}/download`;
   },
   
+  // Get URL of a rendered page tile (zoom level 0 is the whole page)
+  getPageTileUrl: (documentId, pageNumber, zoom = 0, x = 0, y = 0) => {
+    return `${API_BASE_URL}/documents/${documentId}/pages/${pageNumber}/tile?z=${zoom}&x=${x}&y=${y}`;
+  },
+  
+  // Get URL of a page thumbnail
+  getPageThumbnailUrl: (documentId, pageNumber) => {
+    return `${API_BASE_URL}/documents/${documentId}/pages/${pageNumber}/thumbnail`;
+  },
+  
   // Extract text from document
   extractDocumentText: async (documentId) => {
     const response = await axios.get(`${API_BASE_URL}/proposals/document/${documentId}/extract`);
     return response.data;
   },
   
+  // Get URL streaming document text as newline-delimited JSON, one record per page
+  getDocumentTextStreamUrl: (documentId, fromPage = 1) => {
+    return `${API_BASE_URL}/proposals/document/${documentId}/extract/stream?from=${fromPage}`;
+  },
+  
+  // Get text of a range of document pages
+  getDocumentPages: async (documentId, fromPage = 1, toPage = fromPage) => {
+    const response = await axios.get(
+      `${API_BASE_URL}/proposals/document/${documentId}/pages?from=${fromPage}&to=${toPage}`
+    );
+    return response.data;
+  },
+  
   // Extract section from document
   extractDocumentSection: async (documentId, sectionName) => {
     const response = await axios.get(
@@ -113,6 +197,12 @@ export const documentApi = {
     return response.data;
   },
   
+  // Get the DIVISION/SECTION table of contents of a document
+  getDocumentSections: async (documentId) => {
+    const response = await axios.get(`${API_BASE_URL}/proposals/document/${documentId}/sections`);
+    return response.data;
+  },
+  
   // Get document metadata
   getDocumentMetadata: async (documentId) => {
     const response = await axios.get(`${API_BASE_URL}/proposals/document/${documentId}/metadata`);
@@ -120,6 +210,19 @@ export const documentApi = {
   }
 };
 
+// Search API endpoints
+export const searchApi = {
+  // Search the text of all documents, optionally within one project
+  searchDocuments: async (query, projectId = null) => {
+    const params = new URLSearchParams({ q: query });
+    if (projectId) {
+      params.append('project_id', projectId);
+    }
+    const response = await axios.get(`${API_BASE_URL}/search?${params.toString()}`);
+    return response.data;
+  }
+};
+
 // Email API endpoints
 export const emailApi = {
   // Check authentication status